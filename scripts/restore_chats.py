@@ -2,124 +2,1498 @@
 """
 Script para restaurar y organizar chats de Cursor desde la base de datos del workspace
 SIN usar Claude Dev para evitar crashes
+
+Por defecto el volcado se lee en streaming: los elementos del array JSON se
+procesan uno a uno y el resumen, las conversaciones largas y el consolidado se
+escriben a medida que llegan, así que la memoria no crece con el tamaño del
+volcado (exportaciones de varios GB incluidas).
+
+La restauración es incremental: cada mensaje se identifica por el hash de su
+origen (bubbleId, o conversación y posición) junto con su contenido, y el
+conjunto de hashes ya vistos se guarda en .restore_state.db, así que una nueva
+ejecución solo añade los mensajes nuevos; un mismo texto repetido en otro punto
+de la conversación ("continúa", "sí") se conserva. El consolidado es un
+JSONL append-only (all_chats_consolidated.jsonl) con un índice lateral de
+offsets (all_chats_consolidated.idx, un uint64 por mensaje) para leer cualquier
+mensaje sin recorrer el archivo. --full descarta el estado y restaura de cero.
+
+Con --db se lee directamente el state.vscdb del workspace (solo lectura, sin
+bloqueos) y se recuerda una marca de agua por base de datos: las siguientes
+ejecuciones solo leen las filas añadidas desde la última restauración.
+
+Con --export-all cada conversación se exporta además a su propio Markdown en
+conversations/, repartido en subdirectorios de 1000 archivos por rango de
+posición y escrito por un pool acotado de hilos; `export` hace lo mismo con
+todo el consolidado existente.
+
+Con --archive el consolidado se guarda además comprimido por bloques de
+mensajes (all_chats.archive, gzip o zstd) con un índice de bloques al final:
+`get` lee un mensaje o un rango descomprimiendo solo los bloques necesarios.
+
+Con --near-duplicates los mensajes casi idénticos (respuestas repetidas del
+asistente, prompts pegados de nuevo) se agrupan con MinHash + LSH sobre
+shingles de palabras: se guarda una copia canónica por grupo y el resto queda en
+el consolidado como referencia (`duplicate_of`), sin texto ni entrada en el índice
+de búsqueda. Las firmas y las claves de banda viven en la base de estado
+(tablas indexadas), así que la memoria no crece con el número de grupos.
+chat_summary.md incluye las estadísticas de los grupos.
+
+El subcomando `workspaces` descubre las bases state.vscdb (por defecto en el
+workspaceStorage de Cursor) y los volcados indicados, restaura cada uno en
+workspaces/<nombre>-<hash>/ con un pool de procesos y fusiona el resultado en
+timeline.md: las sesiones de todos los workspaces intercaladas por la fecha de
+su primer mensaje (createdAt, timingInfo o unixMs de Cursor) o, si sus mensajes
+no la traen, por la última modificación de la base del workspace. Una sesión es
+una conversación (el composer de bubbleId:<composer>:<burbuja>) sin pausas de
+más de 30 minutos entre mensajes.
+
+Cada mensaje se indexa además en un índice de texto completo (SQLite FTS5,
+chats_index.db) que se mantiene de forma incremental; `search` lo consulta con
+resultados ordenados por relevancia, fragmentos y filtros por tipo.
 """
 
+import argparse
+import contextlib
+import gzip
+import hashlib
 import json
 import os
+import re
+import shutil
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+DEFAULT_INPUT = '/tmp/cursor_chats_raw.json'
+DEFAULT_OUTPUT_DIR = 'docs/restored-chats'
+PREVIEW_CHARS = 150
+LONG_CONVERSATION_CHARS = 1000
+MAX_LONG_CONVERSATIONS = 10
+
+# Claves del state.vscdb con historial de chat (ItemTable) y prefijos por mensaje (cursorDiskKV)
+CHAT_TABLES = ('ItemTable', 'cursorDiskKV')
+CHAT_KEYS = (
+    'aiService.prompts',
+    'workbench.panel.aichat.view.aichat.chatdata',
+    'composer.composerData',
+)
+CHAT_KEY_PREFIXES = ('bubbleId:',)
+# aiService.generations repite el texto de cada prompt: solo aporta su momento (unixMs)
+PROMPTS_KEY = 'aiService.prompts'
+GENERATIONS_KEY = 'aiService.generations'
+RESTORE_STATE_FILE = '.restore_state.db'
+SEARCH_INDEX_FILE = 'chats_index.db'
+CONSOLIDATED_FILE = 'all_chats_consolidated.jsonl'
+CONSOLIDATED_INDEX_FILE = 'all_chats_consolidated.idx'
+OFFSET_FORMAT = '<Q'
+OFFSET_SIZE = struct.calcsize(OFFSET_FORMAT)
+ARCHIVE_FILE = 'all_chats.archive'
+ARCHIVE_MAGIC = b'CCHA'
+ARCHIVE_FOOTER_MAGIC = b'CCHF'
+ARCHIVE_VERSION = 1
+ARCHIVE_CODECS = ('gzip', 'zstd')
+ARCHIVE_CHUNK_MESSAGES = 256
+# Cabecera (magic, versión, códec, mensajes por bloque), entrada de bloque (offset, bytes)
+# y cola (offset de la tabla de bloques, mensajes, magic)
+ARCHIVE_HEADER = struct.Struct('<4sBBI')
+ARCHIVE_CHUNK = struct.Struct('<QI')
+ARCHIVE_TRAILER = struct.Struct('<QQ4s')
+EXPORT_DIR = 'conversations'
+WORKSPACES_DIR = 'workspaces'
+SESSIONS_FILE = 'sessions.jsonl'
+TIMELINE_FILE = 'timeline.md'
+# Una sesión es una conversación (composer) sin pausas de más de 30 minutos entre mensajes
+SESSION_GAP_SECONDS = 30 * 60
+# Casi duplicados: firma MinHash de 64 valores; las bandas LSH se derivan de --similarity
+# (con 0.85, 8 bandas de 8 filas) para emparejar al menos el 90% de los pares en el umbral
+NEAR_DUPLICATE_SIMILARITY = 0.85
+NEAR_DUPLICATE_MIN_CHARS = 200
+SHINGLE_WORDS = 3
+MINHASH_BINS = 64
+LSH_MIN_RECALL = 0.9
+MINHASH_EMPTY = 1 << 32
+MINHASH_SIGNATURE = struct.Struct(f'<{MINHASH_BINS}Q')
+EXPORT_SHARD_SIZE = 1000
+
+# Caracteres que pueden seguir a un número JSON ya decodificado si quedó cortado por el bloque
+NUMBER_TAIL = re.compile(r'[0-9.eE+-]*')
+
+def iter_json_array(path, chunk_size=1 << 18):
+    """Itera los elementos de un array JSON de nivel superior leyendo el archivo por bloques"""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        pos = 0
+        eof = False
+        read_size = chunk_size
+
+        def fill():
+            # Descartar lo ya consumido y añadir el siguiente bloque
+            nonlocal buffer, pos, eof
+            chunk = f.read(read_size)
+            if not chunk:
+                eof = True
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+        def skip_whitespace():
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    return
+                fill()
+
+        skip_whitespace()
+        if pos >= len(buffer) or buffer[pos] != '[':
+            raise ValueError(f"{path} no contiene un array JSON")
+        pos += 1
+
+        skip_whitespace()
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+
+        while True:
+            skip_whitespace()
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Elemento cortado por el final del bloque: leer más y reintentar;
+                # el bloque crece para no re-decodificar N veces un elemento enorme
+                if eof:
+                    raise
+                read_size *= 2
+                fill()
+                continue
+            if not eof and NUMBER_TAIL.fullmatch(buffer, end) and isinstance(item, (int, float)):
+                # Un número cortado ("3." o "1e") podría continuar en el siguiente bloque
+                fill()
+                continue
+            pos = end
+            read_size = chunk_size
+            yield item
+
+            skip_whitespace()
+            if pos >= len(buffer):
+                raise ValueError(f"{path}: array JSON sin cerrar")
+            if buffer[pos] == ',':
+                pos += 1
+            elif buffer[pos] == ']':
+                return
+            else:
+                raise ValueError(f"{path}: se esperaba ',' o ']' en la posición {pos}")
+
+def classify_command_type(command_type):
+    """Mapea el commandType de Cursor a (tipo, rol); rol es 'user', 'assistant' o None"""
+    if isinstance(command_type, int):
+        if command_type == 4:
+            return 'assistant', 'assistant'
+        if command_type == 3:
+            return 'user', 'user'
+        return f'type_{command_type}', None
+    # Para strings (casos legacy)
+    command_type_str = str(command_type)
+    if command_type in ('user', 'assistant'):
+        return command_type_str, command_type
+    return command_type_str, None
+
+def message_hash(msg_type, text, source=''):
+    """Hash de un mensaje (origen + tipo + texto) para la deduplicación
+
+    `source` identifica el mensaje dentro de su historial (ver `message_source`), así
+    que el mismo texto en dos posiciones cuenta como dos mensajes.
+    """
+    return hashlib.blake2b(f"{source}\0{msg_type}\0{text}".encode('utf-8'), digest_size=16).digest()
+
+def message_source(item, fallback):
+    """Identidad estable de un mensaje: su bubbleId o generationUUID si lo trae; si no, `fallback`"""
+    if isinstance(item, dict):
+        if item.get('bubbleId'):
+            return f"bubble:{item['bubbleId']}"
+        if item.get('generationUUID'):
+            return f"generation:{item['generationUUID']}"
+    return fallback
+
+class RestoreState:
+    """Estado persistente de la restauración (SQLite): hashes vistos, marcas de agua y contadores
+
+    Los hashes y el resto del estado se confirman en la misma transacción, así que
+    una ejecución interrumpida no deja mensajes marcados como vistos sin escribir.
+    """
+
+    def __init__(self, output_dir, reset=False):
+        self.path = Path(output_dir) / RESTORE_STATE_FILE
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        if reset:
+            self._conn.executescript("DROP TABLE IF EXISTS seen; DROP TABLE IF EXISTS meta; "
+                                     "DROP TABLE IF EXISTS near_duplicates; DROP TABLE IF EXISTS near_duplicate_bands; "
+                                     "DROP TABLE IF EXISTS near_duplicate_layout;")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS seen (hash BLOB PRIMARY KEY) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        """)
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'state'").fetchone()
+        self.data = json.loads(row[0]) if row else {}
+
+    def is_new(self, digest):
+        """Marca el hash como visto; True si no lo estaba"""
+        return self._conn.execute("INSERT OR IGNORE INTO seen VALUES (?)", (digest,)).rowcount == 1
+
+    def commit(self):
+        self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('state', ?)",
+                           (json.dumps(self.data, ensure_ascii=False),))
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+def lsh_bands(similarity, bins=MINHASH_BINS, min_recall=LSH_MIN_RECALL):
+    """(bandas, filas) más selectivas cuya probabilidad de emparejar dos firmas con
+    similitud `similarity` (1 - (1 - s^filas)^bandas) sea al menos `min_recall`
+
+    Más filas por banda significa menos candidatos que comparar; por debajo de la
+    similitud pedida la probabilidad cae rápido, así que no se pierden grupos.
+    """
+    similarity = min(max(similarity, 0.0), 1.0)
+    rows = 1
+    for candidate in range(2, bins + 1):
+        if 1 - (1 - similarity ** candidate) ** (bins // candidate) < min_recall:
+            break
+        rows = candidate
+    return bins // rows, rows
+
+def minhash_signature(text):
+    """Firma MinHash de una sola permutación (con densificación) sobre shingles de palabras
+
+    Cada shingle se hashea una vez (crc32) y va al bin `h % MINHASH_BINS`; los bins
+    vacíos toman el valor del siguiente no vacío, desplazado según la distancia.
+    Los shingles se arman y hashean con map/zip (sin bucle de Python por shingle) y
+    dentro de un bin basta comparar `h`, que ordena igual que `h // MINHASH_BINS`.
+    """
+    words = list(map(str.encode, text.lower().split()))
+    if len(words) > SHINGLE_WORDS:
+        shingles = map(b' '.join, zip(*(words[offset:] for offset in range(SHINGLE_WORDS))))
+    else:
+        shingles = (b' '.join(words),)
+    lowest = [MINHASH_EMPTY * MINHASH_BINS] * MINHASH_BINS
+    for h in map(zlib.crc32, shingles):
+        slot = h % MINHASH_BINS
+        if h < lowest[slot]:
+            lowest[slot] = h
+    bins = [h // MINHASH_BINS for h in lowest]
+
+    signature = list(bins)
+    for slot, value in enumerate(bins):
+        if value == MINHASH_EMPTY:
+            distance = 1
+            while bins[(slot + distance) % MINHASH_BINS] == MINHASH_EMPTY:
+                distance += 1
+            signature[slot] = bins[(slot + distance) % MINHASH_BINS] + distance * MINHASH_EMPTY
+    return tuple(signature)
+
+class NearDuplicateIndex:
+    """Agrupa mensajes casi duplicados con MinHash + LSH
+
+    Solo se guardan las firmas de los mensajes canónicos (uno por grupo) en la base
+    de estado, junto con una tabla indexada de claves de banda. Cada mensaje nuevo
+    consulta solo los canónicos que comparten alguna banda de su firma, así que el
+    coste es lineal en mensajes y la memoria no crece con el número de grupos.
+    Las escrituras van en la transacción del estado y se confirman con ella.
+    """
+
+    def __init__(self, conn, similarity=NEAR_DUPLICATE_SIMILARITY):
+        self._conn = conn
+        self.similarity = similarity
+        self.bands, self.rows = lsh_bands(similarity)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS near_duplicates (
+                position INTEGER PRIMARY KEY, signature BLOB NOT NULL, members INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS near_duplicate_bands (
+                band_key INTEGER NOT NULL, position INTEGER NOT NULL,
+                PRIMARY KEY (band_key, position)) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS near_duplicate_layout (bands INTEGER NOT NULL, rows INTEGER NOT NULL);
+        """)
+        if self._conn.execute("SELECT bands, rows FROM near_duplicate_layout").fetchall() != [(self.bands, self.rows)]:
+            self._rebuild_bands()
+
+    def _rebuild_bands(self):
+        """Recalcula las claves de banda desde las firmas guardadas (otro --similarity cambia las bandas)"""
+        self._conn.execute("DELETE FROM near_duplicate_bands")
+        self._conn.execute("DELETE FROM near_duplicate_layout")
+        self._conn.execute("INSERT INTO near_duplicate_layout VALUES (?, ?)", (self.bands, self.rows))
+        signatures = self._conn.execute("SELECT position, signature FROM near_duplicates")
+        while True:
+            batch = signatures.fetchmany(1000)
+            if not batch:
+                break
+            self._conn.executemany("INSERT OR IGNORE INTO near_duplicate_bands VALUES (?, ?)",
+                                   [(key, position) for position, packed in batch for key in self._bands(packed)])
+
+    def _bands(self, packed):
+        """Claves de banda de una firma empaquetada: estables entre procesos (blake2b, no hash())"""
+        width = self.rows * 8
+        return [int.from_bytes(hashlib.blake2b(packed[band * width:(band + 1) * width], digest_size=8,
+                                               person=band.to_bytes(2, 'little')).digest(), 'little', signed=True)
+                for band in range(self.bands)]
+
+    def match(self, position, text):
+        """Retorna (posición canónica, similitud) si `text` es casi duplicado; si no, lo registra como canónico"""
+        if len(text) < NEAR_DUPLICATE_MIN_CHARS:
+            return None
+        signature = minhash_signature(text)
+        packed = MINHASH_SIGNATURE.pack(*signature)
+        keys = self._bands(packed)
+        candidates = self._conn.execute(
+            "SELECT position, signature FROM near_duplicates WHERE position IN ("
+            f"SELECT position FROM near_duplicate_bands WHERE band_key IN ({', '.join('?' * len(keys))}))",
+            keys
+        )
+
+        best = None
+        for candidate, other in candidates:
+            similarity = sum(a == b for a, b in zip(signature, MINHASH_SIGNATURE.unpack(other))) / MINHASH_BINS
+            if similarity >= self.similarity and (best is None or similarity > best[1]):
+                best = (candidate, similarity)
+        if best is None:
+            self._conn.execute("INSERT OR REPLACE INTO near_duplicates VALUES (?, ?, 1)", (position, packed))
+            self._conn.executemany("INSERT OR IGNORE INTO near_duplicate_bands VALUES (?, ?)",
+                                   [(key, position) for key in keys])
+            return None
+
+        self._conn.execute("UPDATE near_duplicates SET members = members + 1 WHERE position = ?", (best[0],))
+        return best
+
+    def stats(self, top=5):
+        """Número de grupos con casi duplicados y los `top` mayores [(miembros, posición canónica)]"""
+        clusters = self._conn.execute("SELECT COUNT(*) FROM near_duplicates WHERE members > 1").fetchone()[0]
+        largest = self._conn.execute("SELECT members, position FROM near_duplicates WHERE members > 1 "
+                                     "ORDER BY members DESC, position DESC LIMIT ?", (top,)).fetchall()
+        return {'clusters': clusters, 'largest': largest}
+
+class ChatSearchIndex:
+    """Índice de texto completo (FTS5) de los mensajes; el rowid es la posición en el consolidado"""
+
+    def __init__(self, path, reset=False):
+        self.path = Path(path)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        if reset:
+            self._conn.execute("DROP TABLE IF EXISTS messages")
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS messages USING fts5("
+            "text, type UNINDEXED, length UNINDEXED, msg_index UNINDEXED, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        self._pending = []
+
+    def add(self, ordinal, conv):
+        self._pending.append((ordinal, conv['text'], conv['type'], conv['length'], conv['index']))
+        if len(self._pending) >= 1000:
+            self._flush()
+
+    def _flush(self):
+        if self._pending:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO messages(rowid, text, type, length, msg_index) VALUES (?, ?, ?, ?, ?)",
+                self._pending
+            )
+            self._pending = []
+
+    def close(self, optimize=False):
+        self._flush()
+        if optimize:
+            # Fusiona los segmentos del índice tras una construcción completa
+            self._conn.execute("INSERT INTO messages(messages) VALUES ('optimize')")
+        self._conn.commit()
+        self._conn.close()
+
+    def search(self, query, types=None, limit=20, raw=False):
+        """Retorna [(posición, tipo, longitud, índice, fragmento, puntuación)] por relevancia (bm25)"""
+        match = query if raw else fts_phrase_query(query)
+        sql = ("SELECT rowid, type, length, msg_index, snippet(messages, 0, '[', ']', '…', 16), rank "
+               "FROM messages WHERE messages MATCH ?")
+        params = [match]
+        if types:
+            sql += f" AND type IN ({', '.join('?' * len(types))})"
+            params += list(types)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+        return self._conn.execute(sql, params).fetchall()
+
+def fts_phrase_query(query):
+    """Convierte texto libre en una consulta FTS5 segura: cada palabra como término entre comillas"""
+    terms = [term.replace('"', '""') for term in query.split()]
+    return ' '.join(f'"{term}"' for term in terms)
+
+def conversation_markdown(conv, extracted_at=None):
+    """Documento Markdown de una conversación (encabezado + texto)"""
+    extracted_at = extracted_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    if 'duplicate_of' in conv:
+        body = (f"_Casi duplicado (similitud {conv['similarity']:.0%}) del mensaje #{conv['duplicate_of']}: "
+                f"`restore_chats.py show {conv['duplicate_of']}`_\n\n> {conv['preview']}\n")
+    else:
+        body = conv['text']
+    return (f"# Conversación #{conv['index']} - {conv['type'].upper()}\n\n"
+            f"**Tipo:** {conv['type']}\n"
+            f"**Longitud:** {conv['length']} caracteres\n"
+            f"**Fecha de extracción:** {extracted_at}\n\n"
+            f"---\n\n"
+            f"{body}")
+
+class ConversationExporter:
+    """Exporta cada conversación a su propio Markdown con un pool acotado de hilos
+
+    Los archivos se reparten en subdirectorios de EXPORT_SHARD_SIZE por rango de
+    posición (conversations/0001000-0001999/...), así ningún directorio crece sin
+    límite. El documento se compone en memoria y se escribe con una sola llamada;
+    como mucho `max_pending` documentos esperan en cola, así que la memoria no
+    depende del número de conversaciones.
+    """
+
+    def __init__(self, output_dir, workers=None, max_pending=None, reset=False):
+        self.export_dir = Path(output_dir) / EXPORT_DIR
+        if reset and self.export_dir.exists():
+            shutil.rmtree(self.export_dir)
+        self.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.exported = 0
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='export')
+        self._slots = threading.BoundedSemaphore(max_pending or self.workers * 8)
+        self._shards = set()
+        self._errors = []
+        self._extracted_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    def path_for(self, position, conv):
+        start = position // EXPORT_SHARD_SIZE * EXPORT_SHARD_SIZE
+        shard = f"{start:07d}-{start + EXPORT_SHARD_SIZE - 1:07d}"
+        return self.export_dir / shard / f"conversation_{position:07d}_{conv['type']}.md"
+
+    def add(self, position, conv):
+        path = self.path_for(position, conv)
+        if path.parent not in self._shards:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._shards.add(path.parent)
+
+        data = conversation_markdown(conv, self._extracted_at).encode('utf-8')
+        self._slots.acquire()
+        future = self._executor.submit(self._write, path, data)
+        future.add_done_callback(self._done)
+        self.exported += 1
+
+    @staticmethod
+    def _write(path, data):
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    def _done(self, future):
+        self._slots.release()
+        if future.exception() is not None:
+            self._errors.append(future.exception())
+
+    def close(self):
+        """Espera a que terminen las escrituras pendientes; propaga el primer error"""
+        self._executor.shutdown(wait=True)
+        if self._errors:
+            raise self._errors[0]
+        return self.exported
+
+class ChatRestoreWriter:
+    """Escribe los archivos de salida de forma incremental, conversación a conversación
+
+    El consolidado (JSONL), su índice de offsets y el índice parcial del resumen
+    solo crecen; los tamaños confirmados se guardan en `stats()`, y al reabrirlos se
+    recortan a esos tamaños para descartar lo que escribió una ejecución interrumpida.
+    """
+
+    def __init__(self, output_dir, stats=None, build_index=True, export_all=False, workers=None,
+                 archive=None):
+        """Con `stats` (de una restauración anterior) se amplían los archivos existentes"""
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.summary_file = self.output_dir / "chat_summary.md"
+        self.all_chats_file = self.output_dir / CONSOLIDATED_FILE
+        self.offsets_file = self.output_dir / CONSOLIDATED_INDEX_FILE
+        # El índice se escribe aparte y se une al resumen al final (las estadísticas van primero)
+        self._index_path = self.output_dir / ".chat_summary_index.part"
+
+        stats = stats or {}
+        self.incremental = bool(stats) and self.all_chats_file.exists() and self._index_path.exists()
+        if not self.incremental:
+            stats = {}
+        self.total_items = stats.get('total_items', 0)
+        self.conversations = stats.get('conversations', 0)
+        self.user_messages = stats.get('user_messages', 0)
+        self.assistant_messages = stats.get('assistant_messages', 0)
+        self.long_conversations = stats.get('long_conversations', 0)
+        self.near_duplicates = stats.get('near_duplicates', 0)
+        self.near_duplicate_chars = stats.get('near_duplicate_chars', 0)
+        # Duplicados de esta ejecución (los ya restaurados cuentan como duplicados al releerlos)
+        self.duplicates = 0
+        self.consolidated_bytes = stats.get('consolidated_bytes', 0)
+        self.summary_index_bytes = stats.get('summary_index_bytes', 0)
+
+        self._consolidated = self._open_append(self.all_chats_file, self.consolidated_bytes)
+        self._offsets = self._open_append(self.offsets_file, self.conversations * OFFSET_SIZE)
+        self._index = self._open_append(self._index_path, self.summary_index_bytes)
+
+        self.search_index = None
+        if build_index:
+            index_path = self.output_dir / SEARCH_INDEX_FILE
+            if self.incremental and not index_path.exists():
+                print(f"⚠️ No existe {index_path}: solo se indexarán los mensajes nuevos "
+                      f"(reconstrúyelo con el subcomando `index`)")
+            self.search_index = ChatSearchIndex(index_path, reset=not self.incremental)
+
+        self.exporter = None
+        if export_all:
+            self.exporter = ConversationExporter(self.output_dir, workers, reset=not self.incremental)
+
+        self.archive = self._open_archive(archive) if archive else None
+
+    def _open_archive(self, codec):
+        """Continúa el archivo comprimido; si no cuadra con el consolidado se reconstruye desde él"""
+        path = self.output_dir / ARCHIVE_FILE
+        if not self.incremental:
+            return ChatArchiveWriter(path, codec)
+        if path.exists():
+            try:
+                archive = ChatArchiveWriter(path, append=True)
+                if archive.count == self.conversations and archive.codec == codec:
+                    return archive
+                archive.close()
+            except ValueError:
+                pass
+        print(f"🗜️ {path} no existe o no corresponde al consolidado: se reconstruye")
+        self._consolidated.flush()
+        archive = ChatArchiveWriter(path, codec)
+        with open(self.all_chats_file, 'rb') as f:
+            for line in f:
+                archive.add(line)
+        return archive
+
+    def _open_append(self, path, size):
+        """Abre un archivo append-only recortado al último tamaño confirmado"""
+        f = open(path, 'ab' if self.incremental else 'wb')
+        if self.incremental and f.tell() != size:
+            f.truncate(size)
+            f.seek(size)
+        return f
+
+    def stats(self):
+        """Contadores y tamaños confirmados, para continuar en la siguiente restauración"""
+        return {
+            'total_items': self.total_items,
+            'conversations': self.conversations,
+            'user_messages': self.user_messages,
+            'assistant_messages': self.assistant_messages,
+            'long_conversations': self.long_conversations,
+            'near_duplicates': self.near_duplicates,
+            'near_duplicate_chars': self.near_duplicate_chars,
+            'consolidated_bytes': self.consolidated_bytes,
+            'summary_index_bytes': self.summary_index_bytes,
+        }
+
+    def add(self, conv, role=None):
+        if role == 'user':
+            self.user_messages += 1
+        elif role == 'assistant':
+            self.assistant_messages += 1
+
+        reference = conv.get('duplicate_of')
+        if reference is not None:
+            self.near_duplicates += 1
+            self.near_duplicate_chars += conv['length']
+
+        msg_type = "👤" if conv['type'] == 'user' else "🤖" if conv['type'] == 'assistant' else "❓"
+        similar = f" ≈ #{reference}" if reference is not None else ""
+        entry = (f"{conv['index']:3d}. {msg_type} **{conv['type'].upper()}** ({conv['length']} chars){similar}\n"
+                 f"     _{conv['preview']}_\n\n").encode('utf-8')
+        self._index.write(entry)
+        self.summary_index_bytes += len(entry)
+
+        line = (json.dumps(conv, ensure_ascii=False) + '\n').encode('utf-8')
+        self._offsets.write(struct.pack(OFFSET_FORMAT, self.consolidated_bytes))
+        self._consolidated.write(line)
+        self.consolidated_bytes += len(line)
+        if self.search_index is not None and reference is None:
+            self.search_index.add(self.conversations, conv)
+        if self.exporter is not None:
+            self.exporter.add(self.conversations, conv)
+        if self.archive is not None:
+            self.archive.add(line)
+        self.conversations += 1
+
+        # Crear archivos individuales para conversaciones largas (>1000 caracteres)
+        if conv['length'] > LONG_CONVERSATION_CHARS and reference is None:
+            if self.long_conversations < MAX_LONG_CONVERSATIONS:
+                self._write_conversation(conv)
+            self.long_conversations += 1
+
+    def _write_conversation(self, conv):
+        filename = f"conversation_{conv['index']:03d}_{conv['type']}.md"
+        with open(self.output_dir / filename, 'w', encoding='utf-8') as f:
+            f.write(conversation_markdown(conv))
+
+    def close(self, total_items=None, near_duplicates=None):
+        """Cierra los archivos append-only y compone el resumen: estadísticas + índice
+
+        `near_duplicates` son las estadísticas de NearDuplicateIndex.stats(), si se usó.
+        """
+        if total_items is not None:
+            self.total_items = total_items
+        if self.search_index is not None:
+            self.search_index.close(optimize=not self.incremental)
+        if self.exporter is not None:
+            self.exporter.close()
+        if self.archive is not None:
+            self.archive.close()
+        for f in (self._consolidated, self._offsets, self._index):
+            f.close()
+
+        with open(self.summary_file, 'w', encoding='utf-8') as f:
+            f.write(f"# 📋 RESUMEN DE CHATS RESTAURADOS - PROYECTO COOMUNITY\n\n")
+            f.write(f"**Fecha de restauración:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+            f.write(f"## 📊 Estadísticas\n\n")
+            f.write(f"- **Total de elementos:** {self.total_items}\n")
+            f.write(f"- **Mensajes de usuario:** {self.user_messages}\n")
+            f.write(f"- **Mensajes del asistente:** {self.assistant_messages}\n")
+            f.write(f"- **Conversaciones procesadas:** {self.conversations}\n")
+            f.write(f"- **Omitidos en la última ejecución (ya restaurados o duplicados):** {self.duplicates}\n\n")
+
+            if near_duplicates is not None:
+                f.write(f"## 🧬 Casi Duplicados\n\n")
+                f.write(f"- **Grupos con casi duplicados:** {near_duplicates['clusters']}\n")
+                f.write(f"- **Mensajes guardados como referencia:** {self.near_duplicates}\n")
+                f.write(f"- **Caracteres no repetidos en el consolidado:** {self.near_duplicate_chars}\n\n")
+                for members, position in near_duplicates['largest']:
+                    canonical = read_consolidated_message(self.output_dir, position)
+                    f.write(f"- **#{position}** ({members} mensajes, {canonical['type']}): _{canonical['preview']}_\n")
+                if near_duplicates['largest']:
+                    f.write(f"\n")
 
-def process_cursor_chats():
-    # Leer los datos extraídos
-    with open('/tmp/cursor_chats_raw.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
+            f.write(f"## 🗂️ Índice de Conversaciones\n\n")
+            f.flush()
+            with open(self._index_path, 'rb') as index:
+                shutil.copyfileobj(index, f.buffer)
+
+def read_consolidated_message(output_dir, position):
+    """Lee el mensaje número `position` del consolidado usando el índice de offsets"""
+    output_dir = Path(output_dir)
+    with open(output_dir / CONSOLIDATED_INDEX_FILE, 'rb') as offsets:
+        offsets.seek(position * OFFSET_SIZE)
+        packed = offsets.read(OFFSET_SIZE)
+    if len(packed) != OFFSET_SIZE or position < 0:
+        raise IndexError(f"No existe el mensaje {position}")
+    with open(output_dir / CONSOLIDATED_FILE, 'rb') as consolidated:
+        consolidated.seek(struct.unpack(OFFSET_FORMAT, packed)[0])
+        return json.loads(consolidated.readline())
+
+def archive_codec(name):
+    """Retorna (comprimir, descomprimir) para el códec; zstd requiere el paquete zstandard"""
+    if name == 'gzip':
+        return (lambda data: gzip.compress(data, compresslevel=6, mtime=0)), gzip.decompress
+    if name == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("El códec zstd requiere el paquete zstandard (pip install zstandard)")
+        return zstandard.ZstdCompressor(level=3).compress, zstandard.ZstdDecompressor().decompress
+    raise ValueError(f"Códec desconocido: {name} (disponibles: {', '.join(ARCHIVE_CODECS)})")
+
+class ChatArchive:
+    """Lector de all_chats.archive con acceso aleatorio
+
+    Cada bloque guarda `chunk_messages` líneas JSONL comprimidas; la tabla de
+    bloques del final permite leer el mensaje `i` descomprimiendo solo su bloque.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        try:
+            magic, version, codec_id, self.chunk_messages = ARCHIVE_HEADER.unpack(
+                self._file.read(ARCHIVE_HEADER.size))
+            if magic != ARCHIVE_MAGIC or version != ARCHIVE_VERSION or codec_id >= len(ARCHIVE_CODECS):
+                raise ValueError(f"{self.path} no es un archivo de chats válido")
+            self._file.seek(-ARCHIVE_TRAILER.size, os.SEEK_END)
+            self.footer_offset, self.count, footer_magic = ARCHIVE_TRAILER.unpack(
+                self._file.read(ARCHIVE_TRAILER.size))
+            if footer_magic != ARCHIVE_FOOTER_MAGIC:
+                raise ValueError(f"{self.path} está incompleto (falta la tabla de bloques)")
+            chunks = -(-self.count // self.chunk_messages)
+            self._file.seek(self.footer_offset)
+            self.chunks = list(ARCHIVE_CHUNK.iter_unpack(self._file.read(chunks * ARCHIVE_CHUNK.size)))
+        except (struct.error, OSError):
+            self._file.close()
+            raise ValueError(f"{self.path} no es un archivo de chats válido")
+        except ValueError:
+            self._file.close()
+            raise
+        self.codec = ARCHIVE_CODECS[codec_id]
+        self._decompress = archive_codec(self.codec)[1]
+        self._cached_chunk = None
+        self._cached_lines = None
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def chunk_lines(self, chunk):
+        """Líneas JSONL (sin salto final) del bloque; se recuerda el último descomprimido"""
+        if chunk != self._cached_chunk:
+            offset, size = self.chunks[chunk]
+            self._file.seek(offset)
+            self._cached_lines = self._decompress(self._file.read(size)).split(b'\n')[:-1]
+            self._cached_chunk = chunk
+        return self._cached_lines
+
+    def __getitem__(self, position):
+        if not 0 <= position < self.count:
+            raise IndexError(f"No existe el mensaje {position}")
+        chunk, offset = divmod(position, self.chunk_messages)
+        return json.loads(self.chunk_lines(chunk)[offset])
+
+    def iter_range(self, start=0, stop=None):
+        """Itera los mensajes [start, stop) leyendo cada bloque una sola vez"""
+        stop = self.count if stop is None else min(stop, self.count)
+        for position in range(max(start, 0), stop):
+            yield self[position]
+
+class ChatArchiveWriter:
+    """Escribe all_chats.archive; con `append` continúa uno existente (completando su último bloque)"""
+
+    def __init__(self, path, codec='gzip', chunk_messages=ARCHIVE_CHUNK_MESSAGES, append=False):
+        self.path = Path(path)
+        self._pending = []
+        self.chunks = []
+        self.count = 0
+        if append:
+            with ChatArchive(self.path) as archive:
+                codec, chunk_messages = archive.codec, archive.chunk_messages
+                self.chunks = archive.chunks
+                self.count = len(archive)
+                resume = archive.footer_offset
+                if self.count % chunk_messages:
+                    self._pending = [line + b'\n' for line in archive.chunk_lines(len(self.chunks) - 1)]
+                    resume = self.chunks.pop()[0]
+        # El códec se resuelve antes de tocar el archivo (zstd puede no estar instalado)
+        self._compress = archive_codec(codec)[0]
+        if append:
+            self._file = open(self.path, 'r+b')
+            self._file.truncate(resume)
+            self._file.seek(resume)
+        else:
+            self._file = open(self.path, 'wb')
+            self._file.write(ARCHIVE_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION,
+                                                 ARCHIVE_CODECS.index(codec), chunk_messages))
+        self.codec = codec
+        self.chunk_messages = chunk_messages
+
+    def add(self, line):
+        """Añade una línea JSONL (bytes terminados en salto de línea)"""
+        self._pending.append(line)
+        self.count += 1
+        if len(self._pending) >= self.chunk_messages:
+            self._flush_chunk()
+
+    def _flush_chunk(self):
+        if self._pending:
+            data = self._compress(b''.join(self._pending))
+            self.chunks.append((self._file.tell(), len(data)))
+            self._file.write(data)
+            self._pending = []
+
+    def close(self):
+        """Escribe el bloque pendiente y la tabla de bloques; retorna el tamaño del archivo"""
+        self._flush_chunk()
+        footer_offset = self._file.tell()
+        for chunk in self.chunks:
+            self._file.write(ARCHIVE_CHUNK.pack(*chunk))
+        self._file.write(ARCHIVE_TRAILER.pack(footer_offset, self.count, ARCHIVE_FOOTER_MAGIC))
+        self.size = self._file.tell()
+        self._file.close()
+        return self.size
+
+def write_archive(output_dir, codec='gzip', chunk_messages=ARCHIVE_CHUNK_MESSAGES):
+    """Construye all_chats.archive desde el consolidado JSONL; retorna el escritor cerrado"""
+    output_dir = Path(output_dir)
+    archive = ChatArchiveWriter(output_dir / ARCHIVE_FILE, codec, chunk_messages)
+    with open(output_dir / CONSOLIDATED_FILE, 'rb') as f:
+        for line in f:
+            archive.add(line)
+    archive.close()
+    return archive
+
+def iter_consolidated_messages(output_dir, start=0, stop=None):
+    """Itera (posición, mensaje) del consolidado en [start, stop), saltando al inicio con el índice de offsets"""
+    output_dir = Path(output_dir)
+    with open(output_dir / CONSOLIDATED_INDEX_FILE, 'rb') as offsets:
+        offsets.seek(start * OFFSET_SIZE)
+        packed = offsets.read(OFFSET_SIZE)
+    if len(packed) != OFFSET_SIZE:
+        return
+    with open(output_dir / CONSOLIDATED_FILE, 'rb') as consolidated:
+        consolidated.seek(struct.unpack(OFFSET_FORMAT, packed)[0])
+        for position, line in enumerate(consolidated, start):
+            if stop is not None and position >= stop:
+                break
+            yield position, json.loads(line)
+
+def open_workspace_db(db_path, immutable=True):
+    """Abre state.vscdb en solo lectura; `immutable` evita bloqueos y la lectura del WAL
+
+    Con Cursor abierto escribiendo en la base conviene `immutable=False` para leer
+    una instantánea consistente (a costa de tomar un bloqueo compartido).
+    """
+    uri = f"{Path(db_path).resolve().as_uri()}?mode=ro" + ("&immutable=1" if immutable else "")
+    conn = sqlite3.connect(uri, uri=True)
+    conn.execute("PRAGMA query_only = ON")
+    conn.execute("PRAGMA cache_size = -262144")    # 256 MB de caché de páginas
+    conn.execute("PRAGMA mmap_size = 1073741824")  # 1 GB mapeado en memoria
+    return conn
+
+def iter_workspace_items(conn, watermark):
+    """Itera (origen, mensaje) de los mensajes añadidos desde `watermark` y la actualiza en el sitio
+
+    `watermark` es {'tables': {tabla: último rowid}, 'keys': {tabla:clave: elementos
+    ya leídos}}. El filtrado (claves de chat y rowid) se hace en SQLite; las claves
+    como aiService.prompts guardan un array completo que Cursor reescribe (con un
+    rowid nuevo) en cada mensaje, así que de ellas solo se emiten los elementos nuevos.
+    El origen es "tabla:clave:posición" para los elementos de un array y "tabla:clave"
+    para las burbujas (la clave bubbleId:<composer>:<burbuja> ya las identifica).
+    Los prompts sin fecha toman el unixMs de la generación con su mismo texto.
+    """
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    generated_at = generation_times(conn) if 'ItemTable' in existing else {}
+    table_marks = watermark.setdefault('tables', {})
+    key_marks = watermark.setdefault('keys', {})
+
+    for table in CHAT_TABLES:
+        if table not in existing:
+            continue
+        conditions = [f"key IN ({', '.join('?' * len(CHAT_KEYS))})"]
+        conditions += ["substr(key, 1, ?) = ?"] * len(CHAT_KEY_PREFIXES)
+        params = [table_marks.get(table, 0), *CHAT_KEYS]
+        for prefix in CHAT_KEY_PREFIXES:
+            params += [len(prefix), prefix]
+        query = (f"SELECT rowid, key, value FROM {table} "
+                 f"WHERE rowid > ? AND ({' OR '.join(conditions)}) ORDER BY rowid")
+
+        for rowid, key, value in conn.execute(query, params):
+            table_marks[table] = rowid
+            if isinstance(value, bytes):
+                value = value.decode('utf-8', errors='replace')
+            try:
+                data = json.loads(value)
+            except (TypeError, ValueError):
+                continue
+
+            if isinstance(data, list):
+                mark = f"{table}:{key}"
+                seen = key_marks.get(mark, 0)
+                if seen > len(data):
+                    # Cursor recortó el historial: no se puede saber qué es nuevo
+                    print(f"⚠️ {key} tiene menos elementos que en la última restauración; se relee completo")
+                    seen = 0
+                key_marks[mark] = len(data)
+                occurrences = {}
+                # Los prompts ya leídos se recorren igualmente para contar las repeticiones de cada texto
+                for position in range(0 if key == PROMPTS_KEY else seen, len(data)):
+                    item = normalize_bubble(data[position])
+                    if key == PROMPTS_KEY and isinstance(item, dict) and isinstance(item.get('text'), str):
+                        # La k-ésima vez que aparece un texto corresponde a su k-ésima generación
+                        occurrence = occurrences[item['text']] = occurrences.get(item['text'], -1) + 1
+                        times = generated_at.get(item['text'], ())
+                        if occurrence < len(times) and message_timestamp(item) is None:
+                            item = dict(item, unixMs=times[occurrence])
+                    if position >= seen:
+                        yield message_source(item, f"{mark}:{position}"), item
+            elif isinstance(data, dict):
+                yield f"{table}:{key}", normalize_bubble(data)
+
+def generation_times(conn):
+    """{texto del prompt: [unixMs, ...]} según aiService.generations, en orden de generación"""
+    row = conn.execute("SELECT value FROM ItemTable WHERE key = ?", (GENERATIONS_KEY,)).fetchone()
+    try:
+        generations = json.loads(row[0]) if row else []
+    except (TypeError, ValueError):
+        return {}
+    times = {}
+    for generation in generations if isinstance(generations, list) else ():
+        if isinstance(generation, dict) and isinstance(generation.get('textDescription'), str):
+            times.setdefault(generation['textDescription'], []).append(generation.get('unixMs'))
+    return times
+
+def normalize_bubble(item):
+    """Lleva las formas de mensaje del state.vscdb a {text, commandType}
+
+    Las burbujas de cursorDiskKV usan `type` 1/2 en lugar de `commandType`;
+    aiService.prompts ya trae {text, commandType} y se deja igual.
+    """
+    if not isinstance(item, dict):
+        return item
+    if 'commandType' not in item and item.get('type') in (1, 2):
+        return dict(item, commandType='user' if item['type'] == 1 else 'assistant')
+    return item
+
+def message_timestamp(item):
+    """Momento del mensaje (segundos desde epoch) según createdAt, timingInfo o unixMs; None si no lo trae"""
+    timing = item.get('timingInfo')
+    candidates = (item.get('createdAt'),
+                  timing.get('clientStartTime') if isinstance(timing, dict) else None,
+                  item.get('unixMs'))
+    for value in candidates:
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0:
+            # Cursor guarda milisegundos; un valor en segundos no llega a 1e11 hasta el año 5138
+            return round(value / 1000 if value > 1e11 else value, 3)
+        if isinstance(value, str) and value:
+            try:
+                moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            except ValueError:
+                continue
+            return round(moment.timestamp(), 3)
+    return None
+
+def conversation_id(source, item):
+    """Conversación del mensaje: su composerId/conversationId o el composer de la clave
+    bubbleId:<composer>:<burbuja>; None si el origen no la identifica"""
+    for field in ('composerId', 'conversationId'):
+        if isinstance(item.get(field), str) and item[field]:
+            return item[field]
+    parts = source.split(':')
+    if len(parts) >= 4 and parts[1] == 'bubbleId':
+        return parts[2]
+    return None
+
+def iter_cursor_items(input_path, stream=True):
+    """Elementos del volcado: en streaming, o cargando el archivo completo (modo anterior)"""
+    if stream:
+        return iter_json_array(input_path)
+    with open(input_path, 'r', encoding='utf-8') as f:
+        return iter(json.load(f))
+
+def process_cursor_chats(input_path=DEFAULT_INPUT, output_dir=DEFAULT_OUTPUT_DIR, stream=True,
+                         db_path=None, full=False, build_index=True, export_all=False, workers=None,
+                         archive=None, near_duplicates=False, similarity=NEAR_DUPLICATE_SIMILARITY):
     print(f"🔍 ANÁLISIS DE CHATS CURSOR - PROYECTO COOMUNITY")
     print(f"=" * 60)
-    print(f"📊 Total de elementos: {len(data)}")
-    
-    # Crear directorio para chats restaurados
-    output_dir = Path("docs/restored-chats")
-    output_dir.mkdir(exist_ok=True)
-    
-    # Contadores
-    conversations = []
-    user_messages = 0
-    assistant_messages = 0
-    
-    # Procesar cada elemento
-    for i, item in enumerate(data):
+
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    state = RestoreState(output_dir, reset=full)
+    stats = state.data.get('stats')
+    # Crear directorio para chats restaurados (ampliando la restauración anterior si existe)
+    writer = ChatRestoreWriter(output_dir, stats, build_index=build_index,
+                               export_all=export_all, workers=workers, archive=archive)
+    if not writer.incremental:
+        state.close()
+        state = RestoreState(output_dir, reset=True)
+    near_index = NearDuplicateIndex(state._conn, similarity) if near_duplicates else None
+
+    conn = None
+    if db_path:
+        # Lectura directa del workspace: continuar desde la marca de agua de esta base
+        db_key = str(Path(db_path).resolve())
+        watermark = state.data.setdefault('databases', {}).setdefault(db_key, {})
+        conn = open_workspace_db(db_path)
+        items = iter_workspace_items(conn, watermark)
+        marks = ', '.join(f"{table} > {rowid}" for table, rowid in watermark.get('tables', {}).items())
+        print(f"🗄️ Leyendo {db_path} ({marks or 'completa'})")
+        # Las filas de la base solo se leen una vez: los índices continúan los anteriores
+        start = writer.total_items
+    else:
+        # En el volcado la posición identifica el mensaje: se relee completo en cada ejecución
+        items = ((message_source(item, f"dump:{i}"), item)
+                 for i, item in enumerate(iter_cursor_items(input_path, stream)))
+        start = 0
+
+    new_messages = 0
+    total_items = start
+
+    # Procesar cada elemento sin retener los textos en memoria; los ya vistos se omiten
+    for i, (source, item) in enumerate(items, start):
+        total_items = i + 1
         if isinstance(item, dict) and 'text' in item:
-            command_type = item.get('commandType', 'unknown')
+            command_type_str, role = classify_command_type(item.get('commandType', 'unknown'))
             text = item.get('text', '')
-            
-            # Mapear tipos numéricos a strings
-            if isinstance(command_type, int):
-                if command_type == 4:
-                    command_type_str = 'assistant'
-                    assistant_messages += 1
-                    msg_type = "🤖 ASSISTANT"
-                elif command_type == 3:
-                    command_type_str = 'user'
-                    user_messages += 1
-                    msg_type = "👤 USER"
-                else:
-                    command_type_str = f'type_{command_type}'
-                    msg_type = f"❓ TYPE_{command_type}"
-            else:
-                # Para strings (casos legacy)
-                command_type_str = str(command_type)
-                if command_type == 'user':
-                    user_messages += 1
-                    msg_type = "👤 USER"
-                elif command_type == 'assistant':
-                    assistant_messages += 1
-                    msg_type = "🤖 ASSISTANT"
-                else:
-                    msg_type = f"❓ {command_type}"
-            
-            conversations.append({
+            if not state.is_new(message_hash(command_type_str, text, source)):
+                writer.duplicates += 1
+                continue
+
+            conv = {
                 'index': i,
                 'type': command_type_str,
                 'text': text,
                 'length': len(text),
-                'preview': text[:150] + "..." if len(text) > 150 else text
-            })
-    
+                'preview': text[:PREVIEW_CHARS] + "..." if len(text) > PREVIEW_CHARS else text
+            }
+            timestamp = message_timestamp(item)
+            if timestamp is not None:
+                conv['timestamp'] = timestamp
+            conversation = conversation_id(source, item)
+            if conversation is not None:
+                conv['conversation'] = conversation
+            match = near_index.match(writer.conversations, text) if near_index is not None else None
+            if match is not None:
+                # Casi duplicado: se guarda solo la referencia al mensaje canónico
+                del conv['text']
+                conv['duplicate_of'], conv['similarity'] = match[0], round(match[1], 3)
+            writer.add(conv, role)
+            new_messages += 1
+
+    # Con un volcado se relee la exportación completa: el total es el del volcado más grande
+    near_stats = near_index.stats() if near_index is not None else None
+    writer.close(total_items if db_path else max(total_items, writer.total_items), near_stats)
+    if conn is not None:
+        conn.close()
+    state.data['stats'] = writer.stats()
+    state.commit()
+    state.close()
+
     # Estadísticas
-    print(f"👤 Mensajes de usuario: {user_messages}")
-    print(f"🤖 Mensajes del asistente: {assistant_messages}")
-    print(f"📝 Total procesados: {len(conversations)}")
-    
-    # Crear archivo de resumen
-    summary_file = output_dir / "chat_summary.md"
-    with open(summary_file, 'w', encoding='utf-8') as f:
-        f.write(f"# 📋 RESUMEN DE CHATS RESTAURADOS - PROYECTO COOMUNITY\n\n")
-        f.write(f"**Fecha de restauración:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        f.write(f"## 📊 Estadísticas\n\n")
-        f.write(f"- **Total de elementos:** {len(data)}\n")
-        f.write(f"- **Mensajes de usuario:** {user_messages}\n")
-        f.write(f"- **Mensajes del asistente:** {assistant_messages}\n")
-        f.write(f"- **Conversaciones procesadas:** {len(conversations)}\n\n")
-        
-        f.write(f"## 🗂️ Índice de Conversaciones\n\n")
-        for conv in conversations:
-            msg_type = "👤" if conv['type'] == 'user' else "🤖" if conv['type'] == 'assistant' else "❓"
-            f.write(f"{conv['index']:3d}. {msg_type} **{conv['type'].upper()}** ({conv['length']} chars)\n")
-            f.write(f"     _{conv['preview']}_\n\n")
-    
-    # Crear archivos individuales para conversaciones largas (>1000 caracteres)
-    long_conversations = [c for c in conversations if c['length'] > 1000]
-    
-    for conv in long_conversations[:10]:  # Primeras 10 conversaciones largas
-        filename = f"conversation_{conv['index']:03d}_{conv['type']}.md"
-        filepath = output_dir / filename
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(f"# Conversación #{conv['index']} - {conv['type'].upper()}\n\n")
-            f.write(f"**Tipo:** {conv['type']}\n")
-            f.write(f"**Longitud:** {conv['length']} caracteres\n")
-            f.write(f"**Fecha de extracción:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            f.write(f"---\n\n")
-            f.write(conv['text'])
-    
-    # Crear archivo consolidado con todas las conversaciones
-    all_chats_file = output_dir / "all_chats_consolidated.json"
-    with open(all_chats_file, 'w', encoding='utf-8') as f:
-        json.dump(conversations, f, indent=2, ensure_ascii=False)
-    
+    print(f"📊 Total de elementos: {writer.total_items}")
+    print(f"👤 Mensajes de usuario: {writer.user_messages}")
+    print(f"🤖 Mensajes del asistente: {writer.assistant_messages}")
+    print(f"📝 Total procesados: {writer.conversations}")
+    print(f"🆕 Mensajes nuevos en esta ejecución: {new_messages} "
+          f"({writer.duplicates} ya restaurados u omitidos por duplicado)")
+
+    if near_stats is not None:
+        print(f"🧬 Casi duplicados: {writer.near_duplicates} mensajes como referencia en "
+              f"{near_stats['clusters']} grupos ({writer.near_duplicate_chars} caracteres no repetidos)")
+
     print(f"\n✅ RESTAURACIÓN COMPLETADA")
-    print(f"📁 Archivos creados en: {output_dir}")
-    print(f"📄 Resumen: {summary_file}")
-    print(f"📊 Datos consolidados: {all_chats_file}")
-    print(f"📝 Conversaciones largas: {len(long_conversations)} archivos")
-    
-    return output_dir, len(conversations)
+    print(f"📁 Archivos creados en: {writer.output_dir}")
+    print(f"📄 Resumen: {writer.summary_file}")
+    print(f"📊 Datos consolidados: {writer.all_chats_file}")
+    print(f"📝 Conversaciones largas: {writer.long_conversations} archivos")
+    if writer.exporter is not None:
+        print(f"📚 Exportadas: {writer.exporter.exported} conversaciones en {writer.exporter.export_dir} "
+              f"({writer.exporter.workers} hilos)")
+    if writer.archive is not None:
+        print(f"🗜️ Archivo comprimido: {writer.archive.path} ({writer.archive.codec}, "
+              f"{format_ratio(writer.consolidated_bytes, writer.archive.size)})")
+
+    return writer.output_dir, writer.conversations
+
+def default_workspace_storage():
+    """Directorio workspaceStorage de Cursor según la plataforma"""
+    if sys.platform == 'darwin':
+        base = Path.home() / 'Library' / 'Application Support'
+    elif os.name == 'nt':
+        base = Path(os.environ.get('APPDATA', Path.home()))
+    else:
+        base = Path(os.environ.get('XDG_CONFIG_HOME', Path.home() / '.config'))
+    return base / 'Cursor' / 'User' / 'workspaceStorage'
+
+def workspace_name(source):
+    """Nombre legible del workspace: la carpeta de workspace.json, o el directorio/archivo de origen"""
+    try:
+        with open(source.parent / 'workspace.json', 'r', encoding='utf-8') as f:
+            folder = json.load(f).get('folder', '')
+        name = Path(unquote(urlparse(folder).path)).name
+        if name:
+            return name
+    except (OSError, ValueError, AttributeError):
+        pass
+    return source.parent.name if source.suffix == '.vscdb' else source.stem
+
+def discover_workspaces(roots):
+    """Fuentes de chat bajo `roots`: cada state.vscdb de los directorios, o los archivos indicados"""
+    workspaces = {}
+    for root in roots:
+        root = Path(root).expanduser()
+        if root.is_file():
+            sources = [root]
+        elif root.is_dir():
+            sources = sorted(root.rglob('state.vscdb'))
+        else:
+            print(f"⚠️ No existe {root}")
+            continue
+        for source in sources:
+            source = source.resolve()
+            name = workspace_name(source)
+            slug = re.sub(r'[^\w.-]+', '-', name).strip('-') or 'workspace'
+            key = f"{slug}-{hashlib.blake2b(str(source).encode('utf-8'), digest_size=4).hexdigest()}"
+            workspaces[key] = {'id': key, 'name': name, 'source': str(source)}
+    return [workspaces[key] for key in sorted(workspaces)]
+
+def restored_count(output_dir):
+    """Mensajes ya restaurados en `output_dir` (0 si no hay una restauración que ampliar)"""
+    output_dir = Path(output_dir)
+    state_path = output_dir / RESTORE_STATE_FILE
+    required = (state_path, output_dir / CONSOLIDATED_FILE, output_dir / ".chat_summary_index.part")
+    if not all(path.exists() for path in required):
+        return 0
+    conn = sqlite3.connect(f"{state_path.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'state'").fetchone()
+    except sqlite3.Error:
+        row = None
+    finally:
+        conn.close()
+    return json.loads(row[0]).get('stats', {}).get('conversations', 0) if row else 0
+
+def split_sessions(messages, fallback, gap=SESSION_GAP_SECONDS):
+    """Parte los (posición, mensaje) consecutivos en sesiones [first, last)
+
+    Empieza una sesión nueva al cambiar de conversación o tras más de `gap` segundos
+    sin mensajes. `start`/`activity` son la fecha del primer y del último mensaje
+    fechado; una sesión sin fechas usa `fallback` y queda con `dated` en False.
+    """
+    sessions = []
+    current = None
+    for position, conv in messages:
+        conversation, timestamp = conv.get('conversation'), conv.get('timestamp')
+        if current is not None:
+            switched = conversation and current['conversation'] and conversation != current['conversation']
+            idle = (timestamp is not None and current['activity'] is not None
+                    and timestamp - current['activity'] > gap)
+            if switched or idle:
+                sessions.append(current)
+                current = None
+        if current is None:
+            current = {'first': position, 'conversation': conversation, 'start': None, 'activity': None}
+        current['last'] = position + 1
+        current['conversation'] = current['conversation'] or conversation
+        if timestamp is not None:
+            current['start'] = timestamp if current['start'] is None else min(current['start'], timestamp)
+            current['activity'] = timestamp if current['activity'] is None else max(current['activity'], timestamp)
+    if current is not None:
+        sessions.append(current)
+
+    for session in sessions:
+        session['dated'] = session['start'] is not None
+        if not session['dated']:
+            session['start'] = session['activity'] = fallback
+    return sessions
+
+def restore_workspace(workspace, output_dir, options):
+    """Restaura un workspace en su subdirectorio (se ejecuta en un proceso del pool)
+
+    La salida de process_cursor_chats va a restore.log del workspace; retorna el
+    rango de posiciones [first, last) añadido en esta ejecución partido en sesiones
+    (split_sessions); las que no traen fechas usan la modificación de la base.
+    """
+    target = Path(output_dir) / WORKSPACES_DIR / workspace['id']
+    target.mkdir(parents=True, exist_ok=True)
+    source = Path(workspace['source'])
+    first = 0 if options.get('full') else restored_count(target)
+    started = time.perf_counter()
+    with open(target / 'restore.log', 'w', encoding='utf-8') as log, contextlib.redirect_stdout(log):
+        _, last = process_cursor_chats(str(source), target,
+                                       db_path=str(source) if source.suffix == '.vscdb' else None,
+                                       **options)
+    sessions = split_sessions(iter_consolidated_messages(target, first, last), source.stat().st_mtime)
+    return dict(workspace, output_dir=str(target), first=first, last=last, sessions=sessions,
+                seconds=time.perf_counter() - started)
+
+def write_timeline(output_dir, sessions):
+    """Escribe timeline.md: las sesiones de todos los workspaces intercaladas por fecha
+
+    Las sesiones se ordenan por la fecha de su primer mensaje; las que no traen
+    fechas usan la modificación de la base y se marcan con 🗂️.
+    """
+    output_dir = Path(output_dir)
+    sessions = sorted(sessions, key=lambda session: (session['start'], session['workspace'], session['first']))
+    timeline_file = output_dir / TIMELINE_FILE
+    with open(timeline_file, 'w', encoding='utf-8') as f:
+        f.write(f"# 🕒 LÍNEA DE TIEMPO DE CHATS - PROYECTO COOMUNITY\n\n")
+        f.write(f"**Fecha de generación:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+        f.write(f"- **Workspaces:** {len({session['workspace'] for session in sessions})}\n")
+        f.write(f"- **Sesiones:** {len(sessions)}\n")
+        f.write(f"- **Mensajes:** {sum(session['last'] - session['first'] for session in sessions)}\n\n")
+        f.write(f"_Orden: fecha del primer mensaje de cada sesión (una conversación sin pausas de más de "
+                f"{SESSION_GAP_SECONDS // 60} min); 🗂️ = sin fechas en los mensajes, se usa la última "
+                f"modificación de su origen (state.vscdb o volcado)._\n\n")
+
+        for session in sessions:
+            start = datetime.fromtimestamp(session['start'])
+            end = datetime.fromtimestamp(session['activity'])
+            span = start.strftime('%Y-%m-%d %H:%M')
+            if session['dated'] and end > start:
+                span += end.strftime('–%H:%M' if end.date() == start.date() else '–%Y-%m-%d %H:%M')
+            source = "" if session['dated'] else " 🗂️"
+            f.write(f"## 🗓️ {span}{source} · {session['name']} "
+                    f"({session['last'] - session['first']} mensajes)\n\n")
+            f.write(f"_{session['workspace']} · restaurado el {session['restored_at']}_\n\n")
+            workspace_dir = output_dir / WORKSPACES_DIR / session['workspace']
+            for position, conv in iter_consolidated_messages(workspace_dir, session['first'], session['last']):
+                icon = "👤" if conv['type'] == 'user' else "🤖" if conv['type'] == 'assistant' else "❓"
+                similar = f" ≈ #{conv['duplicate_of']}" if 'duplicate_of' in conv else ""
+                moment = (f" {datetime.fromtimestamp(conv['timestamp']).strftime('%H:%M')}"
+                          if 'timestamp' in conv else "")
+                f.write(f"- `#{position}`{moment} {icon} {' '.join(conv['preview'].split())}{similar}\n")
+            f.write(f"\n")
+    return timeline_file
+
+def restore_workspaces(roots=None, output_dir=DEFAULT_OUTPUT_DIR, jobs=None, options=None):
+    """Restaura todos los workspaces en paralelo (un proceso por workspace) y fusiona la línea de tiempo"""
+    print(f"🔍 RESTAURACIÓN MULTI-WORKSPACE - PROYECTO COOMUNITY")
+    print(f"=" * 60)
+
+    options = options or {}
+    output_dir = Path(output_dir).resolve()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    workspaces = discover_workspaces(roots or [default_workspace_storage()])
+    if not workspaces:
+        print(f"⚠️ No se encontraron workspaces")
+        return []
+
+    sessions_file = output_dir / SESSIONS_FILE
+    sessions = []
+    if sessions_file.exists():
+        with open(sessions_file, 'r', encoding='utf-8') as f:
+            sessions = [json.loads(line) for line in f]
+
+    jobs = min(jobs or os.cpu_count() or 1, len(workspaces))
+    print(f"🗂️ {len(workspaces)} workspaces, {jobs} procesos")
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(restore_workspace, workspace, output_dir, options): workspace
+                   for workspace in workspaces}
+        for future in as_completed(futures):
+            workspace = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"❌ {workspace['name']} ({workspace['source']}): {e}")
+                continue
+
+            new_messages = result['last'] - result['first']
+            print(f"✅ {result['name']}: {new_messages} mensajes nuevos "
+                  f"({result['last']} en total, {result['seconds']:.1f} s)")
+            if result['first'] == 0:
+                # Restauración desde cero: las sesiones anteriores ya no corresponden al consolidado
+                sessions = [session for session in sessions if session['workspace'] != result['id']]
+            restored_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            for session in result['sessions']:
+                sessions.append({
+                    'workspace': result['id'],
+                    'name': result['name'],
+                    'source': result['source'],
+                    'restored_at': restored_at,
+                    **session,
+                })
+            results.append(result)
+
+    with open(sessions_file, 'w', encoding='utf-8') as f:
+        for session in sessions:
+            f.write(json.dumps(session, ensure_ascii=False) + '\n')
+    timeline_file = write_timeline(output_dir, sessions)
+
+    print(f"\n✅ RESTAURACIÓN COMPLETADA en {time.perf_counter() - started:.1f} s")
+    print(f"📁 Workspaces restaurados: {len(results)} de {len(workspaces)} en {output_dir / WORKSPACES_DIR}")
+    print(f"🕒 Línea de tiempo: {timeline_file} ({len(sessions)} sesiones)")
+    return results
+
+def rebuild_search_index(output_dir=DEFAULT_OUTPUT_DIR):
+    """Reconstruye chats_index.db a partir del consolidado JSONL (en streaming)"""
+    output_dir = Path(output_dir)
+    index = ChatSearchIndex(output_dir / SEARCH_INDEX_FILE, reset=True)
+    total = 0
+    with open(output_dir / CONSOLIDATED_FILE, 'r', encoding='utf-8') as f:
+        for position, line in enumerate(f):
+            conv = json.loads(line)
+            if 'duplicate_of' not in conv:
+                index.add(position, conv)
+                total += 1
+    index.close(optimize=True)
+    print(f"🗂️ Índice reconstruido: {total} mensajes en {output_dir / SEARCH_INDEX_FILE}")
+    return total
+
+def export_conversations(output_dir=DEFAULT_OUTPUT_DIR, workers=None):
+    """Exporta todas las conversaciones del consolidado a Markdown (reemplaza conversations/)"""
+    output_dir = Path(output_dir)
+    started = time.perf_counter()
+    exporter = ConversationExporter(output_dir, workers, reset=True)
+    with open(output_dir / CONSOLIDATED_FILE, 'r', encoding='utf-8') as f:
+        for position, line in enumerate(f):
+            exporter.add(position, json.loads(line))
+    total = exporter.close()
+    elapsed = time.perf_counter() - started
+    print(f"📚 {total} conversaciones exportadas en {exporter.export_dir} "
+          f"({exporter.workers} hilos, {elapsed:.1f} s)")
+    return total
+
+def format_ratio(original, compressed):
+    return f"{compressed / 1e6:.1f} MB, {original / max(compressed, 1):.1f}x menos que el JSONL"
+
+def build_archive(output_dir=DEFAULT_OUTPUT_DIR, codec='gzip', chunk_messages=ARCHIVE_CHUNK_MESSAGES):
+    """Reconstruye all_chats.archive a partir del consolidado"""
+    started = time.perf_counter()
+    archive = write_archive(output_dir, codec, chunk_messages)
+    original = (Path(output_dir) / CONSOLIDATED_FILE).stat().st_size
+    print(f"🗜️ {archive.count} mensajes en {len(archive.chunks)} bloques ({codec}): {archive.path} "
+          f"({format_ratio(original, archive.size)}, {time.perf_counter() - started:.1f} s)")
+    return archive
+
+def get_messages(position, count=1, output_dir=DEFAULT_OUTPUT_DIR):
+    """Escribe en stdout (JSONL) los mensajes [position, position + count) del archivo comprimido"""
+    with ChatArchive(Path(output_dir) / ARCHIVE_FILE) as archive:
+        if count == 1:
+            messages = [archive[position]]
+        else:
+            messages = archive.iter_range(position, position + count)
+        for conv in messages:
+            print(json.dumps(conv, ensure_ascii=False))
+
+def search_chats(query, output_dir=DEFAULT_OUTPUT_DIR, types=None, limit=20, raw=False):
+    index_path = Path(output_dir) / SEARCH_INDEX_FILE
+    if not index_path.exists():
+        raise FileNotFoundError(f"No existe {index_path}; ejecuta primero la restauración o `index`")
+    index = ChatSearchIndex(index_path)
+    started = time.perf_counter()
+    try:
+        results = index.search(query, types=types, limit=limit, raw=raw)
+    except sqlite3.OperationalError as e:
+        raise ValueError(f"Consulta inválida ({e}); sin --raw cada palabra se busca literal") from None
+    finally:
+        index.close()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    print(f"🔎 {len(results)} resultados para «{query}» en {elapsed_ms:.1f} ms")
+    for position, msg_type, length, msg_index, snippet, score in results:
+        icon = "👤" if msg_type == 'user' else "🤖" if msg_type == 'assistant' else "❓"
+        print(f"\n#{position} {icon} **{msg_type.upper()}** (índice {msg_index}, {length} chars, "
+              f"relevancia {-score:.2f})")
+        print(f"     {' '.join(snippet.split())}")
+    if results:
+        print(f"\n💡 Mensaje completo: restore_chats.py show <#>")
+    return results
+
+def show_message(position, output_dir=DEFAULT_OUTPUT_DIR):
+    conv = read_consolidated_message(output_dir, position)
+    print(f"# Mensaje #{position} - {conv['type'].upper()} (índice {conv['index']}, {conv['length']} chars)\n")
+    if 'duplicate_of' in conv:
+        print(f"≈ Casi duplicado (similitud {conv['similarity']:.0%}) del mensaje #{conv['duplicate_of']}:\n")
+        print(read_consolidated_message(output_dir, conv['duplicate_of'])['text'])
+    else:
+        print(conv['text'])
+    return conv
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Restaurar y organizar chats de Cursor")
+    parser.add_argument("--input", default=DEFAULT_INPUT,
+                        help=f"Volcado JSON de los chats (por defecto {DEFAULT_INPUT})")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR,
+                        help=f"Directorio de salida (por defecto {DEFAULT_OUTPUT_DIR})")
+    parser.add_argument("--no-stream", action="store_true",
+                        help="Cargar el volcado completo en memoria con json.load (modo anterior)")
+    parser.add_argument("--db",
+                        help="Leer directamente el state.vscdb del workspace (incremental por rowid)")
+    parser.add_argument("--full", action="store_true",
+                        help="Descartar el estado incremental (hashes vistos y marcas de agua) y restaurar de cero")
+    parser.add_argument("--no-index", action="store_true",
+                        help="No mantener el índice de búsqueda (chats_index.db)")
+    parser.add_argument("--export-all", action="store_true",
+                        help=f"Exportar cada conversación a Markdown en {EXPORT_DIR}/ (no solo las "
+                             f"{MAX_LONG_CONVERSATIONS} primeras largas)")
+    parser.add_argument("--workers", type=int,
+                        help="Hilos de escritura para la exportación (por defecto según las CPUs)")
+    parser.add_argument("--near-duplicates", action="store_true",
+                        help="Agrupar mensajes casi idénticos (MinHash/LSH) y guardar solo una copia por grupo")
+    parser.add_argument("--similarity", type=float, default=NEAR_DUPLICATE_SIMILARITY,
+                        help=f"Similitud mínima (Jaccard estimada) para --near-duplicates "
+                             f"(por defecto {NEAR_DUPLICATE_SIMILARITY}); las bandas LSH se ajustan a ella")
+    parser.add_argument("--archive", nargs="?", const="gzip", choices=ARCHIVE_CODECS,
+                        help=f"Mantener además {ARCHIVE_FILE}, comprimido por bloques (por defecto gzip)")
+
+    subcommands = parser.add_subparsers(dest="command")
+    search = subcommands.add_parser("search", help="Buscar en los chats restaurados (FTS5)")
+    search.add_argument("query", help="Palabras a buscar (todas deben aparecer)")
+    search.add_argument("--type", dest="types", action="append",
+                        help="Filtrar por tipo de mensaje (user, assistant, type_N); repetible")
+    search.add_argument("--limit", type=int, default=20, help="Máximo de resultados (por defecto 20)")
+    search.add_argument("--raw", action="store_true",
+                        help="Usar la sintaxis FTS5 tal cual (AND/OR/NOT, prefijo*, NEAR)")
+    search.add_argument("--output-dir", default=argparse.SUPPRESS,
+                        help="Directorio de los chats restaurados")
+    index = subcommands.add_parser("index", help="Reconstruir el índice de búsqueda desde el consolidado")
+    index.add_argument("--output-dir", default=argparse.SUPPRESS,
+                       help="Directorio de los chats restaurados")
+    export = subcommands.add_parser("export", help=f"Exportar todo el consolidado a Markdown en {EXPORT_DIR}/")
+    export.add_argument("--workers", type=int, default=argparse.SUPPRESS,
+                        help="Hilos de escritura (por defecto según las CPUs)")
+    export.add_argument("--output-dir", default=argparse.SUPPRESS,
+                        help="Directorio de los chats restaurados")
+    archive = subcommands.add_parser("archive", help=f"Construir {ARCHIVE_FILE} desde el consolidado")
+    archive.add_argument("--codec", choices=ARCHIVE_CODECS, default="gzip", help="Compresión de los bloques")
+    archive.add_argument("--chunk-size", type=int, default=ARCHIVE_CHUNK_MESSAGES,
+                         help=f"Mensajes por bloque (por defecto {ARCHIVE_CHUNK_MESSAGES})")
+    archive.add_argument("--output-dir", default=argparse.SUPPRESS,
+                         help="Directorio de los chats restaurados")
+    get = subcommands.add_parser("get", help=f"Leer mensajes de {ARCHIVE_FILE} por posición (JSONL)")
+    get.add_argument("position", type=int, help="Posición del primer mensaje")
+    get.add_argument("--count", type=int, default=1, help="Número de mensajes a leer (por defecto 1)")
+    get.add_argument("--output-dir", default=argparse.SUPPRESS,
+                     help="Directorio de los chats restaurados")
+    workspaces = subcommands.add_parser(
+        "workspaces", help="Restaurar en paralelo todos los workspaces y fusionar la línea de tiempo")
+    workspaces.add_argument("roots", nargs="*",
+                            help=f"Directorios con state.vscdb, bases o volcados JSON "
+                                 f"(por defecto {default_workspace_storage()})")
+    workspaces.add_argument("--jobs", type=int, help="Procesos en paralelo (por defecto, uno por CPU)")
+    workspaces.add_argument("--output-dir", default=argparse.SUPPRESS,
+                            help="Directorio de salida (se crea workspaces/ y timeline.md dentro)")
+    show = subcommands.add_parser("show", help="Mostrar un mensaje completo por su posición (#) en el consolidado")
+    show.add_argument("position", type=int, help="Posición del mensaje (la que muestra `search`)")
+    show.add_argument("--output-dir", default=argparse.SUPPRESS,
+                      help="Directorio de los chats restaurados")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
+    args = parse_args()
     try:
-        output_dir, total = process_cursor_chats()
-        print(f"\n🎉 ¡{total} conversaciones restauradas exitosamente!")
-        print(f"🚫 Sin usar Claude Dev (evitando crashes)")
+        if args.command == "search":
+            search_chats(args.query, args.output_dir, types=args.types, limit=args.limit, raw=args.raw)
+        elif args.command == "index":
+            rebuild_search_index(args.output_dir)
+        elif args.command == "export":
+            export_conversations(args.output_dir, args.workers)
+        elif args.command == "archive":
+            build_archive(args.output_dir, args.codec, args.chunk_size)
+        elif args.command == "get":
+            get_messages(args.position, args.count, args.output_dir)
+        elif args.command == "workspaces":
+            restore_workspaces(args.roots, args.output_dir, args.jobs, {
+                'stream': not args.no_stream,
+                'full': args.full,
+                'build_index': not args.no_index,
+                'export_all': args.export_all,
+                'workers': args.workers,
+                'archive': args.archive,
+                'near_duplicates': args.near_duplicates,
+                'similarity': args.similarity,
+            })
+        elif args.command == "show":
+            show_message(args.position, args.output_dir)
+        else:
+            output_dir, total = process_cursor_chats(args.input, args.output_dir, stream=not args.no_stream,
+                                                     db_path=args.db, full=args.full,
+                                                     build_index=not args.no_index,
+                                                     export_all=args.export_all, workers=args.workers,
+                                                     archive=args.archive,
+                                                     near_duplicates=args.near_duplicates,
+                                                     similarity=args.similarity)
+            print(f"\n🎉 ¡{total} conversaciones restauradas exitosamente!")
+            print(f"🚫 Sin usar Claude Dev (evitando crashes)")
     except Exception as e:
-        print(f"❌ Error: {e}") 
\ No newline at end of file
+        print(f"❌ Error: {e}")
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+🧪 BENCHMARK DE RESTORE_CHATS
+Volcados sintéticos de chats de Cursor y medición del pipeline de restauración
+
+Genera volcados JSON con la forma de los de Cursor (commandType numéricos y
+strings legacy, longitudes de texto log-normales, bloques de código, mensajes
+repetidos y elementos sin texto) y ejecuta `process_cursor_chats` sobre ellos,
+cada tamaño en un proceso nuevo, reportando mensajes/s, tiempo por etapa
+(parseo, clasificación, deduplicación, resumen, exportación, consolidado,
+índice de búsqueda) y memoria pico (RSS).
+
+Uso:
+    python scripts/restore_chats_benchmark.py --sizes 10000,100000,1000000
+    python scripts/restore_chats_benchmark.py --sizes 100000 --near-duplicates --json bench.json
+    python scripts/restore_chats_benchmark.py --generate /tmp/cursor_chats_raw.json --messages 500000
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import multiprocessing
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows: sin getrusage, no se reporta el RSS
+    resource = None
+
+_RESTORE_PATH = Path(__file__).with_name("restore_chats.py")
+
+STAGES = ('parse', 'classify', 'dedup', 'summary write', 'file export', 'consolidated write',
+          'search index', 'other')
+
+WORDS = (
+    "el la de que en los las un una para con por como más pero sus este esta función código "
+    "componente estado error respuesta usuario servidor cliente módulo prueba cambio archivo "
+    "ruta dato tipo valor clave índice consulta caché sesión token api backend frontend "
+    "the and to of in is for with that this from return value import const async await "
+    "React TypeScript NestJS Prisma Redis Docker Playwright Vite useEffect useState "
+    "ñandú corazón acción reciprocidad Ayni Mëritos Öndas CoomÜnity 🚀 ✅ ❌ 🔍 📁"
+).split()
+CODE_LINES = (
+    "const [state, setState] = useState(null);",
+    "export async function fetchData(id: string) {",
+    "  const response = await api.get(`/items/${id}`);",
+    "  return response.data;",
+    "}",
+    "def process(item):",
+    "    return {'id': item['id'], \"name\": item.get('name')}",
+    "SELECT * FROM users WHERE id = $1;",
+    "npm run dev --workspace=@coomunity/superapp",
+    "\\t// TODO: manejar el caso \"sin datos\"",
+)
+# (commandType, peso): Cursor usa 3/4 y otros enteros; los volcados antiguos, strings
+COMMAND_TYPES = ((3, 30), (4, 40), (1, 4), (2, 4), (7, 2), ('user', 8), ('assistant', 10), ('system', 2))
+
+def load_restore_module():
+    """📦 Importa restore_chats.py desde la misma carpeta, como módulo independiente"""
+    spec = importlib.util.spec_from_file_location("restore_chats", _RESTORE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+def synthetic_text(rng, role):
+    """🎲 Texto con longitud log-normal: prompts cortos, respuestas largas con cola pesada"""
+    if role == 'user':
+        length = min(int(rng.lognormvariate(5.2, 1.0)), 20000)
+    else:
+        length = min(int(rng.lognormvariate(6.8, 1.1)), 60000)
+    words = rng.choices(WORDS, k=max(length // 6, 1))
+    if role != 'user' and length > 400 and rng.random() < 0.4:
+        # Bloque de código en medio de la respuesta
+        cut = rng.randrange(len(words))
+        block = "\n".join(rng.choices(CODE_LINES, k=rng.randint(3, 30)))
+        return f"{' '.join(words[:cut])}\n\n```ts\n{block}\n```\n\n{' '.join(words[cut:])}"
+    return ' '.join(words)
+
+def iter_synthetic_items(messages, seed=42, duplicate_rate=0.05, near_duplicate_rate=0.05):
+    """🎲 Elementos deterministas de un volcado de Cursor (sin retener el historial completo)"""
+    rng = random.Random(seed)
+    types = [command_type for command_type, _ in COMMAND_TYPES]
+    weights = [weight for _, weight in COMMAND_TYPES]
+    recent = []
+    for _ in range(messages):
+        roll = rng.random()
+        if roll < 0.01:
+            yield rng.choice((42, "string item", None, {"other": rng.randrange(1000)}))
+            continue
+
+        command_type = rng.choices(types, weights)[0]
+        role = 'user' if command_type in (3, 'user') else 'assistant'
+        if recent and roll < 0.01 + duplicate_rate:
+            # Prompt pegado de nuevo o respuesta repetida tal cual
+            text = rng.choice(recent)
+        elif recent and roll < 0.01 + duplicate_rate + near_duplicate_rate:
+            words = rng.choice(recent).split(' ')
+            for _ in range(max(len(words) // 50, 1)):
+                words[rng.randrange(len(words))] = rng.choice(WORDS)
+            text = ' '.join(words)
+        else:
+            text = synthetic_text(rng, role)
+
+        recent.append(text)
+        if len(recent) > 256:
+            recent.pop(rng.randrange(len(recent)))
+        yield {"commandType": command_type, "text": text, "requestId": f"{rng.getrandbits(64):016x}"}
+
+def generate_dump(path, messages, seed=42, duplicate_rate=0.05, near_duplicate_rate=0.05):
+    """📝 Escribe un volcado JSON (array de nivel superior) en streaming; retorna los bytes escritos"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("[\n")
+        for i, item in enumerate(iter_synthetic_items(messages, seed, duplicate_rate, near_duplicate_rate)):
+            if i:
+                f.write(",\n")
+            f.write(json.dumps(item, ensure_ascii=i % 2 == 0))
+        f.write("\n]\n")
+    return path.stat().st_size
+
+class StageTimer:
+    """⏱️ Tiempo propio por etapa: lo que tarda una llamada sin contar las etapas anidadas"""
+
+    def __init__(self):
+        self.totals = dict.fromkeys(STAGES, 0.0)
+        self._stack = []
+
+    def wrap(self, stage, function):
+        def timed(*args, **kwargs):
+            self._stack.append(0.0)
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                self.totals[stage] += elapsed - self._stack.pop()
+                if self._stack:
+                    self._stack[-1] += elapsed
+        return timed
+
+class TimedFile:
+    """📄 Envoltorio de archivo que cronometra write/close en una etapa"""
+
+    def __init__(self, f, timer, stage):
+        self._f = f
+        self.write = timer.wrap(stage, f.write)
+        self.close = timer.wrap(stage, f.close)
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+def instrument(module, timer):
+    """🔧 Sustituye en el módulo cargado las piezas del pipeline por versiones cronometradas"""
+    iter_cursor_items = module.iter_cursor_items
+
+    def timed_items(*args, **kwargs):
+        items = iter(iter_cursor_items(*args, **kwargs))
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            finally:
+                timer.totals['parse'] += time.perf_counter() - started
+            yield item
+
+    module.iter_cursor_items = timed_items
+    module.classify_command_type = timer.wrap('classify', module.classify_command_type)
+    module.message_hash = timer.wrap('classify', module.message_hash)
+    module.RestoreState.is_new = timer.wrap('dedup', module.RestoreState.is_new)
+    module.RestoreState.commit = timer.wrap('dedup', module.RestoreState.commit)
+    module.NearDuplicateIndex.match = timer.wrap('dedup', module.NearDuplicateIndex.match)
+    module.ChatSearchIndex.add = timer.wrap('search index', module.ChatSearchIndex.add)
+    module.ChatSearchIndex.close = timer.wrap('search index', module.ChatSearchIndex.close)
+    module.ConversationExporter.add = timer.wrap('file export', module.ConversationExporter.add)
+    module.ConversationExporter.close = timer.wrap('file export', module.ConversationExporter.close)
+
+    writer = module.ChatRestoreWriter
+    writer._write_conversation = timer.wrap('file export', writer._write_conversation)
+    writer.add = timer.wrap('consolidated write', writer.add)
+    writer.close = timer.wrap('summary write', writer.close)
+    init = writer.__init__
+
+    def timed_init(self, *args, **kwargs):
+        init(self, *args, **kwargs)
+        self._consolidated = TimedFile(self._consolidated, timer, 'consolidated write')
+        self._offsets = TimedFile(self._offsets, timer, 'consolidated write')
+        self._index = TimedFile(self._index, timer, 'summary write')
+
+    writer.__init__ = timed_init
+
+def peak_rss_mb():
+    """📈 RSS máximo del proceso en MB (ru_maxrss está en KB en Linux y en bytes en macOS)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def run_scenario(dump_path, messages, options, stages=True):
+    """🏁 Restaura el volcado en un directorio temporal y retorna las métricas (en un proceso nuevo)"""
+    module = load_restore_module()
+    timer = StageTimer()
+    if stages:
+        instrument(module, timer)
+    baseline_mb = peak_rss_mb()
+
+    with tempfile.TemporaryDirectory(prefix="restore_chats_bench_") as output_dir:
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            _, conversations = module.process_cursor_chats(str(dump_path), output_dir, full=True, **options)
+            elapsed = time.perf_counter() - started
+        consolidated_bytes = (Path(output_dir) / module.CONSOLIDATED_FILE).stat().st_size
+
+    row = {
+        "messages": messages,
+        "dump_mb": round(Path(dump_path).stat().st_size / 1e6, 1),
+        "elapsed_s": round(elapsed, 3),
+        "messages_per_s": round(messages / elapsed, 1) if elapsed else 0.0,
+        "conversations": conversations,
+        "consolidated_mb": round(consolidated_bytes / 1e6, 1),
+        "baseline_rss_mb": baseline_mb,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if stages:
+        timer.totals['other'] = max(elapsed - sum(timer.totals.values()), 0.0)
+        row["stages_s"] = {stage: round(seconds, 3) for stage, seconds in timer.totals.items()}
+    return row
+
+def print_report(rows):
+    print("\n🧪 ═══════════════ BENCHMARK RESTORE_CHATS ═══════════════")
+    print(f"{'mensajes':>9} {'volcado MB':>10} {'msg/s':>10} {'tiempo s':>9} {'restaurados':>11} "
+          f"{'RSS MB':>8} {'base MB':>8}")
+    for row in rows:
+        print(f"{row['messages']:>9} {row['dump_mb']:>10} {row['messages_per_s']:>10} {row['elapsed_s']:>9} "
+              f"{row['conversations']:>11} {row['peak_rss_mb']!s:>8} {row['baseline_rss_mb']!s:>8}")
+
+    staged = [row for row in rows if 'stages_s' in row]
+    if staged:
+        print(f"\n⏱️ Tiempo por etapa (s)")
+        print(f"{'etapa':>20} " + " ".join(f"{row['messages']:>10}" for row in staged))
+        for stage in STAGES:
+            print(f"{stage:>20} " + " ".join(f"{row['stages_s'][stage]:>10}" for row in staged))
+
+def run_benchmark(args):
+    options = {
+        'build_index': not args.no_index,
+        'export_all': not args.no_export,
+        'workers': args.workers,
+        'near_duplicates': args.near_duplicates,
+    }
+    # Los volcados temporales se borran al terminar (pueden ocupar varios GB) salvo con --keep
+    dump_dir = Path(args.dump_dir) if args.dump_dir else Path(tempfile.mkdtemp(prefix="restore_chats_dumps_"))
+    remove_dumps = not args.dump_dir and not args.keep
+    # Cada tamaño en un intérprete nuevo: el RSS pico y las cachés no se arrastran entre escenarios
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    try:
+        for size in args.sizes:
+            dump_path = dump_dir / f"synthetic_{size}_{args.seed}.json"
+            if not dump_path.exists():
+                started = time.perf_counter()
+                dump_bytes = generate_dump(dump_path, size, args.seed, args.duplicate_rate, args.near_duplicate_rate)
+                print(f"🎲 {dump_path} ({dump_bytes / 1e6:.1f} MB en {time.perf_counter() - started:.1f} s)")
+            with context.Pool(1) as pool:
+                row = pool.apply(run_scenario, (str(dump_path), size, options, not args.no_stages))
+            print(f"🏁 {size} mensajes: {row['elapsed_s']} s ({row['messages_per_s']} msg/s)")
+            rows.append(row)
+    finally:
+        if remove_dumps:
+            shutil.rmtree(dump_dir, ignore_errors=True)
+        else:
+            print(f"💾 Volcados conservados en {dump_dir}")
+    return rows
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="🧪 Benchmark de restore_chats con volcados sintéticos")
+    parser.add_argument("--sizes", default="10000,100000",
+                        type=lambda value: [int(size) for size in value.split(",") if size],
+                        help="Cantidades de mensajes sintéticos, separadas por comas")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla del generador")
+    parser.add_argument("--duplicate-rate", type=float, default=0.05,
+                        help="Fracción de mensajes repetidos tal cual")
+    parser.add_argument("--near-duplicate-rate", type=float, default=0.05,
+                        help="Fracción de mensajes repetidos con pequeñas ediciones")
+    parser.add_argument("--dump-dir", help="Directorio donde generar/reutilizar los volcados (por defecto, "
+                                           "uno temporal que se borra al terminar)")
+    parser.add_argument("--keep", action="store_true",
+                        help="Conservar el directorio temporal de volcados al terminar")
+    parser.add_argument("--no-export", action="store_true", help="No exportar cada conversación a Markdown")
+    parser.add_argument("--no-index", action="store_true", help="No mantener el índice de búsqueda")
+    parser.add_argument("--near-duplicates", action="store_true", help="Activar la detección de casi duplicados")
+    parser.add_argument("--workers", type=int, help="Hilos de escritura de la exportación")
+    parser.add_argument("--no-stages", action="store_true",
+                        help="Medir solo el tiempo total, sin instrumentar las etapas")
+    parser.add_argument("--generate", metavar="PATH", help="Solo generar un volcado sintético en PATH")
+    parser.add_argument("--messages", type=int, default=100000, help="Mensajes del volcado de --generate")
+    parser.add_argument("--json", dest="json_path", help="Guardar los resultados en este archivo JSON")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.generate:
+        started = time.perf_counter()
+        dump_bytes = generate_dump(args.generate, args.messages, args.seed,
+                                   args.duplicate_rate, args.near_duplicate_rate)
+        print(f"🎲 {args.messages} mensajes en {args.generate} "
+              f"({dump_bytes / 1e6:.1f} MB, {time.perf_counter() - started:.1f} s)")
+        return
+
+    rows = run_benchmark(args)
+    print_report(rows)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"config": {k: v for k, v in vars(args).items() if k != "json_path"},
+                       "results": rows}, f, indent=2)
+        print(f"\n📊 Resultados guardados en: {args.json_path}")
+
+if __name__ == "__main__":
+    main()
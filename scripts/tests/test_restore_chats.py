@@ -0,0 +1,431 @@
+"""
+Pruebas de restore_chats.py
+"""
+
+import importlib.util
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+_SCRIPTS = Path(__file__).resolve().parent.parent
+
+def _load(name, filename):
+    spec = importlib.util.spec_from_file_location(name, _SCRIPTS / filename)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+restore_chats = _load('restore_chats', 'restore_chats.py')
+
+def write_json(path, data, **kwargs):
+    path.write_text(json.dumps(data, **kwargs), encoding='utf-8')
+    return path
+
+# Lectura en streaming del volcado: elementos cortados entre bloques y cadenas con escapes
+
+TRICKY_ITEMS = [
+    {'text': 'comillas \\"escapadas\\" y \\\\ barra', 'commandType': 3},
+    {'text': 'acentos é ñ é y emoji 🌟 🚀', 'commandType': 4},
+    {'text': 'corchetes ] y llaves } dentro, de una cadena [', 'nested': {'a': [1, 2, {'b': None}]}},
+    12345678901234567890,
+    -1.5e-10,
+    'texto suelto',
+    True,
+    None,
+    [],
+    {},
+]
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 64, 1 << 18])
+@pytest.mark.parametrize('ensure_ascii', [True, False])
+def test_iter_json_array_across_chunk_boundaries(tmp_path, chunk_size, ensure_ascii):
+    path = write_json(tmp_path / 'dump.json', TRICKY_ITEMS, ensure_ascii=ensure_ascii, indent=1)
+    assert list(restore_chats.iter_json_array(path, chunk_size=chunk_size)) == TRICKY_ITEMS
+
+@pytest.mark.parametrize('chunk_size', [1, 5])
+def test_iter_json_array_numbers_split_at_end_of_chunk(tmp_path, chunk_size):
+    path = tmp_path / 'dump.json'
+    path.write_text('[1234567,\n 89, 3.25e3]', encoding='utf-8')
+    assert list(restore_chats.iter_json_array(path, chunk_size=chunk_size)) == [1234567, 89, 3250.0]
+
+@pytest.mark.parametrize('content', ['[]', '  [ ]  ', '\n[\n]\n'])
+def test_iter_json_array_empty(tmp_path, content):
+    path = tmp_path / 'dump.json'
+    path.write_text(content, encoding='utf-8')
+    assert list(restore_chats.iter_json_array(path, chunk_size=1)) == []
+
+@pytest.mark.parametrize('content', ['{"a": 1}', '[1, 2', '[1 2]', '[{"text": "sin cerrar'])
+def test_iter_json_array_rejects_malformed_input(tmp_path, content):
+    path = tmp_path / 'dump.json'
+    path.write_text(content, encoding='utf-8')
+    with pytest.raises(ValueError):
+        list(restore_chats.iter_json_array(path, chunk_size=2))
+
+# Búsqueda de texto completo: el texto libre nunca se interpreta como sintaxis FTS5
+
+@pytest.mark.parametrize('query, expected', [
+    ('hola mundo', '"hola" "mundo"'),
+    ('  espacios \t de  más ', '"espacios" "de" "más"'),
+    ('di "hola"', '"di" """hola"""'),
+    ('a AND b OR NOT c', '"a" "AND" "b" "OR" "NOT" "c"'),
+    ('NEAR(a b) pref* col:valor ^inicio', '"NEAR(a" "b)" "pref*" "col:valor" "^inicio"'),
+    ('', ''),
+])
+def test_fts_phrase_query_quotes_every_term(query, expected):
+    assert restore_chats.fts_phrase_query(query) == expected
+
+def make_conv(index, text, msg_type='user'):
+    return {'index': index, 'type': msg_type, 'text': text, 'length': len(text)}
+
+@pytest.fixture
+def search_index(tmp_path):
+    index = restore_chats.ChatSearchIndex(tmp_path / restore_chats.SEARCH_INDEX_FILE)
+    for position, (text, msg_type) in enumerate([
+        ('configurar el servidor de métricas', 'user'),
+        ('el servidor OR la base de datos', 'assistant'),
+        ('NOT usar "comillas" en la consulta', 'user'),
+        ('prefijo* literal y col:valor', 'assistant'),
+    ]):
+        index.add(position, make_conv(position, text, msg_type))
+    index.close()
+    index = restore_chats.ChatSearchIndex(tmp_path / restore_chats.SEARCH_INDEX_FILE)
+    yield index
+    index.close()
+
+@pytest.mark.parametrize('query, positions', [
+    ('servidor', {0, 1}),
+    ('METRICAS', {0}),
+    ('servidor OR', {1}),
+    ('NOT usar', {2}),
+    ('"comillas"', {2}),
+    ('prefijo*', {3}),
+    ('col:valor', {3}),
+    ('AND', set()),
+])
+def test_search_treats_operators_as_words(search_index, query, positions):
+    assert {row[0] for row in search_index.search(query)} == positions
+
+def test_search_filters_by_type_and_accepts_raw_queries(search_index):
+    assert [row[0] for row in search_index.search('servidor', types=['assistant'])] == [1]
+    assert {row[0] for row in search_index.search('servidor OR consulta', raw=True)} == {0, 1, 2}
+
+# Restauración incremental: deduplicación por origen y contenido, índice de offsets tras añadir
+
+def restore(tmp_path, dump=None, db=None, **kwargs):
+    kwargs.setdefault('build_index', False)
+    output_dir = tmp_path / 'restored'
+    return restore_chats.process_cursor_chats(dump, output_dir, db_path=db, **kwargs)
+
+def consolidated(output_dir):
+    return [message for _, message in restore_chats.iter_consolidated_messages(output_dir)]
+
+def chat_items(*texts):
+    return [{'text': text, 'commandType': 3 if i % 2 == 0 else 4} for i, text in enumerate(texts)]
+
+def test_repeated_messages_in_different_positions_are_kept(tmp_path):
+    dump = write_json(tmp_path / 'dump.json', chat_items('continúa', 'listo', 'continúa', 'listo', 'sí'))
+    output_dir, conversations = restore(tmp_path, dump)
+    assert conversations == 5
+    assert [message['text'] for message in consolidated(output_dir)] == ['continúa', 'listo', 'continúa',
+                                                                          'listo', 'sí']
+
+def test_rerun_adds_only_new_messages_and_offsets_follow_the_append(tmp_path):
+    items = chat_items('uno', 'dos', 'uno')
+    dump = write_json(tmp_path / 'dump.json', items)
+    restore(tmp_path, dump)
+    output_dir, conversations = restore(tmp_path, dump)
+    assert conversations == 3
+
+    write_json(dump, items + chat_items('tres', 'dos', 'cuatro ' * 300))
+    output_dir, conversations = restore(tmp_path, dump)
+    assert conversations == 6
+    messages = consolidated(output_dir)
+    assert [message['text'] for message in messages][:5] == ['uno', 'dos', 'uno', 'tres', 'dos']
+    assert [message['index'] for message in messages] == [0, 1, 2, 3, 4, 5]
+    assert (output_dir / restore_chats.CONSOLIDATED_INDEX_FILE).stat().st_size == 6 * restore_chats.OFFSET_SIZE
+    for position, message in enumerate(messages):
+        assert restore_chats.read_consolidated_message(output_dir, position) == message
+    assert [message['text'] for _, message in restore_chats.iter_consolidated_messages(output_dir, 4, 5)] == ['dos']
+    with pytest.raises(IndexError):
+        restore_chats.read_consolidated_message(output_dir, 6)
+
+def test_bubble_ids_identify_messages_regardless_of_position(tmp_path):
+    items = [dict(item, bubbleId=f'b{i}') for i, item in enumerate(chat_items('hola', 'sí', 'sí'))]
+    dump = write_json(tmp_path / 'dump.json', items)
+    restore(tmp_path, dump)
+    # El volcado se regeneró con los mensajes en otro orden: nada es nuevo
+    write_json(dump, list(reversed(items)))
+    output_dir, conversations = restore(tmp_path, dump)
+    assert conversations == 3
+
+def write_workspace_db(path, prompts, bubbles):
+    """state.vscdb sintético: ItemTable con aiService.prompts y cursorDiskKV con burbujas"""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS ItemTable (key TEXT UNIQUE ON CONFLICT REPLACE, value BLOB)")
+    conn.execute("CREATE TABLE IF NOT EXISTS cursorDiskKV (key TEXT UNIQUE ON CONFLICT REPLACE, value BLOB)")
+    conn.execute("INSERT INTO ItemTable VALUES (?, ?)", ('aiService.prompts', json.dumps(prompts)))
+    conn.execute("INSERT INTO ItemTable VALUES (?, ?)", ('otra.clave', '{"text": "no es chat"}'))
+    for key, bubble in bubbles.items():
+        conn.execute("INSERT INTO cursorDiskKV VALUES (?, ?)", (f'bubbleId:{key}', json.dumps(bubble)))
+    conn.commit()
+    conn.close()
+    return path
+
+def test_workspace_db_keeps_repeated_prompts_and_reads_only_new_rows(tmp_path):
+    db = tmp_path / 'state.vscdb'
+    prompts = [{'text': 'sí', 'commandType': 4}, {'text': 'sí', 'commandType': 4}]
+    write_workspace_db(db, prompts, {'c1:b1': {'type': 1, 'text': 'sí'}, 'c1:b2': {'type': 2, 'text': 'hecho'}})
+    output_dir, conversations = restore(tmp_path, db=db)
+    assert conversations == 4
+
+    write_workspace_db(db, prompts + [{'text': 'sí', 'commandType': 4}], {'c2:b1': {'type': 1, 'text': 'sí'}})
+    output_dir, conversations = restore(tmp_path, db=db)
+    assert conversations == 6
+    assert [message['type'] for message in consolidated(output_dir)][-2:] == ['assistant', 'user']
+
+def write_generations(db, generations):
+    conn = sqlite3.connect(db)
+    conn.execute("INSERT INTO ItemTable VALUES (?, ?)", ('aiService.generations', json.dumps(generations)))
+    conn.commit()
+    conn.close()
+
+def test_workspace_db_dates_prompts_with_their_generations(tmp_path):
+    prompts = [{'text': 'crea el test', 'commandType': 4}, {'text': 'otra vez', 'commandType': 4},
+               {'text': 'crea el test', 'commandType': 4}]
+    db = write_workspace_db(tmp_path / 'state.vscdb', prompts, {})
+    write_generations(db, [
+        {'unixMs': 1760000000000, 'generationUUID': 'g1', 'type': 'composer', 'textDescription': 'crea el test'},
+        {'unixMs': 1760000001000, 'generationUUID': 'g2', 'type': 'apply'},
+        {'unixMs': 1760000002000, 'generationUUID': 'g3', 'type': 'composer', 'textDescription': 'crea el test'},
+    ])
+
+    output_dir, conversations = restore(tmp_path, db=db)
+    # Las generaciones repiten el texto del prompt: no se restauran como mensajes
+    assert conversations == 3
+    assert [(message['text'], message.get('timestamp')) for message in consolidated(output_dir)] == [
+        ('crea el test', 1760000000.0), ('otra vez', None), ('crea el test', 1760000002.0)]
+
+    # Un prompt nuevo se fecha igual aunque los anteriores ya estén restaurados
+    prompts.append({'text': 'otra vez', 'commandType': 4})
+    write_workspace_db(db, prompts, {})
+    write_generations(db, [{'unixMs': 1760000003000, 'textDescription': 'otra vez'},
+                           {'unixMs': 1760000004000, 'textDescription': 'otra vez'}])
+    output_dir, conversations = restore(tmp_path, db=db)
+    assert conversations == 4
+    assert consolidated(output_dir)[-1]['timestamp'] == 1760000004.0
+
+def test_normalize_bubble_shapes():
+    assert restore_chats.normalize_bubble({'type': 1, 'text': 'a'})['commandType'] == 'user'
+    assert restore_chats.normalize_bubble({'type': 2, 'text': 'b'})['commandType'] == 'assistant'
+    assert restore_chats.normalize_bubble({'textDescription': 'c'}) == {'textDescription': 'c'}
+    prompt = {'text': 'd', 'commandType': 4}
+    assert restore_chats.normalize_bubble(prompt) is prompt
+    assert restore_chats.normalize_bubble('suelto') == 'suelto'
+
+# Exportación a Markdown: archivos repartidos por rango de posición
+
+def test_exporter_shards_by_position(tmp_path, monkeypatch):
+    monkeypatch.setattr(restore_chats, 'EXPORT_SHARD_SIZE', 10)
+    exporter = restore_chats.ConversationExporter(tmp_path, workers=2, max_pending=1)
+    for position in range(25):
+        exporter.add(position, make_conv(position, f'mensaje {position}', 'user' if position % 2 else 'assistant'))
+    assert exporter.close() == 25
+
+    export_dir = tmp_path / restore_chats.EXPORT_DIR
+    assert sorted(shard.name for shard in export_dir.iterdir()) == [
+        '0000000-0000009', '0000010-0000019', '0000020-0000029']
+    assert len(list(export_dir.rglob('*.md'))) == 25
+    path = export_dir / '0000010-0000019' / 'conversation_0000013_user.md'
+    assert path.read_text(encoding='utf-8').endswith('mensaje 13')
+
+def test_export_conversations_replaces_previous_export(tmp_path):
+    dump = write_json(tmp_path / 'dump.json', chat_items('uno', 'dos', 'tres'))
+    output_dir, _ = restore(tmp_path, dump, export_all=True, workers=2)
+    stale = output_dir / restore_chats.EXPORT_DIR / 'obsoleto.md'
+    stale.write_text('viejo', encoding='utf-8')
+
+    assert restore_chats.export_conversations(output_dir, workers=2) == 3
+    exported = sorted(path.name for path in (output_dir / restore_chats.EXPORT_DIR).rglob('*.md'))
+    assert exported == ['conversation_0000000_user.md', 'conversation_0000001_assistant.md',
+                        'conversation_0000002_user.md']
+
+# Archivo comprimido por bloques: ida y vuelta, acceso aleatorio y continuación
+
+def jsonl_lines(start, stop):
+    return [json.dumps({'index': i, 'text': f'mensaje {i} ' + 'ñ' * (i % 7)}, ensure_ascii=False).encode('utf-8') + b'\n'
+            for i in range(start, stop)]
+
+def write_lines(path, lines, **kwargs):
+    writer = restore_chats.ChatArchiveWriter(path, **kwargs)
+    for line in lines:
+        writer.add(line)
+    writer.close()
+    return writer
+
+@pytest.mark.parametrize('count', [0, 1, 4, 5, 11])
+def test_archive_round_trip_and_random_access(tmp_path, count):
+    path = tmp_path / restore_chats.ARCHIVE_FILE
+    lines = jsonl_lines(0, count)
+    writer = write_lines(path, lines, chunk_messages=4)
+    assert len(writer.chunks) == -(-count // 4)
+
+    with restore_chats.ChatArchive(path) as archive:
+        assert (len(archive), archive.codec, archive.chunk_messages) == (count, 'gzip', 4)
+        assert list(archive.iter_range()) == [json.loads(line) for line in lines]
+        for position in reversed(range(count)):
+            assert archive[position]['index'] == position
+        assert [message['index'] for message in archive.iter_range(3, 6)] == list(range(3, min(6, count)))
+        with pytest.raises(IndexError):
+            archive[count]
+
+def test_archive_append_completes_the_partial_chunk(tmp_path):
+    path = tmp_path / restore_chats.ARCHIVE_FILE
+    write_lines(path, jsonl_lines(0, 6), chunk_messages=4)
+
+    writer = restore_chats.ChatArchiveWriter(path, append=True)
+    assert (writer.count, writer.chunk_messages, len(writer.chunks)) == (6, 4, 1)
+    for line in jsonl_lines(6, 13):
+        writer.add(line)
+    writer.close()
+
+    with restore_chats.ChatArchive(path) as archive:
+        assert len(archive) == 13
+        assert len(archive.chunks) == 4
+        assert [message['index'] for message in archive.iter_range()] == list(range(13))
+
+def test_archive_rejects_incomplete_files(tmp_path):
+    path = tmp_path / restore_chats.ARCHIVE_FILE
+    write_lines(path, jsonl_lines(0, 5), chunk_messages=4)
+    path.write_bytes(path.read_bytes()[:-4])
+    with pytest.raises(ValueError):
+        restore_chats.ChatArchive(path)
+    (tmp_path / 'vacío').write_bytes(b'')
+    with pytest.raises(ValueError):
+        restore_chats.ChatArchive(tmp_path / 'vacío')
+
+def test_restore_with_archive_matches_the_consolidated_store(tmp_path):
+    dump = write_json(tmp_path / 'dump.json', chat_items(*(f'mensaje {i}' for i in range(300))))
+    output_dir, _ = restore(tmp_path, dump, archive='gzip')
+    write_json(dump, chat_items(*(f'mensaje {i}' for i in range(310))))
+    output_dir, conversations = restore(tmp_path, dump, archive='gzip')
+
+    with restore_chats.ChatArchive(output_dir / restore_chats.ARCHIVE_FILE) as archive:
+        assert len(archive) == conversations == 310
+        assert list(archive.iter_range()) == consolidated(output_dir)
+
+# Casi duplicados: firmas MinHash y bandas LSH derivadas de la similitud pedida
+
+@pytest.mark.parametrize('similarity, expected', [(0.5, (21, 3)), (0.85, (8, 8)), (0.95, (4, 16)), (1.0, (1, 64))])
+def test_lsh_bands_follow_the_similarity(similarity, expected):
+    bands, rows = restore_chats.lsh_bands(similarity)
+    assert (bands, rows) == expected
+    assert bands * rows <= restore_chats.MINHASH_BINS
+    assert 1 - (1 - similarity ** rows) ** bands >= restore_chats.LSH_MIN_RECALL
+
+def long_text(seed, words=120):
+    return ' '.join(f'palabra{(seed * 7919 + i * 104729) % 5000}' for i in range(words))
+
+def test_minhash_signature_estimates_similarity():
+    base = long_text(1)
+    edited = base.replace('palabra', 'Palabra', 1) + ' cola añadida'
+    signature = restore_chats.minhash_signature(base)
+    assert len(signature) == restore_chats.MINHASH_BINS
+    assert restore_chats.minhash_signature(base.upper()) == signature
+    assert restore_chats.minhash_signature(' '.join(base.split()[:2])) == restore_chats.minhash_signature(
+        ' '.join(base.split()[:2]) + '  ')
+
+    def similarity(a, b):
+        return sum(x == y for x, y in zip(a, b)) / restore_chats.MINHASH_BINS
+
+    assert similarity(signature, restore_chats.minhash_signature(edited)) > 0.85
+    assert similarity(signature, restore_chats.minhash_signature(long_text(2))) < 0.2
+
+@pytest.mark.parametrize('similarity', [0.5, 0.85, 0.95])
+def test_near_duplicate_index_groups_edited_copies(tmp_path, similarity):
+    conn = sqlite3.connect(tmp_path / 'state.db')
+    index = restore_chats.NearDuplicateIndex(conn, similarity)
+    base = long_text(1)
+    assert index.match(0, base) is None
+    assert index.match(1, long_text(2)) is None
+    assert index.match(2, 'demasiado corto') is None
+    canonical, estimate = index.match(3, base + ' fin')
+    assert canonical == 0 and estimate >= similarity
+    conn.commit()
+    conn.close()
+
+    # Al reabrir (otro proceso) con otra similitud las bandas se recalculan desde las firmas guardadas
+    conn = sqlite3.connect(tmp_path / 'state.db')
+    reopened = restore_chats.NearDuplicateIndex(conn, 0.8)
+    assert conn.execute("SELECT COUNT(*) FROM near_duplicate_bands").fetchone()[0] == 2 * reopened.bands
+    assert reopened.match(4, base)[0] == 0
+    assert reopened.stats() == {'clusters': 1, 'largest': [(3, 0)]}
+    conn.close()
+
+# Línea de tiempo multi-workspace: orden por la fecha de los mensajes
+
+@pytest.mark.parametrize('item, expected', [
+    ({'createdAt': '2026-03-01T10:00:00Z'}, 1772359200.0),
+    ({'createdAt': 1772359200123}, 1772359200.123),
+    ({'timingInfo': {'clientStartTime': 1772359200000}}, 1772359200.0),
+    ({'unixMs': 1772359200000}, 1772359200.0),
+    ({'createdAt': 'ayer', 'unixMs': 1772359200000}, 1772359200.0),
+    ({'createdAt': True}, None),
+    ({}, None),
+])
+def test_message_timestamp(item, expected):
+    assert restore_chats.message_timestamp(item) == expected
+
+def test_timeline_orders_sessions_by_message_dates(tmp_path):
+    for name in ('tarde', 'temprano'):
+        (tmp_path / name).mkdir()
+    write_workspace_db(tmp_path / 'tarde' / 'state.vscdb', [], {
+        'c1:b1': {'type': 1, 'text': 'pregunta tardía', 'createdAt': '2026-03-02T10:00:00Z'}})
+    write_workspace_db(tmp_path / 'temprano' / 'state.vscdb', [], {
+        'c1:b1': {'type': 1, 'text': 'pregunta temprana', 'timingInfo': {'clientStartTime': 1772272800000}}})
+    undated = write_json(tmp_path / 'sin_fechas.json', chat_items('sin fecha'))
+
+    results = restore_chats.restore_workspaces([tmp_path / 'tarde', tmp_path / 'temprano', undated],
+                                               tmp_path / 'out', jobs=1, options={'build_index': False})
+    assert sorted(session['dated'] for result in results for session in result['sessions']) == [False, True, True]
+
+    timeline = (tmp_path / 'out' / restore_chats.TIMELINE_FILE).read_text(encoding='utf-8')
+    assert timeline.index('pregunta temprana') < timeline.index('pregunta tardía')
+    headings = [line for line in timeline.splitlines() if line.startswith('## ')]
+    assert len(headings) == 3
+    assert [heading for heading in headings if '🗂️' in heading] == [
+        heading for heading in headings if 'sin_fechas' in heading]
+
+def test_timeline_interleaves_conversations_of_all_workspaces(tmp_path):
+    for name in ('alfa', 'beta'):
+        (tmp_path / name).mkdir()
+    write_workspace_db(tmp_path / 'alfa' / 'state.vscdb', [], {
+        'c1:b1': {'type': 1, 'text': 'alfa lunes', 'createdAt': '2026-03-02T10:00:00Z'},
+        'c1:b2': {'type': 2, 'text': 'respuesta lunes', 'createdAt': '2026-03-02T10:05:00Z'},
+        'c2:b1': {'type': 1, 'text': 'alfa miércoles', 'createdAt': '2026-03-04T10:00:00Z'}})
+    write_workspace_db(tmp_path / 'beta' / 'state.vscdb', [], {
+        'c9:b1': {'type': 1, 'text': 'beta martes', 'createdAt': '2026-03-03T10:00:00Z'}})
+
+    results = restore_chats.restore_workspaces([tmp_path / 'alfa', tmp_path / 'beta'], tmp_path / 'out',
+                                               jobs=1, options={'build_index': False})
+    alfa = next(result for result in results if result['name'] == 'alfa')
+    assert [(session['conversation'], session['first'], session['last']) for session in alfa['sessions']] == [
+        ('c1', 0, 2), ('c2', 2, 3)]
+
+    timeline = (tmp_path / 'out' / restore_chats.TIMELINE_FILE).read_text(encoding='utf-8')
+    order = ['alfa lunes', 'beta martes', 'alfa miércoles']
+    assert [timeline.index(text) for text in order] == sorted(timeline.index(text) for text in order)
+    assert len([line for line in timeline.splitlines() if line.startswith('## ')]) == 3
+
+def test_split_sessions_by_idle_gap():
+    gap = restore_chats.SESSION_GAP_SECONDS
+    messages = [(0, {'timestamp': 1000.0}), (1, {}), (2, {'timestamp': 1000.0 + gap}),
+                (3, {'timestamp': 1001.0 + 2 * gap}), (4, {'conversation': 'c1'})]
+    sessions = restore_chats.split_sessions(messages, fallback=5.0)
+    assert [(session['first'], session['last'], session['start'], session['activity']) for session in sessions] == [
+        (0, 3, 1000.0, 1000.0 + gap), (3, 5, 1001.0 + 2 * gap, 1001.0 + 2 * gap)]
+    assert restore_chats.split_sessions([(7, {})], fallback=5.0) == [
+        {'first': 7, 'last': 8, 'conversation': None, 'start': 5.0, 'activity': 5.0, 'dated': False}]
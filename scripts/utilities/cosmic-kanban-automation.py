@@ -10,30 +10,105 @@ el mapa estelar de transformación en Miro.
 Creado por: KIRA, The Word Weaver
 Supervisado por: ANA, CIO Cósmica
 Bendecido por: Los 12 Guardianes Digitales
+
+Requiere Python 3.10+ (`@dataclass(slots=True)`).
 """
 
 import os
 import json
-import requests
+import argparse
 import asyncio
-import aiohttp
+import hashlib
+import importlib.util
 import logging
+import logging.handlers
+import queue
+import random
+import sqlite3
+import sys
+import time
 from datetime import datetime
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, asdict
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import (Any, AsyncIterable, AsyncIterator, Dict, Iterable,
+                    List, Optional, Sequence, Set, Tuple, Union)
+from urllib.parse import urlencode
+from collections import defaultdict
+from dataclasses import dataclass, asdict, field
+from functools import lru_cache
 from enum import Enum
 
-# 🌟 Configuración de Logging Cósmico
-logging.basicConfig(
-    level=logging.INFO,
-    format='🌟 %(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/cosmic-kanban-sync.log'),
-        logging.StreamHandler()
-    ]
-)
+def _lazy_import(name: str):
+    """💤 Importa un módulo pesado de forma diferida: se carga en el primer acceso a un atributo"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+# aiohttp es la dependencia más pesada: solo se carga al abrir la sesión HTTP
+aiohttp = _lazy_import("aiohttp")
+
+# 🌟 Logging Cósmico: se configura al arrancar (configure_logging), no al importar
+LOG_FORMAT = '🌟 %(asctime)s - %(name)s - %(levelname)s - %(message)s'
 logger = logging.getLogger('CosmicKanban')
 
+class CosmicJsonFormatter(logging.Formatter):
+    """🧾 Formato estructurado: una línea JSON por registro, con los campos `item` si existen"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        item = getattr(record, "item", None)
+        if item:
+            entry["item"] = item
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+def configure_logging(level: Optional[str] = None,
+                      log_directory: Optional[str] = None,
+                      log_style: Optional[str] = None) -> logging.handlers.QueueListener:
+    """🌟 Configura el logging no bloqueante: los registros pasan por una cola y un hilo
+    de fondo los escribe en archivo y consola, así el event loop nunca espera al disco.
+    
+    Retorna el listener; hay que llamar a `stop()` al terminar para vaciar la cola.
+    """
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    log_directory = log_directory or os.getenv("LOG_DIRECTORY", "logs/")
+    log_style = (log_style or os.getenv("COSMIC_LOG_STYLE", "text")).lower()
+    
+    formatter = CosmicJsonFormatter() if log_style == "json" else logging.Formatter(LOG_FORMAT)
+    handlers: List[logging.Handler] = [logging.StreamHandler()]
+    try:
+        os.makedirs(log_directory, exist_ok=True)
+        handlers.append(logging.FileHandler(os.path.join(log_directory, "cosmic-kanban-sync.log"),
+                                            encoding="utf-8"))
+    except OSError as e:
+        print(f"⚠️ No se pudo abrir el archivo de log en {log_directory}: {e}", file=sys.stderr)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+    
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
 class ThematicElement(Enum):
     """🔥 Los 4 Elementos Sagrados + Éter Cósmico"""
     FIRE = {"name": "Fuego", "color": "#FF6B35", "guardian": "PHOENIX"}  # ÜStats
@@ -63,9 +138,73 @@ class GuardianRoles(Enum):
     THOR = "Protector de Sistemas - Infraestructura Robusta"
     NOVA = "Catalizada de Innovación - Nuevas Posibilidades"
 
-@dataclass
+# 🎨 Fragmentos precalculados por elemento, nivel y guardián: cada render de
+# tarjeta solo ensambla piezas ya construidas en lugar de formatearlas de nuevo
+_ELEMENT_TITLE_PREFIX = {element: sys.intern(element.value['name']) for element in ThematicElement}
+_ELEMENT_CARD_STYLE = {
+    element: {
+        "backgroundColor": element.value['color'],
+        "textColor": "#FFFFFF" if element != ThematicElement.AIR else "#2C3E50"
+    }
+    for element in ThematicElement
+}
+_HAMBRE_DESCRIPTION_LINE = {
+    level: f"🔥 **HambrE Level**: {level.value['emoji']} {level.value['description']}"
+    for level in HambrELevel
+}
+_HAMBRE_TAG = {level: sys.intern(f"HambrE: {level.value['description']}") for level in HambrELevel}
+_GUARDIAN_DESCRIPTION_LINE = {guardian: f"👤 **Guardian Asignado**: {guardian.value}" for guardian in GuardianRoles}
+_GUARDIAN_TAG = {guardian: sys.intern(f"Guardian: {guardian.name}") for guardian in GuardianRoles}
+_COSMIC_SIGNATURE = '*"Cada línea de código es un acto de amor hacia la comunidad"*'
+
+@lru_cache(maxsize=4096)
+def _render_miro_card(content: Tuple) -> Dict[str, Any]:
+    """🎨 Renderiza (y memoiza) la tarjeta Miro a partir del contenido de una tarea"""
+    (title, description, element, guardian, hambre_level, priority,
+     phase, estimated_hours, philosophical_kpi, tags) = content
+    cosmic_description = "\n".join((
+        f"🌟 **Misión Cósmica**: {description}",
+        "",
+        _HAMBRE_DESCRIPTION_LINE[hambre_level],
+        _GUARDIAN_DESCRIPTION_LINE[guardian],
+        f"⏰ **Estimación**: {estimated_hours}h",
+        f"🎯 **KPI Filosófico**: {philosophical_kpi}",
+        f"📊 **Prioridad**: {priority}",
+        f"🌀 **Fase Estratégica**: {phase}",
+        "",
+        _COSMIC_SIGNATURE
+    )).strip()
+    return {
+        "type": "card",
+        "data": {
+            "title": f"{_ELEMENT_TITLE_PREFIX[element]} {title}",
+            "description": cosmic_description,
+            "style": dict(_ELEMENT_CARD_STYLE[element]),
+            "position": {"x": 0, "y": 0},  # Se calculará dinámicamente
+            "size": {"width": 280, "height": 200}
+        },
+        "tags": list(tags) + [
+            _GUARDIAN_TAG[guardian],
+            _HAMBRE_TAG[hambre_level],
+            f"Fase: {phase}",
+            f"KPI: {philosophical_kpi}"
+        ]
+    }
+
+@lru_cache(maxsize=4096)
+def _hash_miro_card(content: Tuple, status: str) -> str:
+    """🧬 Hash (memoizado) del payload de la tarjeta más su status"""
+    payload = {"card": _render_miro_card(content), "status": status}
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+@dataclass(slots=True)
 class CosmicTask:
-    """🎯 Estructura de una Tarea Cósmica"""
+    """🎯 Estructura de una Tarea Cósmica
+    
+    Usa `__slots__` y cadenas internadas (prioridad, KPI, status y tags se repiten
+    en casi todas las tareas) para que backlogs grandes ocupen poca memoria.
+    """
     title: str
     description: str
     element: ThematicElement
@@ -75,59 +214,658 @@ class CosmicTask:
     phase: int     # 1, 2, 3
     estimated_hours: int
     philosophical_kpi: str  # IER, VIC, GS
-    tags: List[str]
-    created_at: datetime = datetime.now()
+    tags: Sequence[str]
+    created_at: datetime = field(default_factory=datetime.now)
     status: str = "Backlog Cósmico"
     
+    def __post_init__(self):
+        self.priority = sys.intern(self.priority)
+        self.philosophical_kpi = sys.intern(self.philosophical_kpi)
+        self.status = sys.intern(self.status)
+        self.tags = tuple(sys.intern(tag) for tag in self.tags)
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CosmicTask":
+        """🧾 Construye una tarea desde un registro (JSONL/YAML); los enums van por nombre"""
+        fields = dict(
+            title=data["title"],
+            description=data.get("description", ""),
+            element=ThematicElement[str(data["element"]).upper()],
+            guardian=GuardianRoles[str(data["guardian"]).upper()],
+            hambre_level=HambrELevel[str(data["hambre_level"]).upper()],
+            priority=data.get("priority", "Medium"),
+            phase=int(data.get("phase", 1)),
+            estimated_hours=int(data.get("estimated_hours", 0)),
+            philosophical_kpi=data.get("philosophical_kpi", "IER"),
+            tags=data.get("tags") or (),
+            status=data.get("status", "Backlog Cósmico")
+        )
+        if data.get("created_at"):
+            fields["created_at"] = datetime.fromisoformat(str(data["created_at"]))
+        return cls(**fields)
+    
+    def content_key(self) -> Tuple:
+        """🔑 Tupla con todo el contenido que se refleja en la tarjeta (clave de memoización)"""
+        return (self.title, self.description, self.element, self.guardian, self.hambre_level,
+                self.priority, self.phase, self.estimated_hours, self.philosophical_kpi,
+                tuple(self.tags))
+    
     def to_miro_card(self) -> Dict[str, Any]:
-        """🎨 Convierte la tarea a formato de tarjeta Miro"""
+        """🎨 Convierte la tarea a formato de tarjeta Miro
+        
+        El render se memoiza por contenido; se retorna una copia con todos los
+        diccionarios y listas reconstruidos (las cadenas siguen compartidas), así
+        que el llamador puede modificarla sin corromper la caché.
+        """
+        card = _render_miro_card(self.content_key())
+        data = card["data"]
         return {
-            "type": "card",
+            "type": card["type"],
             "data": {
-                "title": f"{self.element.value['name']} {self.title}",
-                "description": self.generate_cosmic_description(),
-                "style": {
-                    "backgroundColor": self.element.value['color'],
-                    "textColor": "#FFFFFF" if self.element != ThematicElement.AIR else "#2C3E50"
-                },
-                "position": {"x": 0, "y": 0},  # Se calculará dinámicamente
-                "size": {"width": 280, "height": 200}
+                "title": data["title"],
+                "description": data["description"],
+                "style": dict(data["style"]),
+                "position": dict(data["position"]),
+                "size": dict(data["size"])
             },
-            "tags": self.tags + [
-                f"Guardian: {self.guardian.name}",
-                f"HambrE: {self.hambre_level.value['description']}",
-                f"Fase: {self.phase}",
-                f"KPI: {self.philosophical_kpi}"
-            ]
+            "tags": list(card["tags"])
         }
     
+    def task_key(self) -> str:
+        """🔑 Clave estable de la tarea (elemento + título) para el estado local"""
+        raw = f"{self.element.name}:{self.title.strip().lower()}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    
+    def content_hash(self) -> str:
+        """🧬 Hash del contenido de la tarjeta; cambia si hay que actualizarla en Miro"""
+        return _hash_miro_card(self.content_key(), self.status)
+    
     def generate_cosmic_description(self) -> str:
         """✨ Genera una descripción cósmica para la tarea"""
-        return f"""
-🌟 **Misión Cósmica**: {self.description}
+        return _render_miro_card(self.content_key())["data"]["description"]
+
+class CosmicSyncState:
+    """🗄️ Estado local de sincronización (SQLite)
+    
+    Relaciona la clave estable de cada tarea con el id del elemento en Miro y el
+    hash de su contenido, de modo que una re-sincronización solo escriba las
+    tarjetas nuevas o modificadas. También recuerda las columnas ya creadas y el
+    cursor (ETag + marca de agua `modifiedAt`) del último sondeo de cambios del tablero.
+    """
+    
+    def __init__(self, path: str = ".cosmic-kanban/sync-state.db"):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS cards (
+                board_id TEXT NOT NULL,
+                task_key TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                status TEXT,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (board_id, task_key)
+            );
+            CREATE TABLE IF NOT EXISTS columns (
+                board_id TEXT NOT NULL,
+                column_key TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                PRIMARY KEY (board_id, column_key)
+            );
+            CREATE TABLE IF NOT EXISTS pull_cursors (
+                board_id TEXT PRIMARY KEY,
+                etag TEXT,
+                watermark TEXT
+            );
+        """)
+        self._conn.commit()
+    
+    def load_cards(self, board_id: str) -> Dict[str, Tuple[str, str, Optional[str]]]:
+        """📖 Retorna {task_key: (item_id, content_hash, status)} del tablero"""
+        rows = self._conn.execute(
+            "SELECT task_key, item_id, content_hash, status FROM cards WHERE board_id = ?", (board_id,)
+        )
+        return {key: (item_id, content_hash, status) for key, item_id, content_hash, status in rows}
+    
+    def save_card(self, board_id: str, task_key: str, item_id: str,
+                  content_hash: str, status: Optional[str] = None) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO cards VALUES (?, ?, ?, ?, ?, ?)",
+            (board_id, task_key, item_id, content_hash, status, datetime.now().isoformat())
+        )
+    
+    def load_item_index(self, board_id: str) -> Dict[str, Tuple[str, str, Optional[str]]]:
+        """📖 Retorna {item_id: (task_key, content_hash, status)} para traducir cambios del tablero"""
+        rows = self._conn.execute(
+            "SELECT item_id, task_key, content_hash, status FROM cards WHERE board_id = ?", (board_id,)
+        )
+        return {item_id: (key, content_hash, status) for item_id, key, content_hash, status in rows}
+    
+    def update_card_status(self, board_id: str, task_key: str, status: str,
+                           content_hash: Optional[str] = None) -> None:
+        """✏️ Actualiza en el sitio el status (y opcionalmente el hash) de una tarjeta conocida"""
+        self._conn.execute(
+            "UPDATE cards SET status = ?, content_hash = COALESCE(?, content_hash), updated_at = ? "
+            "WHERE board_id = ? AND task_key = ?",
+            (status, content_hash, datetime.now().isoformat(), board_id, task_key)
+        )
+    
+    def load_pull_cursor(self, board_id: str) -> Tuple[Optional[str], Optional[str]]:
+        """📖 Retorna (etag, watermark) del último sondeo de cambios del tablero"""
+        row = self._conn.execute(
+            "SELECT etag, watermark FROM pull_cursors WHERE board_id = ?", (board_id,)
+        ).fetchone()
+        return (row[0], row[1]) if row else (None, None)
+    
+    def save_pull_cursor(self, board_id: str, etag: Optional[str], watermark: Optional[str]) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO pull_cursors VALUES (?, ?, ?)", (board_id, etag, watermark)
+        )
+    
+    def delete_card(self, board_id: str, task_key: str) -> None:
+        self._conn.execute(
+            "DELETE FROM cards WHERE board_id = ? AND task_key = ?", (board_id, task_key)
+        )
+    
+    def load_columns(self, board_id: str) -> Dict[str, str]:
+        """📖 Retorna {column_key: item_id} de las columnas ya creadas"""
+        rows = self._conn.execute(
+            "SELECT column_key, item_id FROM columns WHERE board_id = ?", (board_id,)
+        )
+        return dict(rows.fetchall())
+    
+    def save_column(self, board_id: str, column_key: str, item_id: str) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO columns VALUES (?, ?, ?)", (board_id, column_key, item_id)
+        )
+    
+    def commit(self) -> None:
+        self._conn.commit()
+    
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()
+
+class CosmicSyncJournal:
+    """📜 Diario de sincronización append-only (write-ahead)
+    
+    Antes de cada escritura en Miro se registra la intención y, al terminar, su
+    resultado. Si la sincronización se interrumpe, `--resume` reproduce el diario
+    para saltar el trabajo completado y reconciliar los elementos en vuelo.
+    Cada línea se vacía al sistema operativo de inmediato; el fsync se agrupa
+    cada `fsync_every` registros y al cerrar.
+    """
+    
+    def __init__(self, path: str = ".cosmic-kanban/sync-journal.jsonl", fsync_every: int = 64):
+        self.path = path
+        self.fsync_every = max(1, fsync_every)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = None
+        self._pending = 0
+    
+    def has_pending(self) -> bool:
+        """⚠️ Un diario no vacío indica una ejecución anterior interrumpida"""
+        return os.path.exists(self.path) and os.path.getsize(self.path) > 0
+    
+    def begin(self, board_id: str, resume: bool = False) -> None:
+        """🚀 Inicia una ejecución; sin `resume` descarta el diario anterior"""
+        self.close()
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+        self._write({"op": "begin", "board_id": board_id, "at": datetime.now().isoformat()}, sync=True)
+    
+    def record_intent(self, action: str, key: str, **fields: Any) -> None:
+        self._write({"op": "intent", "action": action, "key": key, **fields})
+    
+    def record_done(self, action: str, key: str, item_id: Optional[str]) -> None:
+        self._write({"op": "done", "action": action, "key": key, "item_id": item_id})
+    
+    def record_failed(self, action: str, key: str) -> None:
+        self._write({"op": "failed", "action": action, "key": key})
+    
+    def replay(self, board_id: str) -> Dict[str, Dict[str, Any]]:
+        """🔁 Reconstruye el último estado de cada clave registrada para el tablero
+        
+        Cada entrada tiene `phase` = "done", "in_flight" o "failed" junto con los
+        campos de la intención (action, title, hash, status) y el `item_id`.
+        """
+        entries: Dict[str, Dict[str, Any]] = {}
+        if not os.path.exists(self.path):
+            return entries
+        
+        current_board = None
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Última línea truncada por la interrupción
+                    continue
+                op = record.get("op")
+                if op == "begin":
+                    current_board = record.get("board_id")
+                    continue
+                if current_board != board_id:
+                    continue
+                
+                key = record.get("key")
+                if op == "intent":
+                    entry = {k: v for k, v in record.items() if k != "op"}
+                    entry.setdefault("item_id", entries.get(key, {}).get("item_id"))
+                    entry["phase"] = "in_flight"
+                    entries[key] = entry
+                elif key in entries and op in ("done", "failed"):
+                    entries[key]["phase"] = op
+                    if record.get("item_id"):
+                        entries[key]["item_id"] = record["item_id"]
+        return entries
+    
+    def checkpoint(self) -> None:
+        """✅ La ejecución terminó y el estado está persistido: vaciar el diario"""
+        self.close()
+        open(self.path, "w").close()
+    
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+            self._pending = 0
+    
+    def _write(self, record: Dict[str, Any], sync: bool = False) -> None:
+        if self._file is None:
+            return
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self._pending += 1
+        if sync or self._pending >= self.fsync_every:
+            os.fsync(self._file.fileno())
+            self._pending = 0
+
+class CosmicRateLimiter:
+    """⏳ Token bucket adaptativo compartido por todas las peticiones a Miro
+    
+    Arranca con una tasa configurada y se ajusta con lo que el servidor informa:
+    reduce la tasa a la mitad ante un 429 y la recupera gradualmente con cada
+    respuesta exitosa (AIMD). Cuando las cabeceras X-RateLimit-* indican que la
+    cuota está casi agotada, frena proporcionalmente o se pausa hasta el reset.
+    """
+    
+    def __init__(self, rate: float = 8.0, burst: int = 8, min_rate: float = 0.5):
+        self.max_rate = max(rate, min_rate)
+        self.min_rate = min_rate
+        self.rate = self.max_rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self) -> float:
+        """🎟️ Espera un token disponible; retorna los segundos esperados"""
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                else:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+                    self._updated_at = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return waited
+                    delay = (1 - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+    
+    def pause(self, seconds: float) -> None:
+        """⏸️ Bloquea la emisión de peticiones durante `seconds` segundos"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+    
+    def on_success(self) -> None:
+        """📈 Recuperación aditiva de la tasa tras una respuesta exitosa"""
+        self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+    
+    def on_throttle(self, retry_after: Optional[float]) -> None:
+        """📉 Reducción multiplicativa de la tasa ante un 429"""
+        self.rate = max(self.min_rate, self.rate / 2)
+        if retry_after:
+            self.pause(retry_after)
+    
+    def update_from_headers(self, headers) -> None:
+        """📊 Ajusta la tasa según las cabeceras de cuota de Miro"""
+        try:
+            limit = float(headers.get("X-RateLimit-Limit", 0))
+            remaining = float(headers.get("X-RateLimit-Remaining", -1))
+            reset = float(headers.get("X-RateLimit-Reset", 0))
+        except (TypeError, ValueError):
+            return
+        if limit <= 0 or remaining < 0:
+            return
+        
+        # X-RateLimit-Reset puede llegar como epoch o como segundos restantes
+        reset_in = reset - time.time() if reset > 1e9 else reset
+        if remaining == 0 and reset_in > 0:
+            self.pause(reset_in)
+        elif remaining / limit < 0.1:
+            self.rate = max(self.min_rate, self.max_rate * (remaining / limit) * 10)
 
-🔥 **HambrE Level**: {self.hambre_level.value['emoji']} {self.hambre_level.value['description']}
-👤 **Guardian Asignado**: {self.guardian.value}
-⏰ **Estimación**: {self.estimated_hours}h
-🎯 **KPI Filosófico**: {self.philosophical_kpi}
-📊 **Prioridad**: {self.priority}
-🌀 **Fase Estratégica**: {self.phase}
+class CosmicSyncMetrics:
+    """📈 Métricas de la sincronización en formato de exposición de Prometheus
+    
+    Contadores, gauges e histogramas mínimos (sin dependencias externas) que se
+    pueden exponer en un endpoint `/metrics`, volcar a un archivo para el
+    textfile collector de node_exporter o enviar a un Pushgateway.
+    """
+    
+    NAMESPACE = "cosmic_kanban"
+    LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+    DEFINITIONS = {
+        "requests_total": ("counter", "Peticiones HTTP a Miro por método y código de estado"),
+        "request_duration_seconds": ("histogram", "Latencia de cada petición HTTP a Miro"),
+        "retries_total": ("counter", "Reintentos de peticiones a Miro por motivo"),
+        "rate_limit_waits_total": ("counter", "Veces que el limitador de tasa hizo esperar una petición"),
+        "rate_limit_wait_seconds_total": ("counter", "Segundos acumulados de espera en el limitador de tasa"),
+        "items_total": ("counter", "Tarjetas procesadas por resultado"),
+        "queue_depth": ("gauge", "Tarjetas construidas en espera de envío en el pipeline de sincronización"),
+        "sync_items_per_second": ("gauge", "Tarjetas sincronizadas por segundo en la última sincronización"),
+        "sync_duration_seconds": ("gauge", "Duración de la última sincronización"),
+        "last_sync_timestamp_seconds": ("gauge", "Momento (epoch) en que terminó la última sincronización"),
+        "pull_errors_total": ("counter", "Sondeos del tablero (modo pull) que fallaron y se reintentarán")
+    }
+    
+    def __init__(self):
+        self._values: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = defaultdict(float)
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], List[float]] = {}
+    
+    def inc(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        self._values[(name, self._label_key(labels))] += value
+    
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        self._values[(name, self._label_key(labels))] = value
+    
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """⏱️ Registra una observación; el histograma guarda conteos por bucket + suma"""
+        key = (name, self._label_key(labels))
+        buckets = self._histograms.get(key)
+        if buckets is None:
+            # [conteo por bucket..., +Inf, suma]
+            buckets = self._histograms[key] = [0.0] * (len(self.LATENCY_BUCKETS) + 2)
+        for i, bound in enumerate(self.LATENCY_BUCKETS):
+            if value <= bound:
+                buckets[i] += 1
+        buckets[-2] += 1
+        buckets[-1] += value
+    
+    def value(self, name: str, **labels: Any) -> float:
+        return self._values.get((name, self._label_key(labels)), 0.0)
+    
+    def total(self, name: str) -> float:
+        """➕ Suma de una métrica sobre todas sus combinaciones de etiquetas"""
+        return sum(value for (metric, _), value in self._values.items() if metric == name)
+    
+    def render(self) -> str:
+        """📜 Serializa todas las métricas en el formato de texto de Prometheus"""
+        lines = []
+        for name, (metric_type, help_text) in self.DEFINITIONS.items():
+            full_name = f"{self.NAMESPACE}_{name}"
+            series = [(labels, value) for (metric, labels), value in self._values.items() if metric == name]
+            histograms = [(labels, b) for (metric, labels), b in self._histograms.items() if metric == name]
+            if not series and not histograms:
+                continue
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {metric_type}")
+            for labels, value in sorted(series):
+                lines.append(f"{full_name}{self._format_labels(labels)} {self._format_value(value)}")
+            for labels, buckets in sorted(histograms):
+                for bound, count in zip(self.LATENCY_BUCKETS, buckets):
+                    bucket_labels = labels + (("le", f"{bound:g}"),)
+                    lines.append(f"{full_name}_bucket{self._format_labels(bucket_labels)} {self._format_value(count)}")
+                lines.append(f"{full_name}_bucket{self._format_labels(labels + (('le', '+Inf'),))} {self._format_value(buckets[-2])}")
+                lines.append(f"{full_name}_count{self._format_labels(labels)} {self._format_value(buckets[-2])}")
+                lines.append(f"{full_name}_sum{self._format_labels(labels)} {self._format_value(buckets[-1])}")
+        return "\n".join(lines) + "\n"
+    
+    def write_textfile(self, path: str) -> None:
+        """💾 Escribe las métricas de forma atómica (textfile collector de node_exporter)"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(temp_path, path)
+    
+    async def push(self, gateway_url: str, job: str = "cosmic_kanban_sync") -> None:
+        """📤 Envía las métricas a un Prometheus Pushgateway"""
+        url = f"{gateway_url.rstrip('/')}/metrics/job/{job}"
+        async with aiohttp.ClientSession() as session:
+            async with session.put(url, data=self.render().encode("utf-8"),
+                                   headers={"Content-Type": "text/plain; version=0.0.4"}) as response:
+                if response.status >= 400:
+                    logger.warning(f"⚠️ Pushgateway respondió {response.status}: {await response.text()}")
+    
+    async def serve(self, host: str = "127.0.0.1", port: int = 9464) -> "aiohttp.web.AppRunner":
+        """🌐 Expone `/metrics` en un servidor HTTP local; retorna el runner para detenerlo
+        
+        Por defecto solo escucha en loopback: las etiquetas incluyen datos del tablero.
+        """
+        from aiohttp import web
+        
+        async def handle_metrics(request):
+            return web.Response(text=self.render(), content_type="text/plain", charset="utf-8")
+        
+        app = web.Application()
+        app.router.add_get("/metrics", handle_metrics)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        logger.info(f"📈 Métricas disponibles en http://{host}:{port}/metrics")
+        return runner
+    
+    @staticmethod
+    def _label_key(labels: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+    
+    @staticmethod
+    def _format_value(value: float) -> str:
+        return str(int(value)) if float(value).is_integer() else repr(float(value))
+    
+    @staticmethod
+    def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+        if not labels:
+            return ""
+        escaped = (
+            f'{key}="{value.replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), chr(92) + "n")}"'
+            for key, value in labels
+        )
+        return "{" + ",".join(escaped) + "}"
 
-*"Cada línea de código es un acto de amor hacia la comunidad"*
-        """.strip()
+class CosmicBoardSnapshot:
+    """🗺️ Foto en memoria de los elementos del tablero
+    
+    Indexa los elementos por título, tag y columna para que la detección de
+    duplicados y la ubicación de tarjetas sean búsquedas O(1) contra el estado
+    real del tablero. Cada elemento guarda las claves bajo las que se indexó,
+    así quitarlo solo toca sus propios índices. Cada columna lleva su propio contador de filas, sembrado
+    con la fila más baja ocupada, así las tarjetas nuevas no se apilan sobre las
+    existentes entre ejecuciones.
+    """
+    
+    def __init__(self, column_positions: Dict[str, int], column_width: int = 350,
+                 first_row_y: int = 150, row_height: int = 220):
+        self.column_positions = column_positions
+        self.column_width = column_width
+        self.first_row_y = first_row_y
+        self.row_height = row_height
+        self.loaded = False
+        
+        self.items: Dict[str, Dict[str, Any]] = {}
+        self.by_title: Dict[str, str] = {}
+        self.by_tag: Dict[str, Set[str]] = defaultdict(set)
+        self.by_column: Dict[str, Set[str]] = defaultdict(set)
+        # item_id -> (tags, columna) bajo los que quedó indexado
+        self._index_keys: Dict[str, Tuple[Tuple[str, ...], Optional[str]]] = {}
+        self._next_row: Dict[str, int] = defaultdict(int)
+    
+    def __len__(self) -> int:
+        return len(self.items)
+    
+    def add(self, item: Dict[str, Any]) -> None:
+        """➕ Indexa (o reindexa) un elemento del tablero"""
+        item_id = item.get("id")
+        if not item_id:
+            return
+        if item_id in self.items:
+            self.remove(item_id)
+        self.items[item_id] = item
+        
+        title = self._title_of(item)
+        if title:
+            self.by_title.setdefault(title, item_id)
+        tags = tuple(tag for tag in item.get("tags") or item.get("tagIds") or [] if isinstance(tag, str))
+        for tag in tags:
+            self.by_tag[tag].add(item_id)
+        
+        column = None
+        if item.get("type", "card") == "card":
+            column = self.column_of(item)
+            if column:
+                self.by_column[column].add(item_id)
+                row = self._row_of(item)
+                if row is not None and row >= self._next_row[column]:
+                    self._next_row[column] = row + 1
+        self._index_keys[item_id] = (tags, column)
+    
+    def remove(self, item_id: str) -> None:
+        """➖ Quita un elemento de todos los índices"""
+        item = self.items.pop(item_id, None)
+        if item is None:
+            return
+        title = self._title_of(item)
+        if title and self.by_title.get(title) == item_id:
+            del self.by_title[title]
+        tags, column = self._index_keys.pop(item_id)
+        for tag in tags:
+            self.by_tag[tag].discard(item_id)
+        if column:
+            self.by_column[column].discard(item_id)
+    
+    def find_by_title(self, title: str) -> Optional[str]:
+        return self.by_title.get(title)
+    
+    def items_with_tag(self, tag: str) -> Set[str]:
+        return self.by_tag.get(tag, set())
+    
+    def column_of(self, item: Dict[str, Any]) -> Optional[str]:
+        """🧭 Columna (status) cuya franja horizontal contiene al elemento"""
+        x = (item.get("position") or {}).get("x")
+        if x is None:
+            return None
+        for status, column_x in self.column_positions.items():
+            if abs(x - column_x) <= self.column_width / 2:
+                return status
+        return None
+    
+    def allocate_row(self, status: str) -> int:
+        """📍 Reserva la siguiente fila libre de la columna"""
+        row = self._next_row[status]
+        self._next_row[status] = row + 1
+        return row
+    
+    def _row_of(self, item: Dict[str, Any]) -> Optional[int]:
+        y = (item.get("position") or {}).get("y")
+        if y is None:
+            return None
+        return round((y - self.first_row_y) / self.row_height)
+    
+    @staticmethod
+    def _title_of(item: Dict[str, Any]) -> Optional[str]:
+        data = item.get("data") or {}
+        return data.get("title") or data.get("content")
 
 class CosmicKanbanAPI:
     """🌌 API Cósmica para sincronización con Miro"""
     
-    def __init__(self, access_token: str, board_id: str):
+    # Estados que se pueden reintentar sin riesgo de duplicar un POST: el servidor
+    # rechazó la petición antes de procesarla. 502/504 no lo garantizan (el upstream
+    # pudo crear el elemento), igual que un timeout, así que no se reintentan
+    RETRYABLE_POST_STATUSES = {429, 503}
+    
+    PENDING_JOURNAL_MESSAGE = ("La sincronización anterior quedó interrumpida: usa --resume para "
+                               "reanudarla sin duplicar tarjetas o --discard-journal para descartar su diario")
+    
+    # Máximo de elementos que Miro acepta por petición bulk
+    MAX_BULK_CHUNK_SIZE = 20
+    
+    # Coordenada x de cada columna del flujo cósmico, por status
+    COLUMN_POSITIONS = {
+        "Backlog Cósmico": 100,
+        "En Proceso de Alquimia": 450,
+        "En Revisión de Calidad": 800,
+        "Manifestado": 1150
+    }
+    
+    def __init__(self, access_token: str, board_id: str,
+                 max_concurrency: int = 8,
+                 base_url: str = "https://api.miro.com/v2",
+                 rate_limit: float = 8.0,
+                 max_retries: int = 5,
+                 bulk_mode: bool = True,
+                 bulk_chunk_size: int = 10,
+                 state: Optional[CosmicSyncState] = None,
+                 journal: Optional[CosmicSyncJournal] = None,
+                 trace_configs: Optional[List["aiohttp.TraceConfig"]] = None,
+                 queue_size: Optional[int] = None,
+                 board_snapshot: bool = True,
+                 metrics: Optional[CosmicSyncMetrics] = None,
+                 item_log_sample_rate: float = 1.0):
         self.access_token = access_token
         self.board_id = board_id
-        self.base_url = "https://api.miro.com/v2"
+        self.base_url = base_url
         self.headers = {
             "Authorization": f"Bearer {access_token}",
             "Content-Type": "application/json"
         }
         
+        # 🔌 Sesión HTTP persistente (pool de conexiones keep-alive)
+        self.max_concurrency = max(1, max_concurrency)
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._trace_configs = trace_configs
+        
+        # ⏳ Limitador de tasa compartido y política de reintentos
+        self.rate_limiter = CosmicRateLimiter(rate=rate_limit, burst=self.max_concurrency)
+        self.max_retries = max_retries
+        
+        # 📦 Creación en bulk: N elementos por petición
+        self.bulk_mode = bulk_mode
+        self.bulk_chunk_size = min(max(1, bulk_chunk_size), self.MAX_BULK_CHUNK_SIZE)
+        
+        # 📈 Métricas de peticiones, reintentos, esperas y throughput
+        self.metrics = metrics or CosmicSyncMetrics()
+        
+        # 📝 Fracción de tarjetas que dejan un registro individual (muestreo determinista)
+        self.item_log_sample_rate = min(max(0.0, item_log_sample_rate), 1.0)
+        
+        # 🗺️ Foto del tablero para ubicar tarjetas y detectar duplicados
+        self.board_snapshot = board_snapshot
+        self.snapshot = CosmicBoardSnapshot(self.COLUMN_POSITIONS)
+        
+        # 🚰 Tarjetas construidas en espera de envío (backpressure del pipeline)
+        self.queue_size = queue_size or self.max_concurrency * self.bulk_chunk_size * 4
+        
+        # 🗄️ Estado local opcional para sincronización incremental
+        self.state = state
+        
+        # 📜 Diario write-ahead opcional para reanudar sincronizaciones interrumpidas
+        self.journal = journal
+        
         # 🗂️ Columnas del Tablero Cósmico
         self.cosmic_columns = {
             "backlog": "🌌 Backlog Cósmico - Semillas de Transformación",
@@ -136,16 +874,52 @@ class CosmicKanbanAPI:
             "manifested": "✨ Manifestado - Irradiando en el Mundo"
         }
     
+    async def __aenter__(self) -> "CosmicKanbanAPI":
+        await self.open()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+    
+    async def open(self) -> None:
+        """🔌 Abre la sesión HTTP compartida con un pool de conexiones acotado"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_concurrency,
+                limit_per_host=self.max_concurrency,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=30),
+                trace_configs=self._trace_configs
+            )
+    
+    async def close(self) -> None:
+        """🔒 Cierra la sesión HTTP y libera las conexiones del pool"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
     async def create_cosmic_board_structure(self) -> Dict[str, Any]:
         """🏗️ Crea la estructura base del Tablero Kanban Cósmico"""
         logger.info("🌟 Creando estructura del Tablero Kanban Cósmico...")
         
         try:
-            # Crear columnas del flujo cósmico
+            if self.board_snapshot and not self.snapshot.loaded:
+                await self.load_board_snapshot()
+            
+            # Crear columnas del flujo cósmico (omitiendo las que ya existen en el tablero)
+            existing_columns = self.state.load_columns(self.board_id) if self.state else {}
             columns_data = []
+            column_keys = []
             x_position = 100
             
             for key, title in self.cosmic_columns.items():
+                if key in existing_columns or self.snapshot.find_by_title(f"<p><strong>{title}</strong></p>"):
+                    x_position += 350
+                    continue
                 column_data = {
                     "type": "shape",
                     "data": {
@@ -162,10 +936,18 @@ class CosmicKanbanAPI:
                     "size": {"width": 300, "height": 80}
                 }
                 columns_data.append(column_data)
+                column_keys.append(key)
                 x_position += 350
             
             # Crear las columnas en Miro
-            response = await self._batch_create_items(columns_data)
+            response = await self._batch_create_items(columns_data) if columns_data else []
+            for item in response:
+                self.snapshot.add(item)
+            if self.state:
+                for key, item in zip(column_keys, response):
+                    if item.get("id"):
+                        self.state.save_column(self.board_id, key, item["id"])
+                self.state.commit()
             logger.info(f"✅ Estructura del tablero creada exitosamente: {len(columns_data)} columnas")
             
             return {
@@ -178,9 +960,31 @@ class CosmicKanbanAPI:
             logger.error(f"❌ Error creando estructura del tablero: {str(e)}")
             return {"success": False, "error": str(e)}
     
-    async def sync_cosmic_tasks(self, tasks: List[CosmicTask]) -> Dict[str, Any]:
-        """🔄 Sincroniza tareas cósmicas con el tablero Miro"""
-        logger.info(f"🌟 Sincronizando {len(tasks)} tareas cósmicas...")
+    async def sync_cosmic_tasks(self, tasks: Union[Iterable[CosmicTask], AsyncIterable[CosmicTask]],
+                                delete_removed: bool = False,
+                                resume: bool = False,
+                                invalid_records: Optional[List[str]] = None,
+                                discard_journal: bool = False) -> Dict[str, Any]:
+        """🔄 Sincroniza tareas cósmicas con el tablero Miro
+        
+        Acepta cualquier iterable (síncrono o asíncrono) de tareas y las procesa en
+        un pipeline acotado: el productor consume la fuente y construye el payload
+        de cada tarjeta, y los emisores lo envían a Miro. La cola entre ambas etapas
+        aplica backpressure, así que la memoria no crece con el tamaño del backlog.
+        
+        Con estado local solo se crean las tarjetas nuevas, se actualizan las que
+        cambiaron y, si `delete_removed` es True, se eliminan las que ya no existen.
+        `invalid_records` es la lista que la fuente llena con los registros que no pudo
+        leer: si al terminar tiene alguno no se elimina nada, porque la tarea de un
+        registro ilegible no está ausente, solo mal escrita. Con `resume` se reproduce el diario de una ejecución interrumpida antes de
+        continuar, de modo que el trabajo ya completado no se repite; si el diario
+        tiene una ejecución interrumpida, hay que pedir `resume` o `discard_journal`
+        (el diario es el único registro de las tarjetas que quedaron en vuelo).
+        """
+        if hasattr(tasks, "__len__"):
+            logger.info(f"🌟 Sincronizando {len(tasks)} tareas cósmicas...")
+        else:
+            logger.info("🌟 Sincronizando tareas cósmicas desde una fuente en streaming...")
         
         results = {
             "success": 0,
@@ -188,32 +992,451 @@ class CosmicKanbanAPI:
             "errors": []
         }
         
-        for task in tasks:
-            try:
-                # Determinar posición en columna según status
-                position = self._calculate_card_position(task.status, results["success"])
-                
-                # Crear tarjeta Miro
-                card_data = task.to_miro_card()
-                card_data["position"] = position
-                
-                response = await self._create_miro_item(card_data)
-                
-                if response.get("id"):
-                    results["success"] += 1
-                    logger.info(f"✅ Tarea sincronizada: {task.title}")
-                else:
-                    results["failed"] += 1
-                    results["errors"].append(f"Error creando {task.title}: {response}")
+        completed_keys: Set[str] = set()
+        if self.journal:
+            if resume:
+                completed_keys = await self._replay_journal()
+                results["resumed"] = len(completed_keys)
+            elif self.journal.has_pending():
+                if not discard_journal:
+                    raise RuntimeError(self.PENDING_JOURNAL_MESSAGE)
+                logger.warning("⚠️ Descartando el diario de la sincronización interrumpida (--discard-journal)")
+            self.journal.begin(self.board_id, resume=resume)
+        
+        if self.board_snapshot:
+            if not self.snapshot.loaded:
+                await self.load_board_snapshot()
+            results["adopted"] = 0
+        
+        known_cards: Dict[str, Tuple[str, str, Optional[str]]] = {}
+        if self.state:
+            known_cards = self.state.load_cards(self.board_id)
+            results.update({"created": 0, "updated": 0, "unchanged": 0, "deleted": 0})
+        
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        seen_keys: Set[str] = set()
+        started = time.perf_counter()
+        
+        async def produce() -> None:
+            async for task in self._iterate_tasks(tasks):
+                try:
+                    key = task.task_key()
+                    if key in seen_keys:
+                        continue
+                    seen_keys.add(key)
                     
-            except Exception as e:
-                results["failed"] += 1
-                results["errors"].append(f"Error procesando {task.title}: {str(e)}")
-                logger.error(f"❌ Error sincronizando tarea {task.title}: {str(e)}")
+                    known = known_cards.get(key)
+                    if known is None:
+                        # Tarjeta ya presente en el tablero (p. ej. creada por otra ejecución)
+                        existing_id = self.snapshot.find_by_title(task.to_miro_card()["data"]["title"])
+                        if existing_id and self.board_snapshot:
+                            results["adopted"] += 1
+                            self.metrics.inc("items_total", outcome="adopted")
+                            if self.state is None:
+                                results["success"] += 1
+                                continue
+                            known = (existing_id, None, task.status)
+                    
+                    if self.state is None:
+                        if key in completed_keys:
+                            results["success"] += 1
+                            self.metrics.inc("items_total", outcome="resumed")
+                            continue
+                        card_data = self._build_task_card(task, self._allocate_position(task.status))
+                        await queue.put(("create", task, card_data, None))
+                        self.metrics.set_gauge("queue_depth", queue.qsize())
+                        continue
+                    
+                    content_hash = task.content_hash()
+                    if known is None:
+                        card_data = self._build_task_card(task, self._allocate_position(task.status))
+                        await queue.put(("create", task, card_data, content_hash))
+                        self.metrics.set_gauge("queue_depth", queue.qsize())
+                    elif known[1] != content_hash:
+                        # Solo se mueve la tarjeta si cambió de columna
+                        moved = known[2] != task.status
+                        position = self._allocate_position(task.status) if moved else None
+                        card_data = self._build_task_card(task, position)
+                        await queue.put(("update", task, card_data, content_hash, known[0]))
+                        self.metrics.set_gauge("queue_depth", queue.qsize())
+                    else:
+                        results["success"] += 1
+                        results["unchanged"] += 1
+                        self.metrics.inc("items_total", outcome="unchanged")
+                except Exception as e:
+                    self._record_task_exception(results, task, e)
+        
+        async def send() -> None:
+            while True:
+                work = await queue.get()
+                self.metrics.set_gauge("queue_depth", queue.qsize())
+                if work is None:
+                    return
+                if work[0] == "update":
+                    await self._send_update(work, results)
+                    continue
+                
+                batch = [work]
+                if self.bulk_mode:
+                    # Agrupar las creaciones que ya esperan en la cola en un chunk bulk
+                    while len(batch) < self.bulk_chunk_size:
+                        try:
+                            extra = queue.get_nowait()
+                        except asyncio.QueueEmpty:
+                            break
+                        if extra is None or extra[0] == "update":
+                            queue.put_nowait(extra)
+                            break
+                        batch.append(extra)
+                await self._send_creates(batch, results)
+        
+        async def produce_and_stop() -> None:
+            await produce()
+            for _ in senders:
+                await queue.put(None)
+        
+        senders = [asyncio.create_task(send()) for _ in range(self.max_concurrency)]
+        workers = senders + [asyncio.create_task(produce_and_stop())]
+        try:
+            # Productor y emisores juntos: si un emisor muere (p. ej. disco lleno al escribir
+            # el diario) el error se propaga en vez de dejar al productor bloqueado en la cola
+            await asyncio.gather(*workers)
+            
+            if self.state and delete_removed and invalid_records:
+                message = (f"{len(invalid_records)} registros inválidos en la fuente: "
+                           f"no se eliminan tarjetas en esta sincronización")
+                logger.warning(f"⚠️ {message}")
+                results["errors"].append(message)
+            elif self.state and delete_removed:
+                removed = [(key, item_id) for key, (item_id, _, _) in known_cards.items() if key not in seen_keys]
+                await asyncio.gather(*(self._delete_removed_card(key, item_id, results)
+                                       for key, item_id in removed))
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            if self.state:
+                self.state.commit()
+        
+        if self.journal:
+            self.journal.checkpoint()
+        
+        elapsed = time.perf_counter() - started
+        self.metrics.set_gauge("queue_depth", 0)
+        self.metrics.set_gauge("sync_duration_seconds", elapsed)
+        self.metrics.set_gauge("sync_items_per_second", results["success"] / elapsed if elapsed else 0.0)
+        self.metrics.set_gauge("last_sync_timestamp_seconds", time.time())
         
         logger.info(f"🌟 Sincronización completada: {results['success']} exitosas, {results['failed']} fallidas")
         return results
     
+    async def pull_board_changes(self, tasks_file: Optional[str] = None) -> Dict[str, Any]:
+        """📥 Trae del tablero los cambios de columna hechos a mano (sincronización inversa)
+        
+        Lista las tarjetas con una petición condicional (If-None-Match con el ETag del
+        sondeo anterior e If-Modified-Since con la marca de agua); si el tablero no
+        cambió, el sondeo cuesta una sola respuesta 304. Si cambió, solo se procesan
+        las tarjetas con `modifiedAt` posterior a la marca de agua: su posición x se
+        traduce a la columna de `cosmic_columns` y el status se actualiza en el sitio
+        en el estado local y, si se indica, en el archivo JSONL de tareas.
+        """
+        results = {"not_modified": False, "scanned": 0, "changed": 0, "updated_tasks": 0}
+        if self.state is None:
+            logger.warning("⚠️ El modo pull necesita estado local (SYNC_STATE_DB) para relacionar tarjetas y tareas")
+            return results
+        
+        etag, watermark = self.state.load_pull_cursor(self.board_id)
+        index = self.state.load_item_index(self.board_id)
+        newest = watermark
+        new_etag = None
+        moves: Dict[str, Tuple[str, Optional[str], Optional[str]]] = {}
+        
+        cursor = None
+        while True:
+            query = {"type": "card", "limit": 50}
+            headers = {}
+            if cursor:
+                query["cursor"] = cursor
+            else:
+                if etag:
+                    headers["If-None-Match"] = etag
+                if watermark:
+                    headers["If-Modified-Since"] = format_datetime(
+                        datetime.fromisoformat(watermark.replace("Z", "+00:00")), usegmt=True)
+            meta: Dict[str, Any] = {}
+            response = await self._request("GET", f"/boards/{self.board_id}/items?{urlencode(query)}",
+                                           headers=headers, response_meta=meta)
+            if meta.get("status") == 304:
+                results["not_modified"] = True
+                logger.info("📥 Tablero sin cambios desde el último sondeo")
+                return results
+            if self._is_error_response(response):
+                # Sin avanzar el cursor: el siguiente sondeo repite el intervalo
+                logger.warning(f"⚠️ No se pudo sondear el tablero: {response}")
+                results["error"] = response
+                return results
+            if not cursor:
+                new_etag = meta["headers"].get("ETag")
+            
+            for item in response.get("data") or []:
+                results["scanned"] += 1
+                modified_at = item.get("modifiedAt")
+                # `<` y no `<=`: cambios en el mismo instante que la marca se re-evalúan sin coste
+                if watermark and modified_at and modified_at < watermark:
+                    continue
+                if modified_at and (newest is None or modified_at > newest):
+                    newest = modified_at
+                if self.snapshot.loaded:
+                    self.snapshot.add(item)
+                known = index.get(item.get("id"))
+                status = self.snapshot.column_of(item)
+                if known and status and status != known[2]:
+                    moves[known[0]] = (status, known[1], known[2])
+            cursor = response.get("cursor")
+            if not cursor:
+                break
+        
+        # Aplicar los movimientos al almacén local de tareas
+        updated_hashes: Dict[str, str] = {}
+        if moves and tasks_file:
+            updated_hashes = await asyncio.to_thread(
+                CosmicTaskSource.update_statuses, tasks_file, moves)
+            results["updated_tasks"] = len(updated_hashes)
+        for key, (status, _, previous) in moves.items():
+            self.state.update_card_status(self.board_id, key, status, updated_hashes.get(key))
+            self.metrics.inc("items_total", outcome="pulled")
+            logger.info(f"📥 Tarjeta movida en el tablero: {previous} → {status}")
+        results["changed"] = len(moves)
+        
+        self.state.save_pull_cursor(self.board_id, new_etag, newest)
+        self.state.commit()
+        logger.info(f"📥 Sondeo completado: {results['scanned']} tarjetas revisadas, "
+                    f"{results['changed']} cambios de columna")
+        return results
+    
+    @staticmethod
+    async def _iterate_tasks(tasks: Union[Iterable[CosmicTask], AsyncIterable[CosmicTask]]) -> AsyncIterator[CosmicTask]:
+        """🔁 Recorre de forma uniforme iterables síncronos y asíncronos"""
+        if hasattr(tasks, "__aiter__"):
+            async for task in tasks:
+                yield task
+        else:
+            for task in tasks:
+                yield task
+    
+    async def _send_creates(self, batch: List[Tuple], results: Dict[str, Any]) -> None:
+        """🃏 Crea las tarjetas de un lote (bulk o individual) y registra cada resultado"""
+        for _, task, card_data, _ in batch:
+            self._journal_intent("create", task, card_data)
+        
+        cards = [card_data for _, _, card_data, _ in batch]
+        try:
+            if len(cards) > 1:
+                responses = await self._create_chunk(cards)
+            else:
+                responses = [await self._create_miro_item(cards[0])]
+        except Exception as e:
+            for _, task, _, _ in batch:
+                self._journal_outcome("create", task.task_key(), {})
+                self._record_task_exception(results, task, e)
+            return
+        
+        for (_, task, _, content_hash), response in zip(batch, responses):
+            key = task.task_key()
+            self._journal_outcome("create", key, response)
+            self._record_task_result(results, task, response)
+            self.snapshot.add(response)
+            if self.state and response.get("id"):
+                results["created"] += 1
+                self.state.save_card(self.board_id, key, response["id"], content_hash, task.status)
+    
+    async def _send_update(self, work: Tuple, results: Dict[str, Any]) -> None:
+        """✏️ Actualiza la tarjeta de una tarea que cambió desde la última sincronización"""
+        _, task, card_data, content_hash, item_id = work
+        key = task.task_key()
+        try:
+            self._journal_intent("update", task, card_data, item_id=item_id)
+            response = await self._update_miro_item(item_id, card_data)
+            self._journal_outcome("update", key, response)
+            self._record_task_result(results, task, response)
+            if response.get("id"):
+                results["updated"] += 1
+                self.snapshot.add(response)
+                self.state.save_card(self.board_id, key, item_id, content_hash, task.status)
+        except Exception as e:
+            self._record_task_exception(results, task, e)
+    
+    async def _delete_removed_card(self, key: str, item_id: str, results: Dict[str, Any]) -> None:
+        """🗑️ Elimina la tarjeta de una tarea que ya no existe en la fuente"""
+        if self.journal:
+            self.journal.record_intent("delete", key, item_id=item_id)
+        try:
+            response = await self._delete_miro_item(item_id)
+        except Exception as e:
+            # Igual que en las actualizaciones: el fallo queda en `results` sin abortar la sincronización
+            response = {"status": None, "message": str(e)}
+            logger.error(f"❌ Error eliminando tarjeta {item_id}: {e}")
+        if self._is_error_response(response) and response.get("status") != 404:
+            if self.journal:
+                self.journal.record_failed("delete", key)
+            self.metrics.inc("items_total", outcome="failed")
+            results["errors"].append(f"Error eliminando {item_id}: {response}")
+            return
+        if self.journal:
+            self.journal.record_done("delete", key, item_id)
+        results["deleted"] += 1
+        self.metrics.inc("items_total", outcome="deleted")
+        self.snapshot.remove(item_id)
+        self.state.delete_card(self.board_id, key)
+    
+    def _journal_intent(self, action: str, task: CosmicTask, card_data: Dict[str, Any],
+                        item_id: Optional[str] = None) -> None:
+        """📜 Registra en el diario la intención de escribir la tarjeta de una tarea"""
+        if self.journal:
+            self.journal.record_intent(
+                action, task.task_key(),
+                title=card_data["data"]["title"],
+                hash=task.content_hash(),
+                status=task.status,
+                item_id=item_id
+            )
+    
+    def _journal_outcome(self, action: str, key: str, response: Dict[str, Any]) -> None:
+        """📜 Registra en el diario si la escritura se completó"""
+        if not self.journal:
+            return
+        if response.get("id"):
+            self.journal.record_done(action, key, response["id"])
+        else:
+            self.journal.record_failed(action, key)
+    
+    async def _replay_journal(self) -> Set[str]:
+        """🔁 Aplica el diario de una ejecución interrumpida
+        
+        Las escrituras completadas se vuelcan al estado local; las creaciones que
+        quedaron en vuelo se buscan en el tablero por título para adoptarlas en vez
+        de duplicarlas. Las actualizaciones y eliminaciones en vuelo se repiten,
+        ya que son idempotentes. Retorna las claves cuyo trabajo ya está hecho.
+        """
+        entries = self.journal.replay(self.board_id)
+        completed: Set[str] = set()
+        in_flight: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        
+        for key, entry in entries.items():
+            if entry["phase"] == "done":
+                completed.add(key)
+                self._apply_journal_entry(key, entry)
+            elif entry["phase"] == "in_flight" and entry["action"] == "create":
+                in_flight[entry["title"]] = (key, entry)
+        
+        adopted = 0
+        if in_flight:
+            found = await self._find_cards_by_title(set(in_flight))
+            for title, item_id in found.items():
+                key, entry = in_flight[title]
+                entry["item_id"] = item_id
+                completed.add(key)
+                self._apply_journal_entry(key, entry)
+                adopted += 1
+        
+        if self.state:
+            self.state.commit()
+        logger.info(f"🔁 Diario reproducido: {len(completed)} completadas, "
+                    f"{adopted}/{len(in_flight)} creaciones en vuelo reconciliadas")
+        return completed
+    
+    def _apply_journal_entry(self, key: str, entry: Dict[str, Any]) -> None:
+        """🗄️ Vuelca una escritura completada del diario al estado local"""
+        if not self.state:
+            return
+        if entry["action"] == "delete":
+            self.state.delete_card(self.board_id, key)
+        elif entry.get("item_id"):
+            self.state.save_card(self.board_id, key, entry["item_id"], entry["hash"], entry.get("status"))
+    
+    async def load_board_snapshot(self, item_types: Tuple[str, ...] = ("card", "shape")) -> CosmicBoardSnapshot:
+        """🗺️ Descarga los elementos del tablero y construye su índice en memoria
+        
+        La paginación por cursor de Miro es secuencial dentro de cada listado, así
+        que se recorren en paralelo los listados de cada tipo de elemento.
+        """
+        snapshot = CosmicBoardSnapshot(self.COLUMN_POSITIONS)
+        
+        async def fetch_type(item_type: str) -> bool:
+            cursor = None
+            while True:
+                query = {"type": item_type, "limit": 50}
+                if cursor:
+                    query["cursor"] = cursor
+                response = await self._request("GET", f"/boards/{self.board_id}/items?{urlencode(query)}")
+                if self._is_error_response(response):
+                    logger.warning(f"⚠️ No se pudo listar los elementos '{item_type}' del tablero: {response}")
+                    return False
+                for item in response.get("data") or []:
+                    snapshot.add(item)
+                cursor = response.get("cursor")
+                if not cursor:
+                    return True
+        
+        completed = await asyncio.gather(*(fetch_type(item_type) for item_type in item_types))
+        snapshot.loaded = all(completed)
+        self.snapshot = snapshot
+        logger.info(f"🗺️ Foto del tablero cargada: {len(snapshot)} elementos")
+        return snapshot
+    
+    async def _find_cards_by_title(self, titles: Set[str]) -> Dict[str, str]:
+        """🔎 Busca en la foto del tablero las tarjetas con los títulos dados"""
+        if not self.snapshot.loaded:
+            await self.load_board_snapshot()
+        found = {title: self.snapshot.find_by_title(title) for title in titles}
+        return {title: item_id for title, item_id in found.items() if item_id}
+    
+    def _build_task_card(self, task: CosmicTask, position: Optional[Dict[str, int]]) -> Dict[str, Any]:
+        """🎴 Construye el payload de la tarjeta; sin `position` la tarjeta no se mueve"""
+        card_data = task.to_miro_card()
+        if position is not None:
+            card_data["position"] = position
+        return card_data
+    
+    def _allocate_position(self, status: str) -> Dict[str, int]:
+        """📍 Reserva la siguiente fila libre de la columna del status"""
+        column = status if status in self.COLUMN_POSITIONS else "Backlog Cósmico"
+        return self._calculate_card_position(column, self.snapshot.allocate_row(column))
+    
+    def _record_task_result(self, results: Dict[str, Any], task: CosmicTask, response: Dict[str, Any]) -> None:
+        """🧾 Registra en `results` el resultado de crear la tarjeta de una tarea"""
+        if response.get("id"):
+            results["success"] += 1
+            self.metrics.inc("items_total", outcome="synced")
+            self._log_item(task, "synced", f"✅ Tarea sincronizada: {task.title}", item_id=response["id"])
+        else:
+            results["failed"] += 1
+            self.metrics.inc("items_total", outcome="failed")
+            results["errors"].append(f"Error creando {task.title}: {response}")
+    
+    def _log_item(self, task: CosmicTask, event: str, message: str, **fields: Any) -> None:
+        """📝 Registro por tarjeta, muestreado y con campos estructurados (`extra["item"]`)
+        
+        El muestreo se decide por la clave de la tarea, así una misma tarjeta queda
+        registrada (o no) de forma consistente entre ejecuciones.
+        """
+        if self.item_log_sample_rate <= 0.0 or not logger.isEnabledFor(logging.INFO):
+            return
+        key = task.task_key()
+        if self.item_log_sample_rate < 1.0 and int(key[:8], 16) / 0xFFFFFFFF >= self.item_log_sample_rate:
+            return
+        item = {"event": event, "task_key": key, "title": task.title,
+                "status": task.status, "element": task.element.value["name"],
+                "guardian": task.guardian.name, **fields}
+        logger.info(message, extra={"item": item})
+    
+    def _record_task_exception(self, results: Dict[str, Any], task: CosmicTask, error: Exception) -> None:
+        """🧾 Registra en `results` una excepción al procesar una tarea"""
+        results["failed"] += 1
+        self.metrics.inc("items_total", outcome="failed")
+        results["errors"].append(f"Error procesando {task.title}: {str(error)}")
+        logger.error(f"❌ Error sincronizando tarea {task.title}: {str(error)}")
+    
     def _get_column_color(self, column_key: str) -> str:
         """🎨 Retorna el color cósmico para cada columna"""
         colors = {
@@ -225,37 +1448,186 @@ class CosmicKanbanAPI:
         return colors.get(column_key, "#F8F9FA")
     
     def _calculate_card_position(self, status: str, card_index: int) -> Dict[str, int]:
-        """📍 Calcula la posición de una tarjeta según su status"""
-        column_positions = {
-            "Backlog Cósmico": 100,
-            "En Proceso de Alquimia": 450,
-            "En Revisión de Calidad": 800,
-            "Manifestado": 1150
-        }
-        
-        base_x = column_positions.get(status, 100)
+        """📍 Calcula la posición de una tarjeta según su status y su fila en la columna"""
+        base_x = self.COLUMN_POSITIONS.get(status, 100)
         base_y = 150 + (card_index * 220)  # Espaciado vertical entre tarjetas
         
         return {"x": base_x, "y": base_y}
     
     async def _create_miro_item(self, item_data: Dict[str, Any]) -> Dict[str, Any]:
         """🔨 Crea un elemento en Miro"""
-        url = f"{self.base_url}/boards/{self.board_id}/items"
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=self.headers, json=item_data) as response:
-                return await response.json()
+        return await self._request("POST", f"/boards/{self.board_id}/items", item_data)
+    
+    async def _update_miro_item(self, item_id: str, item_data: Dict[str, Any]) -> Dict[str, Any]:
+        """✏️ Actualiza el contenido y la posición de un elemento existente"""
+        item_type = item_data.get("type", "card")
+        patch = {key: item_data[key] for key in ("data", "position") if key in item_data}
+        return await self._request("PATCH", f"/boards/{self.board_id}/{item_type}s/{item_id}", patch)
+    
+    async def _delete_miro_item(self, item_id: str) -> Dict[str, Any]:
+        """🗑️ Elimina un elemento del tablero"""
+        return await self._request("DELETE", f"/boards/{self.board_id}/items/{item_id}")
+    
+    @staticmethod
+    def _is_error_response(response: Dict[str, Any]) -> bool:
+        """🚨 _request marca las respuestas fallidas con su código de estado"""
+        return not response.get("id") and "status" in response
     
     async def _batch_create_items(self, items_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """📦 Crea múltiples elementos en batch"""
-        results = []
+        if self.bulk_mode:
+            return await self._bulk_create_items(items_data)
+        return list(await asyncio.gather(*(self._create_miro_item(item) for item in items_data)))
+    
+    async def _bulk_create_items(self, items_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """📦 Crea elementos en chunks vía el endpoint bulk de Miro
+        
+        Retorna una lista alineada con `items_data`: el elemento creado (con `id`)
+        o el error que impidió crearlo.
+        """
+        size = self.bulk_chunk_size
+        chunks = [items_data[i:i + size] for i in range(0, len(items_data), size)]
+        chunk_results = await asyncio.gather(*(self._create_chunk(chunk) for chunk in chunks))
+        return [result for results in chunk_results for result in results]
+    
+    async def _create_chunk(self, chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """🧩 Envía un chunk al endpoint bulk (todo o nada) y lo divide si Miro lo rechaza
         
-        for item_data in items_data:
-            result = await self._create_miro_item(item_data)
-            results.append(result)
-            await asyncio.sleep(0.5)  # Rate limiting respetuoso
+        Con 400/413/422 algún elemento es inválido o el chunk es demasiado grande:
+        se divide en mitades para aislarlo sin perder los demás. Cualquier otro fallo
+        (429/503 tras agotar los reintentos, un 5xx, o un 2xx con `data` inesperado)
+        se reporta como error de cada elemento sin reenviarlo: el servidor pudo haber
+        creado las tarjetas, y la siguiente sincronización (o `--resume`) las adopta
+        por título en vez de duplicarlas.
+        """
+        if len(chunk) == 1:
+            return [await self._create_miro_item(chunk[0])]
         
+        response = await self._request("POST", f"/boards/{self.board_id}/items/bulk", chunk)
+        results = self._split_bulk_response(response, len(chunk))
+        if all(result.get("id") for result in results):
+            return results
+        
+        if response.get("status") in (400, 413, 422):
+            mid = len(chunk) // 2
+            left, right = await asyncio.gather(self._create_chunk(chunk[:mid]),
+                                               self._create_chunk(chunk[mid:]))
+            return left + right
+        
+        logger.warning(f"⚠️ Chunk bulk fallido ({response.get('status')}): {len(chunk)} elementos sin confirmar")
         return results
+    
+    @staticmethod
+    def _split_bulk_response(response: Dict[str, Any], expected: int) -> List[Dict[str, Any]]:
+        """🔀 Reparte la respuesta bulk en un resultado por elemento enviado"""
+        items = response.get("data")
+        if isinstance(items, list) and len(items) == expected:
+            return [item if isinstance(item, dict) else {"message": str(item)} for item in items]
+        
+        error = {key: value for key, value in response.items() if key != "data"}
+        error.setdefault("message", "Respuesta bulk inesperada")
+        return [dict(error) for _ in range(expected)]
+    
+    async def _request(self, method: str, path: str,
+                       payload: Optional[Any] = None,
+                       headers: Optional[Dict[str, str]] = None,
+                       response_meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """🛰️ Ejecuta una petición a Miro respetando el rate limit y reintentando con backoff
+        
+        Los POST solo se reintentan cuando el servidor no llegó a procesarlos
+        (429/503 o fallo de conexión), para no duplicar elementos.
+        Si se pasa `response_meta`, se rellena con el status y las cabeceras de la
+        última respuesta (p. ej. para peticiones condicionales con ETag).
+        """
+        url = f"{self.base_url}{path}"
+        idempotent = method.upper() != "POST"
+        await self.open()
+        
+        for attempt in range(self.max_retries + 1):
+            waited = await self.rate_limiter.acquire()
+            if waited > 0:
+                self.metrics.inc("rate_limit_waits_total")
+                self.metrics.inc("rate_limit_wait_seconds_total", waited)
+            try:
+                async with self._semaphore:
+                    started = time.perf_counter()
+                    try:
+                        async with self._session.request(method, url, json=payload, headers=headers) as response:
+                            self.rate_limiter.update_from_headers(response.headers)
+                            status = response.status
+                            if response_meta is not None:
+                                response_meta["status"] = status
+                                response_meta["headers"] = response.headers
+                            retry_after = self._parse_retry_after(response.headers.get("Retry-After"))
+                            try:
+                                body = await response.json(content_type=None)
+                            except (json.JSONDecodeError, aiohttp.ContentTypeError):
+                                body = {"message": await response.text()}
+                    except (aiohttp.ClientError, asyncio.TimeoutError):
+                        self.metrics.inc("requests_total", method=method, status="error")
+                        raise
+                    finally:
+                        self.metrics.observe("request_duration_seconds", time.perf_counter() - started, method=method)
+                self.metrics.inc("requests_total", method=method, status=status)
+            except aiohttp.ClientConnectorError as e:
+                # La conexión nunca se estableció: reintentar es seguro incluso para POST
+                if attempt >= self.max_retries:
+                    raise
+                self.metrics.inc("retries_total", reason="connect")
+                delay = self._backoff_delay(attempt)
+                logger.warning(f"⚠️ Conexión fallida con Miro ({e}), reintentando en {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if not idempotent or attempt >= self.max_retries:
+                    raise
+                self.metrics.inc("retries_total", reason="network")
+                delay = self._backoff_delay(attempt)
+                logger.warning(f"⚠️ Error de red en {method} {path} ({e}), reintentando en {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            
+            if status < 400:
+                self.rate_limiter.on_success()
+                return body if isinstance(body, dict) else {"data": body}
+            
+            if status == 429:
+                self.rate_limiter.on_throttle(retry_after)
+            
+            retryable = status == 429 or status >= 500
+            if not idempotent:
+                retryable = status in self.RETRYABLE_POST_STATUSES
+            if not retryable or attempt >= self.max_retries:
+                if isinstance(body, dict):
+                    body.setdefault("status", status)
+                    return body
+                return {"status": status, "data": body}
+            
+            self.metrics.inc("retries_total", reason=status)
+            delay = retry_after if retry_after is not None else self._backoff_delay(attempt)
+            logger.warning(f"⏳ Miro respondió {status} en {method} {path}, reintento {attempt + 1}/{self.max_retries} en {delay:.2f}s")
+            await asyncio.sleep(delay)
+        
+        return {"status": None, "message": "Reintentos agotados"}
+    
+    @staticmethod
+    def _backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+        """🎲 Backoff exponencial con jitter completo"""
+        return random.uniform(0, min(cap, base * (2 ** attempt)))
+    
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """⏱️ Interpreta Retry-After en segundos o como fecha HTTP"""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
 
 class CosmicTaskGenerator:
     """🌟 Generador de Tareas Cósmicas basado en análisis del código"""
@@ -362,7 +1734,117 @@ class CosmicTaskGenerator:
             )
         ]
 
-async def main():
+class CosmicTaskSource:
+    """📂 Fuentes de tareas en archivo que producen `CosmicTask` de forma perezosa
+    
+    La lectura del disco se hace en un hilo para no bloquear el event loop; las
+    líneas o documentos inválidos se registran, se omiten y se añaden a `invalid`
+    (si se pasa), para que la sincronización no tome sus tareas por eliminadas.
+    """
+    
+    @staticmethod
+    def from_file(path: str, invalid: Optional[List[str]] = None) -> AsyncIterator[CosmicTask]:
+        """📂 Elige el lector según la extensión (.yaml/.yml; cualquier otra se lee como JSONL)"""
+        extension = os.path.splitext(path)[1].lower()
+        if extension in (".yaml", ".yml"):
+            return CosmicTaskSource.from_yaml(path, invalid)
+        return CosmicTaskSource.from_jsonl(path, invalid=invalid)
+    
+    @staticmethod
+    async def from_jsonl(path: str, read_bytes: int = 1 << 20,
+                         invalid: Optional[List[str]] = None) -> AsyncIterator[CosmicTask]:
+        """📜 Una tarea por línea JSON, leída en bloques de ~`read_bytes`"""
+        line_number = 0
+        with open(path, "r", encoding="utf-8") as f:
+            while True:
+                lines = await asyncio.to_thread(f.readlines, read_bytes)
+                if not lines:
+                    break
+                for line in lines:
+                    line_number += 1
+                    line = line.strip()
+                    if not line or line.startswith("#"):
+                        continue
+                    try:
+                        yield CosmicTask.from_dict(json.loads(line))
+                    except (ValueError, KeyError, TypeError) as e:
+                        logger.warning(f"⚠️ Línea {line_number} de {path} inválida: {e}")
+                        if invalid is not None:
+                            invalid.append(f"{path}:{line_number}")
+    
+    @staticmethod
+    async def from_yaml(path: str, invalid: Optional[List[str]] = None) -> AsyncIterator[CosmicTask]:
+        """📜 Tareas en YAML; cada documento (`---`) es una tarea o una lista de tareas
+        
+        Para backlogs grandes conviene un documento por tarea: los documentos se
+        parsean de uno en uno, mientras que una lista única se carga completa.
+        """
+        import yaml  # Dependencia opcional: solo necesaria para fuentes YAML
+        
+        end = object()
+        with open(path, "r", encoding="utf-8") as f:
+            documents = yaml.safe_load_all(f)
+            while True:
+                document = await asyncio.to_thread(next, documents, end)
+                if document is end:
+                    break
+                records = document if isinstance(document, list) else [document]
+                for record in records:
+                    if record is None:
+                        continue
+                    try:
+                        yield CosmicTask.from_dict(record)
+                    except (ValueError, KeyError, TypeError, AttributeError) as e:
+                        logger.warning(f"⚠️ Tarea inválida en {path}: {e}")
+                        if invalid is not None:
+                            invalid.append(f"{path}: {record!r:.80}")
+    
+    @staticmethod
+    def update_statuses(path: str,
+                        moves: Dict[str, Tuple[str, Optional[str], Optional[str]]]) -> Dict[str, Optional[str]]:
+        """✏️ Reescribe en el sitio el status de las tareas movidas en el tablero (solo JSONL)
+        
+        `moves` es {task_key: (status_nuevo, hash_en_estado, status_anterior)}. Las
+        líneas no afectadas se copian tal cual y el archivo se reemplaza de forma
+        atómica. Retorna {task_key: hash_nuevo} de las tareas reescritas: si el hash del
+        estado correspondía al contenido del archivo se recalcula con el nuevo status,
+        para que el siguiente push no las vuelva a escribir; si el archivo tenía
+        cambios pendientes el hash es None y el estado conserva el anterior.
+        """
+        if os.path.splitext(path)[1].lower() in (".yaml", ".yml"):
+            logger.warning(f"⚠️ {path} es YAML: los cambios de columna solo se guardan en el estado local")
+            return {}
+        
+        new_hashes: Dict[str, Optional[str]] = {}
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(path, "r", encoding="utf-8") as source, open(temp_path, "w", encoding="utf-8") as target:
+                for line in source:
+                    stripped = line.strip()
+                    if stripped and not stripped.startswith("#"):
+                        try:
+                            record = json.loads(stripped)
+                            task = CosmicTask.from_dict(record)
+                        except (ValueError, KeyError, TypeError):
+                            task = None
+                        move = moves.get(task.task_key()) if task else None
+                        if move:
+                            status, state_hash, _ = move
+                            in_sync = state_hash == task.content_hash()
+                            new_hashes[task.task_key()] = _hash_miro_card(task.content_key(), status) if in_sync else None
+                            record["status"] = status
+                            line = json.dumps(record, ensure_ascii=False) + "\n"
+                    target.write(line)
+            os.replace(temp_path, path)
+        finally:
+            # Si algo falló antes del reemplazo, no dejar el temporal junto al archivo de tareas
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+        return new_hashes
+
+async def main(resume: bool = False, tasks_file: Optional[str] = None,
+               pull: bool = False, poll_interval: Optional[float] = None,
+               discard_journal: bool = False):
     """🌟 Función principal para orquestar la sincronización cósmica"""
     logger.info("🌟 Iniciando sincronización del Tablero Kanban Cósmico...")
     
@@ -374,29 +1856,114 @@ async def main():
         logger.error("❌ Variables de entorno MIRO_ACCESS_TOKEN y MIRO_BOARD_ID requeridas")
         return
     
-    # Inicializar API Cósmica
-    cosmic_api = CosmicKanbanAPI(miro_token, board_id)
+    tasks_file = tasks_file or os.getenv("COSMIC_TASKS_FILE")
+    max_concurrency = int(os.getenv("MAX_CONCURRENT_REQUESTS", "8"))
+    rate_limit = float(os.getenv("RATE_LIMIT_PER_SECOND", "8"))
+    max_retries = int(os.getenv("MAX_RETRIES", "5"))
+    bulk_mode = os.getenv("BULK_MODE", "true").lower() == "true"
+    batch_size = int(os.getenv("BATCH_SIZE", "10"))
+    delete_removed = os.getenv("DELETE_REMOVED_CARDS", "false").lower() == "true"
+    board_snapshot = os.getenv("BOARD_SNAPSHOT", "true").lower() == "true"
+    metrics_port = int(os.getenv("METRICS_PORT", "0"))
+    metrics_host = os.getenv("METRICS_HOST", "127.0.0.1")
+    metrics_textfile = os.getenv("METRICS_TEXTFILE")
+    metrics_pushgateway = os.getenv("METRICS_PUSHGATEWAY_URL")
+    item_log_sample_rate = float(os.getenv("ITEM_LOG_SAMPLE_RATE", "1.0"))
+    if poll_interval is None:
+        poll_interval = float(os.getenv("PULL_INTERVAL_SECONDS", "0"))
     
-    # Crear estructura del tablero
-    structure_result = await cosmic_api.create_cosmic_board_structure()
-    if not structure_result["success"]:
-        logger.error(f"❌ Error creando estructura: {structure_result['error']}")
+    # Diario de una ejecución interrumpida: no se pisa sin que se pida de forma explícita
+    sync_journal = CosmicSyncJournal(os.getenv("SYNC_JOURNAL_PATH", ".cosmic-kanban/sync-journal.jsonl"))
+    if not pull and not resume and not discard_journal and sync_journal.has_pending():
+        logger.error(f"❌ {CosmicKanbanAPI.PENDING_JOURNAL_MESSAGE} ({sync_journal.path})")
         return
     
-    # Generar tareas cósmicas
-    generator = CosmicTaskGenerator()
-    all_tasks = []
-    all_tasks.extend(generator.generate_uplay_transformation_tasks())
-    all_tasks.extend(generator.generate_marketplace_transformation_tasks())
-    all_tasks.extend(generator.generate_social_transformation_tasks())
+    # Métricas: endpoint /metrics opcional mientras dura la sincronización
+    sync_metrics = CosmicSyncMetrics()
+    metrics_runner = await sync_metrics.serve(host=metrics_host, port=metrics_port) if metrics_port else None
+    
+    # Estado local: evita duplicar columnas y tarjetas entre ejecuciones
+    sync_state = CosmicSyncState(os.getenv("SYNC_STATE_DB", ".cosmic-kanban/sync-state.db"))
     
-    # Sincronizar tareas
-    sync_result = await cosmic_api.sync_cosmic_tasks(all_tasks)
+    task_stats = {"total": 0, "guardians": set(), "elements": set()}
+    
+    # Inicializar API Cósmica
+    try:
+        async with CosmicKanbanAPI(miro_token, board_id,
+                                   max_concurrency=max_concurrency,
+                                   rate_limit=rate_limit,
+                                   max_retries=max_retries,
+                                   bulk_mode=bulk_mode,
+                                   bulk_chunk_size=batch_size,
+                                   state=sync_state,
+                                   journal=sync_journal,
+                                   board_snapshot=board_snapshot,
+                                   metrics=sync_metrics,
+                                   item_log_sample_rate=item_log_sample_rate) as cosmic_api:
+            # Modo pull: traer del tablero los cambios de columna (una vez o en bucle)
+            if pull:
+                while True:
+                    try:
+                        await cosmic_api.pull_board_changes(tasks_file)
+                    except Exception as e:
+                        # Un fallo transitorio (red, archivo de tareas, tarjeta ilegible) no detiene el sondeo
+                        if poll_interval <= 0:
+                            raise
+                        sync_metrics.inc("pull_errors_total")
+                        logger.exception(f"❌ Error en el sondeo del tablero, se reintenta en {poll_interval}s: {e}")
+                    if poll_interval <= 0:
+                        return
+                    await asyncio.sleep(poll_interval)
+            
+            # Crear estructura del tablero
+            structure_result = await cosmic_api.create_cosmic_board_structure()
+            if not structure_result["success"]:
+                logger.error(f"❌ Error creando estructura: {structure_result['error']}")
+                return
+            
+            # Generar tareas cósmicas (desde archivo en streaming o desde el generador)
+            invalid_records: List[str] = []
+            if tasks_file:
+                task_source = CosmicTaskSource.from_file(tasks_file, invalid_records)
+            else:
+                generator = CosmicTaskGenerator()
+                task_source = []
+                task_source.extend(generator.generate_uplay_transformation_tasks())
+                task_source.extend(generator.generate_marketplace_transformation_tasks())
+                task_source.extend(generator.generate_social_transformation_tasks())
+            
+            async def tracked_tasks() -> AsyncIterator[CosmicTask]:
+                async for task in CosmicKanbanAPI._iterate_tasks(task_source):
+                    task_stats["total"] += 1
+                    task_stats["guardians"].add(task.guardian)
+                    task_stats["elements"].add(task.element)
+                    yield task
+            
+            # Sincronizar tareas (solo las diferencias respecto al estado local)
+            sync_result = await cosmic_api.sync_cosmic_tasks(tracked_tasks(),
+                                                             delete_removed=delete_removed,
+                                                             resume=resume,
+                                                             invalid_records=invalid_records,
+                                                             discard_journal=discard_journal)
+    finally:
+        sync_journal.close()
+        sync_state.close()
+        if metrics_textfile:
+            sync_metrics.write_textfile(metrics_textfile)
+        if metrics_pushgateway:
+            try:
+                await sync_metrics.push(metrics_pushgateway)
+            except aiohttp.ClientError as e:
+                logger.warning(f"⚠️ No se pudieron enviar las métricas al Pushgateway: {e}")
+        if metrics_runner:
+            await metrics_runner.cleanup()
     
     # Reporte final
     logger.info("🌟 ¡Sincronización Cósmica Completada!")
     logger.info(f"✅ Tareas sincronizadas exitosamente: {sync_result['success']}")
     logger.info(f"❌ Tareas fallidas: {sync_result['failed']}")
+    logger.info(f"🧮 Creadas: {sync_result['created']}, actualizadas: {sync_result['updated']}, "
+                f"sin cambios: {sync_result['unchanged']}, eliminadas: {sync_result['deleted']}")
     
     if sync_result['errors']:
         logger.info("🔍 Errores detectados:")
@@ -409,9 +1976,9 @@ async def main():
 🌟 ═══════════════════════════════════════════════════════
 
 ✨ Tablero Miro: https://miro.com/app/board/{board_id}/
-📊 Tareas Sincronizadas: {sync_result['success']}/{len(all_tasks)}
-🎯 Guardianes Involucrados: {len(set(task.guardian for task in all_tasks))}
-🌀 Elementos Cósmicos: {len(set(task.element for task in all_tasks))}
+📊 Tareas Sincronizadas: {sync_result['success']}/{task_stats['total']}
+🎯 Guardianes Involucrados: {len(task_stats['guardians'])}
+🌀 Elementos Cósmicos: {len(task_stats['elements'])}
 
 🔥 "Cada tarjeta es una chispa de propósito,
    cada movimiento un acto de co-creación sagrada"
@@ -420,4 +1987,22 @@ async def main():
     """)
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="🌟 Sincronización del Tablero Kanban Cósmico con Miro")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reanudar una sincronización interrumpida a partir del diario")
+    parser.add_argument("--discard-journal", action="store_true",
+                        help="Descartar el diario de una sincronización interrumpida en lugar de reanudarla")
+    parser.add_argument("--tasks-file",
+                        help="Archivo JSONL/YAML con las tareas (se procesa en streaming)")
+    parser.add_argument("--pull", action="store_true",
+                        help="Traer del tablero los cambios de columna y actualizar el estado y el archivo de tareas")
+    parser.add_argument("--poll-interval", type=float,
+                        help="Con --pull, segundos entre sondeos (0 = un solo sondeo)")
+    args = parser.parse_args()
+    log_listener = configure_logging()
+    try:
+        asyncio.run(main(resume=args.resume, tasks_file=args.tasks_file,
+                         pull=args.pull, poll_interval=args.poll_interval,
+                         discard_journal=args.discard_journal))
+    finally:
+        log_listener.stop()
\ No newline at end of file
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+🧪 BENCHMARK DEL TABLERO KANBAN CÓSMICO
+Banco de pruebas offline para la sincronización con Miro
+
+Levanta en el mismo proceso un doble de los endpoints `/v2/boards/{id}/items`
+de Miro (latencia, tasa de errores y 429 configurables) y mide
+`create_cosmic_board_structure` + `sync_cosmic_tasks` con tareas sintéticas,
+reportando items/s, latencia p50/p99 por petición y memoria pico.
+
+Uso:
+    python scripts/utilities/cosmic-kanban-benchmark.py --sizes 100,1000,10000
+    python scripts/utilities/cosmic-kanban-benchmark.py --rate-limit 50 --error-rate 0.01 --json bench.json
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import itertools
+import json
+import logging
+import math
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+
+_AUTOMATION_PATH = Path(__file__).with_name("cosmic-kanban-automation.py")
+
+def load_automation_module():
+    """📦 Importa cosmic-kanban-automation.py (el guion en su nombre impide un import normal)"""
+    spec = importlib.util.spec_from_file_location("cosmic_kanban_automation", _AUTOMATION_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+class FakeMiroServer:
+    """🪞 Doble en proceso de los endpoints de elementos de Miro
+
+    Soporta creación individual y bulk, listado con paginación por cursor,
+    lectura, actualización (PATCH) y eliminación. Los elementos llevan
+    `modifiedAt` y el listado responde con un ETag del tablero (304 si coincide
+    con If-None-Match). Cada petición sufre una
+    latencia `latency_ms ± jitter_ms`; una fracción `error_rate` responde con
+    `error_status`, y si `rate_limit` > 0 se aplica una cuota por segundo que
+    responde 429 con Retry-After y cabeceras X-RateLimit-*.
+    """
+
+    def __init__(self, latency_ms: float = 20.0, jitter_ms: float = 5.0,
+                 error_rate: float = 0.0, error_status: int = 503,
+                 rate_limit: float = 0.0, bulk_limit: int = 20, seed: int = 42):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rate_limit = rate_limit
+        self.bulk_limit = bulk_limit
+        self._random = random.Random(seed)
+        self._ids = itertools.count(3458764500000000000)
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._version = 0
+        self._runner: Optional[web.AppRunner] = None
+
+        self.items: Dict[str, Dict[str, Any]] = {}
+        self.stats = {"requests": 0, "throttled": 0, "errors": 0}
+        self.base_url = ""
+
+    async def __aenter__(self) -> "FakeMiroServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.stop()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """🚀 Arranca el servidor; retorna el `base_url` para CosmicKanbanAPI"""
+        app = web.Application(client_max_size=16 * 1024 * 1024)
+        app.router.add_post("/v2/boards/{board_id}/items", self._create_item)
+        app.router.add_post("/v2/boards/{board_id}/items/bulk", self._create_bulk)
+        app.router.add_get("/v2/boards/{board_id}/items", self._list_items)
+        app.router.add_get("/v2/boards/{board_id}/items/{item_id}", self._get_item)
+        app.router.add_patch("/v2/boards/{board_id}/{kind}/{item_id}", self._update_item)
+        app.router.add_delete("/v2/boards/{board_id}/items/{item_id}", self._delete_item)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_host, bound_port = self._runner.addresses[0][:2]
+        self.base_url = f"http://{bound_host}:{bound_port}/v2"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _simulate(self) -> Optional[web.Response]:
+        """⏱️ Aplica latencia, cuota y errores; retorna una respuesta si la petición falla"""
+        self.stats["requests"] += 1
+        delay = max(0.0, self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms))
+        await asyncio.sleep(delay / 1000)
+
+        headers = {}
+        if self.rate_limit > 0:
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            reset_in = max(0.0, 1.0 - (now - self._window_start))
+            remaining = max(0, int(self.rate_limit) - self._window_count)
+            headers = {
+                "X-RateLimit-Limit": str(int(self.rate_limit)),
+                "X-RateLimit-Remaining": str(remaining),
+                "X-RateLimit-Reset": f"{reset_in:.3f}"
+            }
+            if self._window_count > self.rate_limit:
+                self.stats["throttled"] += 1
+                headers["Retry-After"] = f"{reset_in:.3f}"
+                return web.json_response({"status": 429, "message": "Too Many Requests"},
+                                         status=429, headers=headers)
+
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.stats["errors"] += 1
+            return web.json_response({"status": self.error_status, "message": "Simulated failure"},
+                                     status=self.error_status, headers=headers)
+        return None
+
+    def _touch(self, item: Dict[str, Any]) -> None:
+        """🕒 Marca el elemento como modificado y cambia el ETag del tablero"""
+        self._version += 1
+        item["modifiedAt"] = datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+    def _store(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        item_id = str(next(self._ids))
+        item = dict(payload, id=item_id)
+        item.setdefault("type", "card")
+        self._touch(item)
+        self.items[item_id] = item
+        return item
+
+    def move_item(self, item_id: str, x: float, y: Optional[float] = None) -> None:
+        """🖐️ Simula que alguien arrastra una tarjeta en el tablero"""
+        item = self.items[item_id]
+        position = item.setdefault("position", {})
+        position["x"] = x
+        if y is not None:
+            position["y"] = y
+        self._touch(item)
+
+    async def _create_item(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        failure = await self._simulate()
+        if failure is not None:
+            return failure
+        return web.json_response(self._store(payload), status=201)
+
+    async def _create_bulk(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        failure = await self._simulate()
+        if failure is not None:
+            return failure
+        if not isinstance(payload, list) or not payload:
+            return web.json_response({"status": 400, "message": "Expected a non-empty list"}, status=400)
+        if len(payload) > self.bulk_limit:
+            return web.json_response({"status": 413, "message": "Too many items"}, status=413)
+        created = [self._store(item) for item in payload]
+        return web.json_response({"data": created, "type": "list"}, status=201)
+
+    async def _list_items(self, request: web.Request) -> web.Response:
+        failure = await self._simulate()
+        if failure is not None:
+            return failure
+        etag = f'W/"{self._version}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        item_type = request.query.get("type")
+        limit = min(50, int(request.query.get("limit", 10)))
+        offset = int(request.query.get("cursor") or 0)
+        items = [item for item in self.items.values() if not item_type or item.get("type") == item_type]
+        page = items[offset:offset + limit]
+        body = {"data": page, "limit": limit, "size": len(page), "total": len(items)}
+        if offset + limit < len(items):
+            body["cursor"] = str(offset + limit)
+        return web.json_response(body, headers={"ETag": etag})
+
+    async def _get_item(self, request: web.Request) -> web.Response:
+        failure = await self._simulate()
+        if failure is not None:
+            return failure
+        item = self.items.get(request.match_info["item_id"])
+        if item is None:
+            return web.json_response({"status": 404, "message": "Item not found"}, status=404)
+        return web.json_response(item)
+
+    async def _update_item(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        failure = await self._simulate()
+        if failure is not None:
+            return failure
+        item = self.items.get(request.match_info["item_id"])
+        if item is None:
+            return web.json_response({"status": 404, "message": "Item not found"}, status=404)
+        for key, value in payload.items():
+            if isinstance(value, dict) and isinstance(item.get(key), dict):
+                item[key].update(value)
+            else:
+                item[key] = value
+        self._touch(item)
+        return web.json_response(item)
+
+    async def _delete_item(self, request: web.Request) -> web.Response:
+        failure = await self._simulate()
+        if failure is not None:
+            return failure
+        if self.items.pop(request.match_info["item_id"], None) is None:
+            return web.json_response({"status": 404, "message": "Item not found"}, status=404)
+        self._version += 1
+        return web.Response(status=204)
+
+def synthetic_tasks(module, count: int) -> List[Any]:
+    """🎲 Genera `count` tareas cósmicas variadas y deterministas"""
+    elements = list(module.ThematicElement)
+    guardians = list(module.GuardianRoles)
+    levels = list(module.HambrELevel)
+    statuses = ["Backlog Cósmico", "En Proceso de Alquimia", "En Revisión de Calidad", "Manifestado"]
+    priorities = ["Critical", "High", "Medium", "Low"]
+    return [
+        module.CosmicTask(
+            title=f"Tarea sintética #{i:05d}",
+            description=f"Misión de benchmark número {i} para medir la sincronización con Miro",
+            element=elements[i % len(elements)],
+            guardian=guardians[i % len(guardians)],
+            hambre_level=levels[i % len(levels)],
+            priority=priorities[i % len(priorities)],
+            phase=i % 3 + 1,
+            estimated_hours=i % 13 + 1,
+            philosophical_kpi=("IER", "VIC", "GS")[i % 3],
+            tags=["Benchmark", f"Lote_{i // 100}"],
+            status=statuses[i % len(statuses)]
+        )
+        for i in range(count)
+    ]
+
+def percentile(values: List[float], pct: float) -> float:
+    """📐 Percentil por rango más cercano"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def latency_trace(latencies: List[float]) -> aiohttp.TraceConfig:
+    """⏱️ TraceConfig que registra la duración de cada petición HTTP (en segundos)"""
+    trace = aiohttp.TraceConfig()
+
+    async def on_request_start(session, context, params):
+        context.started_at = time.perf_counter()
+
+    async def on_request_end(session, context, params):
+        latencies.append(time.perf_counter() - context.started_at)
+
+    trace.on_request_start.append(on_request_start)
+    trace.on_request_end.append(on_request_end)
+    return trace
+
+async def run_scenario(module, task_count: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """🏁 Ejecuta estructura + sincronización contra el doble y retorna las métricas"""
+    tasks = synthetic_tasks(module, task_count)
+    latencies: List[float] = []
+
+    async with FakeMiroServer(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                              error_rate=args.error_rate, rate_limit=args.rate_limit) as server:
+        tracemalloc.reset_peak()
+        started = time.perf_counter()
+        async with module.CosmicKanbanAPI("benchmark-token", "benchmark-board",
+                                          base_url=server.base_url,
+                                          max_concurrency=args.concurrency,
+                                          rate_limit=args.client_rate,
+                                          max_retries=args.max_retries,
+                                          bulk_mode=not args.no_bulk,
+                                          bulk_chunk_size=args.bulk_size,
+                                          trace_configs=[latency_trace(latencies)]) as api:
+            structure = await api.create_cosmic_board_structure()
+            result = await api.sync_cosmic_tasks(tasks)
+            metrics = api.metrics
+        elapsed = time.perf_counter() - started
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        server_stats = dict(server.stats)
+
+    items_written = result["success"] + structure.get("columns_created", 0)
+    return {
+        "tasks": task_count,
+        "bulk": not args.no_bulk,
+        "elapsed_s": round(elapsed, 3),
+        "items_per_s": round(items_written / elapsed, 1) if elapsed else 0.0,
+        "synced": result["success"],
+        "failed": result["failed"],
+        "requests": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "peak_mem_mb": round(peak_bytes / (1024 * 1024), 2),
+        "retries": int(metrics.total("retries_total")),
+        "rate_limit_wait_s": round(metrics.value("rate_limit_wait_seconds_total"), 3),
+        "server_throttled": server_stats["throttled"],
+        "server_errors": server_stats["errors"]
+    }
+
+def print_report(rows: List[Dict[str, Any]]) -> None:
+    print("\n🧪 ═══════════════ BENCHMARK KANBAN CÓSMICO ═══════════════")
+    print(f"{'tareas':>8} {'items/s':>10} {'tiempo s':>9} {'peticiones':>10} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'mem MB':>8} {'fallidas':>8} {'429':>6}")
+    for row in rows:
+        print(f"{row['tasks']:>8} {row['items_per_s']:>10} {row['elapsed_s']:>9} {row['requests']:>10} "
+              f"{row['p50_ms']:>8} {row['p99_ms']:>8} {row['peak_mem_mb']:>8} {row['failed']:>8} "
+              f"{row['server_throttled']:>6}")
+
+async def run_benchmark(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    module = load_automation_module()
+    # Los logs por tarjeta distorsionan la medición
+    logging.getLogger("CosmicKanban").setLevel(logging.WARNING)
+
+    tracemalloc.start()
+    try:
+        rows = []
+        for size in args.sizes:
+            rows.append(await run_scenario(module, size, args))
+        return rows
+    finally:
+        tracemalloc.stop()
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="🧪 Benchmark offline de la sincronización Kanban Cósmica")
+    parser.add_argument("--sizes", default="100,1000,10000",
+                        type=lambda value: [int(size) for size in value.split(",") if size],
+                        help="Cantidades de tareas sintéticas, separadas por comas")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Latencia media del doble de Miro")
+    parser.add_argument("--jitter-ms", type=float, default=5.0, help="Variación de la latencia")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de peticiones que fallan (503)")
+    parser.add_argument("--rate-limit", type=float, default=0.0,
+                        help="Cuota del servidor en peticiones/s (0 = sin 429)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Peticiones simultáneas del cliente")
+    parser.add_argument("--client-rate", type=float, default=1000.0,
+                        help="Tasa inicial del limitador del cliente (peticiones/s)")
+    parser.add_argument("--max-retries", type=int, default=5)
+    parser.add_argument("--bulk-size", type=int, default=10, help="Elementos por petición bulk")
+    parser.add_argument("--no-bulk", action="store_true", help="Una petición por tarjeta")
+    parser.add_argument("--json", dest="json_path", help="Guardar los resultados en este archivo JSON")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    rows = asyncio.run(run_benchmark(args))
+    print_report(rows)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"config": {k: v for k, v in vars(args).items() if k != "json_path"},
+                       "results": rows}, f, indent=2)
+        print(f"\n📊 Resultados guardados en: {args.json_path}")
+
+if __name__ == "__main__":
+    main()
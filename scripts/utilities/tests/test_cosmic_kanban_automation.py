@@ -0,0 +1,522 @@
+"""
+🧪 Pruebas de cosmic-kanban-automation.py
+
+Las rutas de sincronización se ejercitan contra FakeMiroServer
+(cosmic-kanban-benchmark.py); las ramas de fallback del bulk, con respuestas
+simuladas de `_request`.
+"""
+
+import asyncio
+import importlib.util
+import sys
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from pathlib import Path
+
+import pytest
+
+_UTILITIES = Path(__file__).resolve().parent.parent
+
+def _load(name: str, filename: str):
+    spec = importlib.util.spec_from_file_location(name, _UTILITIES / filename)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+kanban = _load("cosmic_kanban_automation", "cosmic-kanban-automation.py")
+benchmark = _load("cosmic_kanban_benchmark", "cosmic-kanban-benchmark.py")
+
+def make_api(**kwargs):
+    kwargs.setdefault("rate_limit", 1000.0)
+    kwargs.setdefault("max_retries", 0)
+    return kanban.CosmicKanbanAPI("test-token", "test-board", **kwargs)
+
+def fake_requests(api, responder):
+    """Sustituye `_request` por `responder(method, path, payload)` y registra las llamadas"""
+    calls = []
+
+    async def request(method, path, payload=None, headers=None, response_meta=None):
+        calls.append((method, path, payload))
+        return responder(method, path, payload)
+
+    api._request = request
+    return calls
+
+def created(item):
+    return dict(item, id=f"id-{item['n']}")
+
+# 📦 Bulk: todo o nada, bisección con 400/413/422 y ningún reenvío en otro caso
+
+def test_bulk_chunk_success_uses_a_single_request():
+    api = make_api()
+    items = [{"n": i} for i in range(4)]
+    calls = fake_requests(api, lambda method, path, payload: {"data": [created(item) for item in payload]})
+
+    results = asyncio.run(api._create_chunk(items))
+
+    assert [result["id"] for result in results] == ["id-0", "id-1", "id-2", "id-3"]
+    assert [path for _, path, _ in calls] == ["/boards/test-board/items/bulk"]
+
+@pytest.mark.parametrize("status", [400, 413, 422])
+def test_bulk_chunk_rejected_as_invalid_is_bisected(status):
+    api = make_api()
+    items = [{"n": i} for i in range(4)]
+
+    def responder(method, path, payload):
+        if path.endswith("/bulk"):
+            if any(item["n"] == 2 for item in payload):
+                return {"status": status, "message": "invalid item"}
+            return {"data": [created(item) for item in payload]}
+        if payload["n"] == 2:
+            return {"status": status, "message": "invalid item"}
+        return created(payload)
+
+    calls = fake_requests(api, responder)
+    results = asyncio.run(api._create_chunk(items))
+
+    assert [result.get("id") for result in results] == ["id-0", "id-1", None, "id-3"]
+    assert results[2]["status"] == status
+    # [0..3] → [0, 1] y [2, 3] en bulk → [2] y [3] individuales
+    assert sorted(len(payload) if isinstance(payload, list) else 1 for _, _, payload in calls) == [1, 1, 2, 2, 4]
+
+@pytest.mark.parametrize("response", [
+    {"status": 500, "message": "Internal Server Error"},
+    {"status": 429, "message": "Too Many Requests"},
+    {"data": [{"id": "id-0"}]},
+])
+def test_bulk_chunk_other_failures_are_reported_without_resending(response):
+    api = make_api()
+    items = [{"n": i} for i in range(3)]
+    calls = fake_requests(api, lambda method, path, payload: dict(response))
+
+    results = asyncio.run(api._create_chunk(items))
+
+    assert [path for _, path, _ in calls] == ["/boards/test-board/items/bulk"]
+    assert len(results) == 3
+    assert not any(result.get("id") for result in results)
+    assert all(result.get("status") == response.get("status") for result in results)
+
+def test_bulk_create_against_fake_server_splits_oversized_chunks():
+    async def scenario():
+        async with benchmark.FakeMiroServer(latency_ms=0, jitter_ms=0, bulk_limit=2) as server:
+            async with make_api(base_url=server.base_url, bulk_chunk_size=4) as api:
+                results = await api._bulk_create_items([{"type": "card", "data": {"title": f"t{i}"}}
+                                                        for i in range(5)])
+            return results, server
+
+    results, server = asyncio.run(scenario())
+    assert all(result.get("id") for result in results)
+    assert sorted(item["data"]["title"] for item in server.items.values()) == [f"t{i}" for i in range(5)]
+
+# 🔄 Modo pull: el sondeo sobrevive a fallos transitorios y la reescritura no deja temporales
+
+class StopPolling(BaseException):
+    pass
+
+def test_pull_loop_logs_errors_and_keeps_polling(tmp_path, monkeypatch):
+    monkeypatch.setenv("MIRO_ACCESS_TOKEN", "test-token")
+    monkeypatch.setenv("MIRO_BOARD_ID", "test-board")
+    monkeypatch.setenv("SYNC_STATE_DB", str(tmp_path / "state.db"))
+    monkeypatch.setenv("SYNC_JOURNAL_PATH", str(tmp_path / "journal.jsonl"))
+    calls = []
+
+    async def pull_board_changes(self, tasks_file=None):
+        calls.append(tasks_file)
+        if len(calls) == 1:
+            raise OSError("disco lleno")
+        if len(calls) == 2:
+            raise ValueError("tarjeta ilegible")
+        raise StopPolling()
+
+    monkeypatch.setattr(kanban.CosmicKanbanAPI, "pull_board_changes", pull_board_changes)
+    with pytest.raises(StopPolling):
+        asyncio.run(kanban.main(pull=True, poll_interval=0.001))
+    assert len(calls) == 3
+
+def test_single_pull_still_raises(tmp_path, monkeypatch):
+    monkeypatch.setenv("MIRO_ACCESS_TOKEN", "test-token")
+    monkeypatch.setenv("MIRO_BOARD_ID", "test-board")
+    monkeypatch.setenv("SYNC_STATE_DB", str(tmp_path / "state.db"))
+    monkeypatch.setenv("SYNC_JOURNAL_PATH", str(tmp_path / "journal.jsonl"))
+
+    async def pull_board_changes(self, tasks_file=None):
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(kanban.CosmicKanbanAPI, "pull_board_changes", pull_board_changes)
+    with pytest.raises(OSError):
+        asyncio.run(kanban.main(pull=True, poll_interval=0))
+
+def test_update_statuses_removes_temp_file_on_failure(tmp_path):
+    tasks_file = tmp_path / "tasks.jsonl"
+    record = {"title": "Tarea", "element": "FIRE", "guardian": "KIRA",
+              "hambre_level": "NURTURES_CURIOSITY", "status": "Backlog Cósmico"}
+    task = kanban.CosmicTask.from_dict(record)
+    original = kanban.json.dumps(record, ensure_ascii=False) + "\n"
+    tasks_file.write_text(original, encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        # Un movimiento mal formado falla a mitad de la reescritura
+        kanban.CosmicTaskSource.update_statuses(str(tasks_file), {task.task_key(): ("Manifestado",)})
+
+    assert [path.name for path in tmp_path.iterdir()] == ["tasks.jsonl"]
+    assert tasks_file.read_text(encoding="utf-8") == original
+
+# 🗑️ Eliminación de tarjetas retiradas: un fallo se registra sin abortar la sincronización
+
+def make_task(title, status="Backlog Cósmico", description="Descripción"):
+    return kanban.CosmicTask.from_dict({"title": title, "description": description, "element": "FIRE",
+                                        "guardian": "KIRA", "hambre_level": "NURTURES_CURIOSITY",
+                                        "status": status})
+
+def test_delete_failure_is_recorded_and_sync_completes(tmp_path):
+    state = kanban.CosmicSyncState(str(tmp_path / "state.db"))
+
+    async def scenario():
+        async with benchmark.FakeMiroServer(latency_ms=0, jitter_ms=0) as server:
+            async with make_api(base_url=server.base_url, state=state) as api:
+                await api.sync_cosmic_tasks([make_task("Queda"), make_task("Se retira")])
+
+                async def failing_delete(item_id):
+                    raise kanban.aiohttp.ClientError("conexión reiniciada")
+
+                api._delete_miro_item = failing_delete
+                return await api.sync_cosmic_tasks([make_task("Queda")], delete_removed=True)
+
+    results = asyncio.run(scenario())
+    assert results["deleted"] == 0
+    assert results["unchanged"] == 1
+    assert any("conexión reiniciada" in error for error in results["errors"])
+    # La tarjeta sigue en el estado: se volverá a intentar en la próxima sincronización
+    assert len(state.load_cards("test-board")) == 2
+    state.close()
+
+# 📈 Métricas: el endpoint HTTP escucha solo en loopback salvo que se pida otra interfaz
+
+def test_metrics_endpoint_binds_loopback_by_default():
+    async def scenario():
+        metrics = kanban.CosmicSyncMetrics()
+        runner = await metrics.serve(port=0)
+        try:
+            return [site.name for site in runner.sites]
+        finally:
+            await runner.cleanup()
+
+    names = asyncio.run(scenario())
+    assert names and all(name.startswith("http://127.0.0.1:") for name in names)
+
+# 🎨 Render memoizado: modificar la tarjeta retornada no corrompe la caché
+
+def test_to_miro_card_returns_an_independent_copy():
+    task = make_task("Memoizada")
+    content_hash = task.content_hash()
+    card = task.to_miro_card()
+    card["data"]["title"] = "alterado"
+    card["data"]["style"]["fillColor"] = "#000000"
+    card["data"]["position"]["x"] = 999
+    card["tags"].append("intrusa")
+
+    fresh = task.to_miro_card()
+    assert fresh["data"]["title"] != "alterado"
+    assert fresh["data"]["style"].get("fillColor") != "#000000"
+    assert fresh["data"]["position"] == {"x": 0, "y": 0}
+    assert "intrusa" not in fresh["tags"]
+    assert make_task("Memoizada").content_hash() == content_hash
+
+# 🗺️ Snapshot del tablero: quitar un elemento solo toca sus propios índices
+
+def snapshot_item(item_id, title, tags, x):
+    return {"id": item_id, "type": "card", "data": {"title": title}, "tags": tags,
+            "position": {"x": x, "y": 150}}
+
+def test_board_snapshot_remove_and_reindex():
+    snapshot = kanban.CosmicBoardSnapshot(kanban.CosmicKanbanAPI.COLUMN_POSITIONS)
+    snapshot.add(snapshot_item("a", "Uno", ["fuego", "kira"], 100))
+    snapshot.add(snapshot_item("b", "Dos", ["fuego"], 450))
+
+    # Reindexar con otros tags y otra columna descarta las entradas anteriores
+    snapshot.add(snapshot_item("a", "Uno", ["agua"], 450))
+    assert snapshot.items_with_tag("fuego") == {"b"}
+    assert snapshot.items_with_tag("kira") == set()
+    assert snapshot.items_with_tag("agua") == {"a"}
+    assert snapshot.by_column["Backlog Cósmico"] == set()
+    assert snapshot.by_column["En Proceso de Alquimia"] == {"a", "b"}
+
+    snapshot.remove("a")
+    snapshot.remove("desconocido")
+    assert len(snapshot) == 1
+    assert snapshot.find_by_title("Uno") is None
+    assert snapshot.items_with_tag("agua") == set()
+    assert snapshot.by_column["En Proceso de Alquimia"] == {"b"}
+
+# 🗄️ Estado local: solo se crean las tarjetas nuevas y se actualizan las que cambiaron
+
+def test_sync_state_detects_unchanged_and_changed_tasks(tmp_path):
+    state = kanban.CosmicSyncState(str(tmp_path / "state.db"))
+
+    async def scenario():
+        async with benchmark.FakeMiroServer(latency_ms=0, jitter_ms=0) as server:
+            async with make_api(base_url=server.base_url, state=state) as api:
+                first = await api.sync_cosmic_tasks([make_task("Uno"), make_task("Dos")])
+                again = await api.sync_cosmic_tasks([make_task("Uno"), make_task("Dos")])
+                changed = await api.sync_cosmic_tasks([make_task("Uno", description="Nueva misión"),
+                                                       make_task("Dos", status="Manifestado")])
+            return first, again, changed, server
+
+    first, again, changed, server = asyncio.run(scenario())
+    assert (first["created"], first["updated"], first["unchanged"]) == (2, 0, 0)
+    assert (again["created"], again["updated"], again["unchanged"]) == (0, 0, 2)
+    assert (changed["created"], changed["updated"], changed["unchanged"]) == (0, 2, 0)
+    assert len(server.items) == 2
+    descriptions = [item["data"]["description"] for item in server.items.values()]
+    assert any("Nueva misión" in description for description in descriptions)
+
+    cards = state.load_cards("test-board")
+    assert cards[make_task("Dos").task_key()][1] == make_task("Dos", status="Manifestado").content_hash()
+    state.close()
+
+def test_sync_state_round_trip_in_memory():
+    state = kanban.CosmicSyncState(":memory:")
+    state.save_card("test-board", "k1", "item-1", "hash-1", "Backlog Cósmico")
+    state.commit()
+    assert state.load_cards("test-board") == {"k1": ("item-1", "hash-1", "Backlog Cósmico")}
+    assert state.load_cards("otro-board") == {}
+    state.delete_card("test-board", "k1")
+    assert state.load_cards("test-board") == {}
+    state.close()
+
+# 📜 Diario: una ejecución interrumpida se reanuda aunque la última línea quedara truncada
+
+def write_interrupted_journal(path, done_task, done_id, in_flight_task):
+    journal = kanban.CosmicSyncJournal(str(path))
+    journal.begin("test-board")
+    for task in (done_task, in_flight_task):
+        journal.record_intent("create", task.task_key(), title=task.to_miro_card()["data"]["title"],
+                              hash=task.content_hash(), status=task.status, item_id=None)
+    journal.record_done("create", done_task.task_key(), done_id)
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"op": "done", "action": "create", "key": "' + in_flight_task.task_key()[:10])
+
+def test_journal_replay_ignores_truncated_last_line(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    done, in_flight = make_task("Hecha"), make_task("En vuelo")
+    write_interrupted_journal(path, done, "item-1", in_flight)
+
+    entries = kanban.CosmicSyncJournal(str(path)).replay("test-board")
+    assert entries[done.task_key()]["phase"] == "done"
+    assert entries[done.task_key()]["item_id"] == "item-1"
+    assert entries[in_flight.task_key()]["phase"] == "in_flight"
+    assert kanban.CosmicSyncJournal(str(path)).replay("otro-board") == {}
+
+def test_resume_adopts_in_flight_creates_instead_of_duplicating(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    state = kanban.CosmicSyncState(str(tmp_path / "state.db"))
+    done, in_flight, pending = make_task("Hecha"), make_task("En vuelo"), make_task("Pendiente")
+
+    async def scenario():
+        async with benchmark.FakeMiroServer(latency_ms=0, jitter_ms=0) as server:
+            journal = kanban.CosmicSyncJournal(str(path))
+            async with make_api(base_url=server.base_url, state=state, journal=journal) as api:
+                # Ambas tarjetas llegaron a Miro antes de la interrupción
+                done_item = await api._create_miro_item(done.to_miro_card())
+                await api._create_miro_item(in_flight.to_miro_card())
+                write_interrupted_journal(path, done, done_item["id"], in_flight)
+                results = await api.sync_cosmic_tasks([done, in_flight, pending], resume=True)
+            return results, server
+
+    results, server = asyncio.run(scenario())
+    assert results["resumed"] == 2
+    assert results["created"] == 1
+    assert len(server.items) == 3
+    assert set(state.load_cards("test-board")) == {done.task_key(), in_flight.task_key(), pending.task_key()}
+    state.close()
+
+def test_pending_journal_requires_resume_or_discard(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    done, in_flight, pending = make_task("Hecha"), make_task("En vuelo"), make_task("Pendiente")
+    write_interrupted_journal(path, done, "item-1", in_flight)
+    interrupted = path.read_text(encoding="utf-8")
+
+    async def scenario(**kwargs):
+        async with benchmark.FakeMiroServer(latency_ms=0, jitter_ms=0) as server:
+            journal = kanban.CosmicSyncJournal(str(path))
+            async with make_api(base_url=server.base_url, journal=journal) as api:
+                return await api.sync_cosmic_tasks([pending], **kwargs)
+
+    with pytest.raises(RuntimeError, match="--discard-journal"):
+        asyncio.run(scenario())
+    assert path.read_text(encoding="utf-8") == interrupted
+
+    results = asyncio.run(scenario(discard_journal=True))
+    assert results["success"] == 1
+    assert kanban.CosmicSyncJournal(str(path)).replay("test-board") == {}
+
+def test_sync_fails_fast_when_every_sender_dies(tmp_path):
+    state = kanban.CosmicSyncState(str(tmp_path / "state.db"))
+
+    def save_card(*args, **kwargs):
+        raise kanban.sqlite3.OperationalError("database or disk is full")
+
+    state.save_card = save_card
+
+    async def scenario():
+        async with benchmark.FakeMiroServer(latency_ms=0, jitter_ms=0) as server:
+            async with make_api(base_url=server.base_url, state=state, max_concurrency=2,
+                                queue_size=1, bulk_mode=False) as api:
+                await asyncio.wait_for(api.sync_cosmic_tasks([make_task(f"Tarea {i}") for i in range(20)]), 5)
+
+    with pytest.raises(kanban.sqlite3.OperationalError):
+        asyncio.run(scenario())
+    state.close()
+
+def test_invalid_source_records_block_deletions(tmp_path):
+    state = kanban.CosmicSyncState(str(tmp_path / "state.db"))
+    tasks_file = tmp_path / "tasks.jsonl"
+    records = [{"title": title, "element": "FIRE", "guardian": "KIRA", "hambre_level": "NURTURES_CURIOSITY"}
+               for title in ("Uno", "Dos")]
+    tasks_file.write_text("".join(kanban.json.dumps(record) + "\n" for record in records), encoding="utf-8")
+
+    async def sync(api, delete_removed=True):
+        invalid = []
+        source = kanban.CosmicTaskSource.from_file(str(tasks_file), invalid)
+        return await api.sync_cosmic_tasks(source, delete_removed=delete_removed, invalid_records=invalid), invalid
+
+    async def scenario():
+        async with benchmark.FakeMiroServer(latency_ms=0, jitter_ms=0) as server:
+            async with make_api(base_url=server.base_url, state=state) as api:
+                await sync(api)
+                # Un error tipográfico en "Dos": su tarjeta no debe eliminarse
+                typo = dict(records[1], guardian="KIRAA")
+                tasks_file.write_text(kanban.json.dumps(records[0]) + "\n" + kanban.json.dumps(typo) + "\n",
+                                      encoding="utf-8")
+                blocked = await sync(api)
+                tasks_file.write_text(kanban.json.dumps(records[0]) + "\n", encoding="utf-8")
+                removed = await sync(api)
+            return blocked, removed, server
+
+    (blocked, invalid), (removed, _), server = asyncio.run(scenario())
+    assert invalid == [f"{tasks_file}:2"]
+    assert blocked["deleted"] == 0
+    assert any("inválidos" in error for error in blocked["errors"])
+    assert removed["deleted"] == 1
+    assert len(server.items) == 1
+    state.close()
+
+# ⏳ Rate limit: AIMD, pausas por cabeceras, Retry-After y reintentos seguros para POST
+
+def test_rate_limiter_aimd():
+    limiter = kanban.CosmicRateLimiter(rate=8.0, min_rate=0.5)
+    limiter.on_throttle(None)
+    assert limiter.rate == 4.0
+    for _ in range(10):
+        limiter.on_throttle(None)
+    assert limiter.rate == 0.5
+    for _ in range(100):
+        limiter.on_success()
+    assert limiter.rate == 8.0
+
+def test_rate_limiter_follows_quota_headers():
+    limiter = kanban.CosmicRateLimiter(rate=10.0)
+    limiter.update_from_headers({"X-RateLimit-Limit": "100", "X-RateLimit-Remaining": "5", "X-RateLimit-Reset": "30"})
+    assert limiter.rate == pytest.approx(5.0)
+
+    limiter.update_from_headers({"X-RateLimit-Limit": "100", "X-RateLimit-Remaining": "0",
+                                 "X-RateLimit-Reset": str(kanban.time.time() + 2)})
+    assert 1.5 < limiter._paused_until - kanban.time.monotonic() <= 2.0
+
+    paused_until = limiter._paused_until
+    limiter.update_from_headers({"X-RateLimit-Limit": "nada"})
+    limiter.on_throttle(0.5)
+    assert limiter._paused_until == paused_until
+
+@pytest.mark.parametrize("offset, expected", [(30, 30), (-30, 0)])
+def test_parse_retry_after_http_date(offset, expected):
+    moment = datetime.fromtimestamp(kanban.time.time() + offset, timezone.utc)
+    parsed = kanban.CosmicKanbanAPI._parse_retry_after(format_datetime(moment, usegmt=True))
+    assert parsed == pytest.approx(expected, abs=1.5)
+
+@pytest.mark.parametrize("value, expected", [("2", 2.0), ("0.25", 0.25), ("-3", 0.0), ("", None),
+                                             (None, None), ("pronto", None)])
+def test_parse_retry_after_seconds(value, expected):
+    assert kanban.CosmicKanbanAPI._parse_retry_after(value) == expected
+
+def test_request_retries_post_on_429_from_fake_server():
+    async def scenario():
+        async with benchmark.FakeMiroServer(latency_ms=0, jitter_ms=0, rate_limit=3) as server:
+            async with make_api(base_url=server.base_url, max_retries=5) as api:
+                results = await asyncio.gather(*(api._create_miro_item({"type": "card", "data": {"title": f"t{i}"}})
+                                                 for i in range(6)))
+            return results, server, api.metrics
+
+    results, server, metrics = asyncio.run(scenario())
+    assert all(result.get("id") for result in results)
+    assert len(server.items) == 6
+    assert server.stats["throttled"] > 0
+    assert metrics.value("retries_total", reason=429) == server.stats["throttled"]
+
+@pytest.mark.parametrize("status", [502, 504])
+def test_post_is_not_retried_on_ambiguous_gateway_errors(status):
+    async def scenario():
+        async with benchmark.FakeMiroServer(latency_ms=0, jitter_ms=0, error_rate=1.0, error_status=status) as server:
+            async with make_api(base_url=server.base_url, max_retries=2) as api:
+                api._backoff_delay = lambda attempt: 0.0
+                created = await api._create_miro_item({"type": "card", "data": {"title": "t"}})
+                posts = server.stats["requests"]
+                listed = await api._request("GET", "/boards/test-board/items")
+            return created, posts, listed, server.stats["requests"]
+
+    created, posts, listed, requests = asyncio.run(scenario())
+    assert created["status"] == status and posts == 1
+    # Las peticiones idempotentes sí se reintentan
+    assert listed["status"] == status and requests == posts + 3
+
+def test_json_formatter_emits_one_structured_line():
+    try:
+        raise ValueError("fallo cósmico")
+    except ValueError:
+        record = kanban.logging.LogRecord("CosmicKanban", kanban.logging.WARNING, __file__, 1,
+                                          "Tarjeta %s", ("creada",), sys.exc_info())
+    record.item = {"event": "create", "title": "Misión 🌟"}
+
+    line = kanban.CosmicJsonFormatter().format(record)
+    assert "\n" not in line
+    entry = kanban.json.loads(line)
+    assert entry["level"] == "WARNING" and entry["logger"] == "CosmicKanban"
+    assert entry["message"] == "Tarjeta creada"
+    assert entry["item"] == {"event": "create", "title": "Misión 🌟"}
+    assert "ValueError: fallo cósmico" in entry["exc"]
+
+def test_configure_logging_reads_log_style_not_log_format(tmp_path, monkeypatch):
+    monkeypatch.setenv("COSMIC_LOG_STYLE", "json")
+    monkeypatch.setenv("LOG_FORMAT", "text")
+    root = kanban.logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    listener = kanban.configure_logging(log_directory=str(tmp_path))
+    try:
+        assert all(isinstance(handler.formatter, kanban.CosmicJsonFormatter) for handler in listener.handlers)
+    finally:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+        root.handlers[:] = handlers
+        root.setLevel(level)
+
+def test_item_log_sampling_is_partial_and_stable(caplog):
+    tasks = [make_task(f"Tarea {i}") for i in range(200)]
+
+    def logged_titles(rate):
+        api = make_api(item_log_sample_rate=rate)
+        caplog.clear()
+        with caplog.at_level(kanban.logging.INFO, logger="CosmicKanban"):
+            for task in tasks:
+                api._log_item(task, "create", "✨ Tarjeta creada")
+        return [record.item["title"] for record in caplog.records]
+
+    assert len(logged_titles(1.0)) == len(tasks)
+    assert logged_titles(0.0) == []
+    sampled = logged_titles(0.5)
+    assert 0 < len(sampled) < len(tasks)
+    # La misma tarea queda registrada (o no) siempre igual
+    assert logged_titles(0.5) == sampled
+    assert set(logged_titles(0.25)) <= set(sampled)